@@ -1,20 +1,37 @@
 """Langgraph-based conversation agent for metadata extraction using GPT-5."""
-from typing import Dict, Any, List, Optional
-from openai import OpenAI
+from typing import Dict, Any, List, Optional, Iterator
+from openai import OpenAI, AsyncOpenAI
 from langgraph.graph import StateGraph, END
 from schema_loader import SchemaManager, Field
-from models import WorkflowState, WorkflowPhase, FieldStatus
+from schema_registry import shared_registry
+from models import WorkflowState, WorkflowPhase, FieldStatus, PerformanceReport, Span
 from validator import MetadataValidator
-import json
+from llm_cache import LLMResponseCache
+from llm_resilience import RetryPolicy, CircuitBreaker, LLMError, classify_error
+from json_stream import IncrementalJSONObjectParser, parse_json_object
+from structured_output import FieldListCache, ResponseSchemaCache, CONTENT_TYPE_KEY, strip_nulls
+from instrumentation import instrument_node, recording, span, record_span, add_validation_warnings
+from llm_transport import transport_from_env
+from content_type_scoring import ContentTypeScorer
+from content_type_classifier import ContentTypeClassifier, load_history
+from long_document import Chunk, PROVENANCE_KEY, chunk_text, estimate_tokens, reduce_chunk_results
+from rule_extraction import RuleExtractor
+from vocabulary_shortlist import VocabularyShortlist
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
 import os
 import re
+import threading
+import time
 
 
 class MetadataAgent:
     """Agent for guiding metadata extraction workflow using GPT-5-Mini."""
     
     def __init__(self, api_key: str = None, model: str = None, base_url: str = None, 
-                 reasoning_effort: str = None, verbosity: str = None):
+                 reasoning_effort: str = None, verbosity: str = None, cache: LLMResponseCache = None,
+                 retry_policy: RetryPolicy = None, circuit_breaker: CircuitBreaker = None, transport: Any = None):
         """
         Initialize metadata extraction agent.
         
@@ -24,6 +41,10 @@ class MetadataAgent:
             base_url: OpenAI API base URL (default: from OPENAI_BASE_URL env or None)
             reasoning_effort: GPT-5 reasoning level - only used for gpt-5* models (default: from GPT5_REASONING_EFFORT env or "minimal")
             verbosity: Response verbosity - only used for gpt-5* models (default: from GPT5_VERBOSITY env or "low")
+            cache: LLM response cache (default: persistent cache unless LLM_CACHE_ENABLED=false)
+            retry_policy: Retries/backoff/timeout for LLM calls (default: from LLM_MAX_RETRIES, LLM_TIMEOUT, ... env)
+            circuit_breaker: Circuit breaker shared by all LLM calls of this agent
+            transport: Sends the LLM requests (default: from LLM_TRANSPORT env - OpenAI, fake model or cassette replay)
         """
         # Load from environment if not provided
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
@@ -37,20 +58,147 @@ class MetadataAgent:
         # Check if this is a GPT-5 model
         self.is_gpt5 = self.model.startswith("gpt-5")
         
+        # Transport for LLM calls (offline transports need no API key)
+        self.transport = transport or transport_from_env(self)
+        
         # Validate
-        if not self.api_key:
+        if not self.api_key and self.transport.needs_api_key:
             raise ValueError("OPENAI_API_KEY not provided. Set it via parameter or environment variable.")
         
-        # Initialize OpenAI client
-        client_kwargs = {"api_key": self.api_key}
+        # Initialize OpenAI client (retries are handled by retry_policy)
+        client_kwargs = {"api_key": self.api_key or "offline", "max_retries": 0}
         if self.base_url:
             client_kwargs["base_url"] = self.base_url
         self.client = OpenAI(**client_kwargs)
-        
-        # Initialize schema manager and validator
-        self.schema_manager = SchemaManager()
+        # Async client for non-blocking extraction (*_async methods)
+        self.async_client = AsyncOpenAI(**client_kwargs)
+        
+        # Retry policy and circuit breaker for LLM calls
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # Response cache for repeated prompts
+        if cache is None and os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"):
+            cache = LLMResponseCache()
+        self.cache = cache
+        
+        # Structured Outputs: extraction answers are constrained to a JSON Schema compiled from the fields
+        self.structured_outputs = os.getenv("LLM_STRUCTURED_OUTPUTS", "true").lower() in ("1", "true", "yes")
+        self.response_schemas = ResponseSchemaCache()
+        
+        # Headless profile: "phased" (one call per phase) or "fused" (core fields + content type in one call,
+        # special schema in a second one)
+        self.extraction_profile = os.getenv("EXTRACTION_PROFILE", "phased").lower()
+        if self.extraction_profile not in ("phased", "fused"):
+            raise ValueError(f"Unknown EXTRACTION_PROFILE: {self.extraction_profile} (phased or fused)")
+        
+        # Field lists longer than FIELD_SHARD_SIZE are split by schema group and extracted concurrently (0 = off);
+        # FIELD_SHARD_MERGE decides when several shards answer the same field: "owner" or "union" (lists)
+        self.field_shard_size = int(os.getenv("FIELD_SHARD_SIZE", "12"))
+        self.field_shard_merge = os.getenv("FIELD_SHARD_MERGE", "owner").lower()
+        if self.field_shard_merge not in ("owner", "union"):
+            raise ValueError(f"Unknown FIELD_SHARD_MERGE: {self.field_shard_merge} (owner or union)")
+        
+        # Long-document mode: texts above LONG_DOCUMENT_TOKENS (estimated, 0 = off) are extracted per chunk
+        # of at most LONG_DOCUMENT_CHUNK_TOKENS and reduced, with the source chunks kept as provenance
+        self.long_document_tokens = int(os.getenv("LONG_DOCUMENT_TOKENS", "6000"))
+        self.long_document_chunk_tokens = int(os.getenv("LONG_DOCUMENT_CHUNK_TOKENS", "3000"))
+        
+        # Deterministic pre-extraction (URLs, dates, license, prices, ...): fields the rules fill
+        # are not asked from the LLM, the call is skipped if no field is left
+        rules_enabled = os.getenv("RULE_EXTRACTION", "true").lower() in ("1", "true", "yes")
+        self.rule_extractor = RuleExtractor() if rules_enabled else None
+        
+        # Large vocabularies (>= 20 concepts) are not listed in the static prompt prefix; instead the
+        # VOCAB_SHORTLIST_K concepts most relevant to the text are appended to it (0 = off)
+        shortlist_k = int(os.getenv("VOCAB_SHORTLIST_K", "15"))
+        self.vocabulary_shortlist = VocabularyShortlist(shortlist_k) if shortlist_k > 0 else None
+        
+        # Static extraction prompt prefixes per field list (byte-stable for provider prefix caching),
+        # keyed by the Field objects so a reloaded schema gets new prefixes
+        self._prompt_prefixes = FieldListCache()
+        # Token usage of API calls - cached_tokens = input tokens served from the provider's prompt cache
+        self.usage_stats = {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "total_tokens": 0}
+        self._usage_lock = threading.Lock()
+        
+        # Schemas: one registry per process. Only long-running apps start its watcher (app.py,
+        # schema_registry.start()) - headless and batch runs keep the schemas they started with
+        self.schema_registry = shared_registry()
         self.validator = MetadataValidator()
         self.graph = self._build_graph()
+        
+        # Speculative special schema extraction (opt-in): the top-k content types by local pre-score
+        # are extracted while detection runs; at most SPECULATIVE_MAX_WASTED_CALLS calls per run are discarded
+        self.speculative_top_k = int(os.getenv("SPECULATIVE_TOP_K", "0"))
+        self.speculative_max_wasted_calls = int(os.getenv("SPECULATIVE_MAX_WASTED_CALLS", "2"))
+        self.content_type_scorer = ContentTypeScorer(self.schema_manager)
+        self.speculation_stats = {"runs": 0, "hits": 0, "misses": 0, "calls": 0, "wasted_calls": 0, "cancelled_calls": 0}
+        
+        # Local content type classifier in front of the LLM detection: at a calibrated confidence of at least
+        # CONTENT_TYPE_THRESHOLD no LLM call is made; CONTENT_TYPE_HISTORY = JSONL of labelled texts to learn from.
+        # Without labelled texts the confidence is not calibrated and the LLM always decides.
+        self.content_type_classifier = None
+        self.content_type_threshold = float(os.getenv("CONTENT_TYPE_THRESHOLD", "0.7"))
+        self.content_type_stats = {"local": 0, "llm": 0}
+        if os.getenv("CONTENT_TYPE_CLASSIFIER", "true").lower() in ("1", "true", "yes"):
+            self.content_type_classifier = ContentTypeClassifier(self.content_type_scorer)
+            history = os.getenv("CONTENT_TYPE_HISTORY")
+            if history:
+                learned = self.content_type_classifier.fit_history(
+                    load_history(history), self.schema_manager.get_available_special_schemas())
+                print(f"🧭 Inhaltsart-Klassifikator: {learned} gelabelte Texte gelernt "
+                      f"(Skalierung {self.content_type_classifier.scale:.1f})")
+        # Scorer and classifier per schema version - sessions pinned to an older version keep using theirs
+        self._content_type_models: Dict[int, tuple] = {
+            self.schema_manager.version: (self.content_type_scorer, self.content_type_classifier)
+        }
+        
+        # Near-misses of closed/SKOS vocabulary labels ("Workshops") are snapped to the concept label
+        # at a similarity of at least VOCAB_SNAP_THRESHOLD (> 1 = off)
+        self.vocab_snap_threshold = float(os.getenv("VOCAB_SNAP_THRESHOLD", "0.85"))
+        
+        # Subscribe last: the watcher thread may call back as soon as this returns
+        self.schema_registry.subscribe(self._on_schemas_reloaded)
+    
+    @property
+    def schema_manager(self) -> SchemaManager:
+        """Current schema version. Session code uses _schemas(state) to stay on the session's version."""
+        return self.schema_registry.current
+    
+    def _schemas(self, state: WorkflowState) -> SchemaManager:
+        """Schemas of the session: the version current at its first use, unaffected by later reloads."""
+        if state.schema_version is not None:
+            try:
+                return self.schema_registry.get(state.schema_version)
+            except KeyError:
+                # More reloads during the session than the registry keeps versions
+                print(f"⚠️ Schema-Version {state.schema_version} der Sitzung nicht mehr verfügbar - "
+                      f"wechsle auf Version {self.schema_registry.version}")
+        schemas = self.schema_registry.current
+        state.schema_version = schemas.version
+        return schemas
+    
+    def _on_schemas_reloaded(self, schema_manager: SchemaManager) -> None:
+        """Content type scoring and classification of new sessions follow the current schema version."""
+        self.content_type_scorer, self.content_type_classifier = self._content_type_models_for(schema_manager)
+        # Entries of the old version would stay alive with their Field objects - running sessions rebuild theirs
+        self.response_schemas.clear()
+        self._prompt_prefixes.clear()
+    
+    def _content_type_models_for(self, schemas: SchemaManager) -> tuple:
+        """(scorer, classifier or None) built on the given schema version."""
+        models = self._content_type_models.get(schemas.version)
+        if models is None or models[0].schema_manager is not schemas:
+            scorer = ContentTypeScorer(schemas)
+            classifier = None
+            if self.content_type_classifier is not None:
+                classifier = self.content_type_classifier.with_scorer(scorer)
+            models = (scorer, classifier)
+            self._content_type_models[schemas.version] = models
+            # Versions the registry no longer keeps cannot be pinned by a session any more
+            for version in sorted(self._content_type_models)[:-self.schema_registry.keep_versions]:
+                self._content_type_models.pop(version, None)
+        return models
     
     def _build_graph(self) -> StateGraph:
         """Build the Langgraph workflow."""
@@ -102,12 +250,13 @@ class MetadataAgent:
             # All schemas processed
             return "review"
     
+    @instrument_node
     def _init_node(self, state: WorkflowState) -> WorkflowState:
         """Initialize the workflow."""
         state.phase = WorkflowPhase.INIT
         
         # Load core schema and initialize field statuses
-        core_fields = self.schema_manager.get_fields("core.json")
+        core_fields = self._schemas(state).get_fields("core.json")
         for field in core_fields:
             state.field_status[field.id] = FieldStatus(
                 field_id=field.id,
@@ -117,7 +266,7 @@ class MetadataAgent:
             )
         
         # Initialize metadata with empty template
-        template = self.schema_manager.get_output_template("core.json")
+        template = self._schemas(state).get_output_template("core.json")
         state.metadata = template.copy()
         
         state.add_message(
@@ -129,8 +278,55 @@ class MetadataAgent:
         
         return state
     
+    @instrument_node
     def _suggest_special_schemas_node(self, state: WorkflowState, skip_history: bool = False) -> WorkflowState:
         """Suggest special schemas based on content type - AFTER core fields complete."""
+        available_schemas = self._begin_suggest_special_schemas(state, skip_history)
+        if available_schemas is None:
+            return state
+        
+        # Try to detect content type from user input
+        user_text = self._get_user_text(state)
+        
+        if user_text:
+            # Use LLM to suggest content types
+            try:
+                suggested_types = self._detect_content_types(user_text, list(available_schemas.keys()), self._schemas(state))
+            except Exception as e:
+                print(f"⚠️ Fehler bei Inhaltstyp-Erkennung: {e}")
+                suggested_types = []
+            
+            self._apply_suggested_content_types(state, available_schemas, suggested_types)
+        
+        return state
+    
+    @instrument_node
+    async def _suggest_special_schemas_node_async(self, state: WorkflowState, skip_history: bool = False) -> WorkflowState:
+        """Async variant of _suggest_special_schemas_node."""
+        available_schemas = self._begin_suggest_special_schemas(state, skip_history)
+        if available_schemas is None:
+            return state
+        
+        user_text = self._get_user_text(state)
+        
+        if user_text:
+            try:
+                suggested_types = await self._detect_content_types_async(user_text, list(available_schemas.keys()),
+                                                                         self._schemas(state))
+            except Exception as e:
+                print(f"⚠️ Fehler bei Inhaltstyp-Erkennung: {e}")
+                suggested_types = []
+            
+            self._apply_suggested_content_types(state, available_schemas, suggested_types)
+        
+        return state
+    
+    def _begin_suggest_special_schemas(self, state: WorkflowState, skip_history: bool) -> Optional[Dict[str, str]]:
+        """Enter the schema suggestion phase.
+
+        Returns:
+            Available special schemas (label -> schema file), or None if the phase is already finished
+        """
         state.phase = WorkflowPhase.SUGGEST_SPECIAL_SCHEMAS
         if not skip_history:
             state.save_phase_to_history()
@@ -138,11 +334,11 @@ class MetadataAgent:
         # Only suggest if core optional is complete
         if not state.core_optional_complete:
             state.special_schema_confirmed = True
-            return state
+            return None
         
         # Get available special schemas
         try:
-            available_schemas = self.schema_manager.get_available_special_schemas()
+            available_schemas = self._schemas(state).get_available_special_schemas()
         except Exception as e:
             print(f"⚠️ Fehler beim Laden der verfügbaren Schemata: {e}")
             state.special_schema_confirmed = True
@@ -150,7 +346,7 @@ class MetadataAgent:
                 "assistant",
                 "✅ Core-Felder erfasst. Fahre fort ohne Spezial-Schema."
             )
-            return state
+            return None
         
         if not available_schemas:
             state.special_schema_confirmed = True
@@ -158,89 +354,162 @@ class MetadataAgent:
                 "assistant",
                 "✅ Alle Core-Felder sind erfasst! Keine weiteren Spezial-Schemata verfügbar."
             )
-            return state
+            return None
         
-        # Try to detect content type from user input
-        user_text = " ".join([msg.content for msg in state.messages if msg.role == "user"])
-        
-        if user_text:
-            # Use LLM to suggest content types
-            try:
-                suggested_types = self._detect_content_types(user_text, list(available_schemas.keys()))
-            except Exception as e:
-                print(f"⚠️ Fehler bei Inhaltstyp-Erkennung: {e}")
-                suggested_types = []
+        return available_schemas
+    
+    def _apply_suggested_content_types(self, state: WorkflowState, available_schemas: Dict[str, str],
+                                       suggested_types: List[str]) -> None:
+        """Store detected content types in the state or ask the user to pick one."""
+        if suggested_types:
+            state.selected_content_types = suggested_types
             
-            if suggested_types:
-                state.selected_content_types = suggested_types
-                
-                # Get corresponding schema files and verify they exist
-                valid_schemas = []
-                for content_type in suggested_types:
-                    schema_file = available_schemas.get(content_type)
-                    if schema_file:
-                        # Check if file exists
-                        import os
-                        schema_path = os.path.join(self.schema_manager.schema_dir, schema_file)
-                        if os.path.exists(schema_path):
-                            if schema_file not in state.special_schemas:
-                                state.special_schemas.append(schema_file)
-                                valid_schemas.append(content_type)
-                        else:
-                            print(f"⚠️ Schema '{schema_file}' wurde nicht gefunden. Überspringe...")
-                
-                if valid_schemas:
-                    types_str = ", ".join(valid_schemas)
-                    state.add_message(
-                        "assistant",
-                        f"📋 Ich erkenne folgende Inhaltsart: **{types_str}**\n\n"
-                        f"❓ Soll ich das entsprechende Spezial-Schema laden? (ja/nein)"
-                    )
-                else:
-                    state.add_message(
-                        "assistant",
-                        "⚠️ Die erkannten Inhaltsarten haben noch keine Schemata. "
-                        "Fahren Sie mit 'weiter' fort."
-                    )
-                    state.special_schema_confirmed = True
+            # Corresponding schema files - available_schemas only lists files of the session's version that exist
+            valid_schemas = []
+            for content_type in suggested_types:
+                schema_file = available_schemas.get(content_type)
+                if schema_file and schema_file not in state.special_schemas:
+                    state.special_schemas.append(schema_file)
+                    valid_schemas.append(content_type)
+            
+            if valid_schemas:
+                types_str = ", ".join(valid_schemas)
+                state.add_message(
+                    "assistant",
+                    f"📋 Ich erkenne folgende Inhaltsart: **{types_str}**\n\n"
+                    f"❓ Soll ich das entsprechende Spezial-Schema laden? (ja/nein)"
+                )
             else:
-                # Ask user to select with numbers
-                schema_list = list(available_schemas.keys())
-                types_list = "\n".join([f"{i+1}. {t}" for i, t in enumerate(schema_list)])
                 state.add_message(
                     "assistant",
-                    f"📋 Welche Inhaltsart beschreiben Sie?\n\n{types_list}\n\n"
-                    f"💡 Geben Sie die **Nummer** oder den **Namen** ein (z.B. '1' oder 'Organisation').\n"
-                    f"Mehrfachauswahl mit Komma (z.B. '1,3' oder 'Organisation, Person').\n"
-                    f"Oder 'keine' für keine Spezialfelder."
+                    "⚠️ Die erkannten Inhaltsarten haben noch keine Schemata. "
+                    "Fahren Sie mit 'weiter' fort."
                 )
-                # Store schema list for number selection
-                state.metadata["_temp_schema_list"] = schema_list
+                state.special_schema_confirmed = True
+        else:
+            # Ask user to select with numbers
+            schema_list = list(available_schemas.keys())
+            types_list = "\n".join([f"{i+1}. {t}" for i, t in enumerate(schema_list)])
+            state.add_message(
+                "assistant",
+                f"📋 Welche Inhaltsart beschreiben Sie?\n\n{types_list}\n\n"
+                f"💡 Geben Sie die **Nummer** oder den **Namen** ein (z.B. '1' oder 'Organisation').\n"
+                f"Mehrfachauswahl mit Komma (z.B. '1,3' oder 'Organisation, Person').\n"
+                f"Oder 'keine' für keine Spezialfelder."
+            )
+            # Store schema list for number selection
+            state.metadata["_temp_schema_list"] = schema_list
+    
+    def _get_user_text(self, state: WorkflowState) -> str:
+        """Join all user messages into the text used for extraction."""
+        return " ".join([msg.content for msg in state.messages if msg.role == "user"])
+    
+    def _apply_extracted(self, state: WorkflowState, extracted: Dict[str, Any], skip_empty: bool = True) -> None:
+        """Update state with extracted values - mark as AI-suggested (needs confirmation).
         
-        return state
+        Values the user confirmed (corrections) are never overwritten by a re-extraction.
+        """
+        for field_id, value in extracted.items():
+            if field_id == PROVENANCE_KEY:
+                continue
+            if field_id in state.field_status and state.field_status[field_id].is_confirmed:
+                continue
+            if value or not skip_empty:
+                state.update_field(field_id, value, confirmed=False, ai_suggested=True)
+        # Confirmed values did not come from the chunks - their provenance stays untouched
+        provenance = {
+            field_id: entries for field_id, entries in extracted.get(PROVENANCE_KEY, {}).items()
+            if not (field_id in state.field_status and state.field_status[field_id].is_confirmed)
+        }
+        self._apply_provenance(state, provenance)
     
+    def _apply_provenance(self, state: WorkflowState, provenance: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Long documents: record which chunks each value came from on its field status."""
+        for field_id, entries in provenance.items():
+            if field_id in state.field_status:
+                state.field_status[field_id].provenance = entries
+    
+    def _run_phase_extraction(self, state: WorkflowState, ai_fillable: List[Field], skip_empty: bool = True) -> None:
+        """Extract the given fields from the user text and store them in the state.
+        
+        Skipped if no new source text arrived since the last extraction of this phase
+        (re-rendering after a correction or back navigation shows the stored field_status).
+        """
+        if not state.is_phase_dirty():
+            print(f"♻️ Keine neuen Eingaben seit der letzten Extraktion ({state.phase_key()}) - kein LLM-Call")
+            return
+        user_text = self._get_user_text(state)
+        if user_text and ai_fillable:
+            extracted = self._extract_fields(user_text, ai_fillable, state.metadata)
+            self._apply_extracted(state, extracted, skip_empty)
+        state.mark_phase_extracted()
+    
+    async def _run_phase_extraction_async(self, state: WorkflowState, ai_fillable: List[Field], skip_empty: bool = True) -> None:
+        """Async variant of _run_phase_extraction."""
+        if not state.is_phase_dirty():
+            print(f"♻️ Keine neuen Eingaben seit der letzten Extraktion ({state.phase_key()}) - kein LLM-Call")
+            return
+        user_text = self._get_user_text(state)
+        if user_text and ai_fillable:
+            extracted = await self._extract_fields_async(user_text, ai_fillable, state.metadata)
+            self._apply_extracted(state, extracted, skip_empty)
+        state.mark_phase_extracted()
+    
+    def _run_phase_extraction_stream(self, state: WorkflowState, ai_fillable: List[Field], skip_empty: bool = True,
+                                     parent: Optional[str] = None) -> Iterator[WorkflowState]:
+        """Streaming variant of _run_phase_extraction - yields the state after each extracted field."""
+        if not state.is_phase_dirty():
+            print(f"♻️ Keine neuen Eingaben seit der letzten Extraktion ({state.phase_key()}) - kein LLM-Call")
+            return
+        user_text = self._get_user_text(state)
+        if user_text and ai_fillable:
+            for field_id, value in self._extract_fields_stream(user_text, ai_fillable, state.metadata,
+                                                               report=state.performance, parent=parent):
+                self._apply_extracted(state, {field_id: value}, skip_empty)
+                yield state
+        state.mark_phase_extracted()
+    
+    @instrument_node
     def _extract_core_required_node(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
         """Extract core required fields using GPT-5."""
+        required_fields = self._begin_core_required(state, skip_history)
+        self._run_phase_extraction(state, [f for f in required_fields if f.ai_fillable], skip_empty=False)
+        return self._render_core_required(state, required_fields, skip_completion)
+    
+    @instrument_node
+    async def _extract_core_required_node_async(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
+        """Async variant of _extract_core_required_node."""
+        required_fields = self._begin_core_required(state, skip_history)
+        await self._run_phase_extraction_async(state, [f for f in required_fields if f.ai_fillable], skip_empty=False)
+        return self._render_core_required(state, required_fields, skip_completion)
+    
+    def _extract_core_required_node_stream(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> Iterator[WorkflowState]:
+        """Streaming variant of _extract_core_required_node.
+        
+        Yields the state whenever a field value arrives, so the UI can show fields
+        before the whole answer is complete. The last yielded state contains the overview message.
+        """
+        # Recorded without the span context: a generator may be resumed from different threads
+        node_span = Span(name="extract_core_required_node_stream", kind="node", start=time.time())
+        started = time.perf_counter()
+        required_fields = self._begin_core_required(state, skip_history)
+        yield from self._run_phase_extraction_stream(state, [f for f in required_fields if f.ai_fillable], skip_empty=False,
+                                                     parent=node_span.name)
+        state = self._render_core_required(state, required_fields, skip_completion)
+        node_span.duration = time.perf_counter() - started
+        record_span(state.performance, node_span)
+        yield state
+    
+    def _begin_core_required(self, state: WorkflowState, skip_history: bool) -> List[Field]:
+        """Enter the core required phase and return its fields."""
         state.phase = WorkflowPhase.EXTRACT_CORE_REQUIRED
         if not skip_history:
             state.save_phase_to_history()
         
-        # Get required fields
-        required_fields = self.schema_manager.get_required_fields("core.json")
-        ai_fillable = [f for f in required_fields if f.ai_fillable]
-        
-        # Get user text
-        user_text = " ".join([msg.content for msg in state.messages if msg.role == "user"])
-        
-        if user_text and ai_fillable:
-            # Extract metadata using GPT-5
-            extracted = self._extract_fields(user_text, ai_fillable, state.metadata)
-            
-            # Update state - mark as AI-suggested (needs confirmation)
-            for field_id, value in extracted.items():
-                state.update_field(field_id, value, confirmed=False, ai_suggested=True)
-        
-        # Build overview of all required fields
+        return self._schemas(state).get_required_fields("core.json")
+    
+    def _render_core_required(self, state: WorkflowState, required_fields: List[Field], skip_completion: bool) -> WorkflowState:
+        """Show overview of all core required fields."""
         message_parts = ["📝 **Pflichtfelder (Core-Schema):**\n"]
         
         filled_fields = []
@@ -287,32 +556,38 @@ class MetadataAgent:
         
         return state
     
+    @instrument_node
     def _extract_core_optional_node(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
         """Extract core optional fields."""
+        optional_fields = self._begin_core_optional(state, skip_history)
+        if optional_fields is None:
+            return state
+        self._run_phase_extraction(state, [f for f in optional_fields if f.ai_fillable])
+        return self._render_core_optional(state, optional_fields)
+    
+    @instrument_node
+    async def _extract_core_optional_node_async(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
+        """Async variant of _extract_core_optional_node."""
+        optional_fields = self._begin_core_optional(state, skip_history)
+        if optional_fields is None:
+            return state
+        await self._run_phase_extraction_async(state, [f for f in optional_fields if f.ai_fillable])
+        return self._render_core_optional(state, optional_fields)
+    
+    def _begin_core_optional(self, state: WorkflowState, skip_history: bool) -> Optional[List[Field]]:
+        """Enter the core optional phase and return its fields (None if required fields are incomplete)."""
         state.phase = WorkflowPhase.EXTRACT_CORE_OPTIONAL
         if not skip_history:
             state.save_phase_to_history()
         
         if not state.core_required_complete:
-            return state
+            return None
         
         # Get optional fields (not required)
-        optional_fields = self.schema_manager.get_optional_fields("core.json")
-        ai_fillable = [f for f in optional_fields if f.ai_fillable]
-        
-        # Get user text
-        user_text = " ".join([msg.content for msg in state.messages if msg.role == "user"])
-        
-        if user_text and ai_fillable:
-            # Extract metadata using GPT-5
-            extracted = self._extract_fields(user_text, ai_fillable, state.metadata)
-            
-            # Update state
-            for field_id, value in extracted.items():
-                if value:  # Only update if there's a value
-                    state.update_field(field_id, value, confirmed=False, ai_suggested=True)
-        
-        # Build overview of optional fields
+        return self._schemas(state).get_optional_fields("core.json")
+    
+    def _render_core_optional(self, state: WorkflowState, optional_fields: List[Field]) -> WorkflowState:
+        """Show overview of core optional fields."""
         message_parts = ["📋 **Optionale Felder (Core-Schema):**\n"]
         
         # List available optional field names
@@ -356,15 +631,39 @@ class MetadataAgent:
         # Don't mark as complete yet - wait for user confirmation with 'weiter'
         return state
     
+    @instrument_node
     def _extract_special_required_node(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
         """Extract required fields from CURRENT special schema."""
+        phase = self._begin_special_required(state, skip_history)
+        if phase is None:
+            return state
+        required_fields, schema_name = phase
+        self._run_phase_extraction(state, [f for f in required_fields if f.ai_fillable])
+        return self._render_special_required(state, required_fields, schema_name, skip_completion)
+    
+    @instrument_node
+    async def _extract_special_required_node_async(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
+        """Async variant of _extract_special_required_node."""
+        phase = self._begin_special_required(state, skip_history)
+        if phase is None:
+            return state
+        required_fields, schema_name = phase
+        await self._run_phase_extraction_async(state, [f for f in required_fields if f.ai_fillable])
+        return self._render_special_required(state, required_fields, schema_name, skip_completion)
+    
+    def _begin_special_required(self, state: WorkflowState, skip_history: bool) -> Optional[tuple]:
+        """Enter the special required phase: load the current special schema.
+
+        Returns:
+            tuple: (required_fields, schema_name), or None if there is nothing to extract
+        """
         state.phase = WorkflowPhase.EXTRACT_SPECIAL_REQUIRED
         if not skip_history:
             state.save_phase_to_history()
         
         if not state.special_schema_confirmed:
             state.special_required_complete = True
-            return state
+            return None
         
         if not state.special_schemas or state.current_special_schema_index >= len(state.special_schemas):
             # No schemas selected (user said no)
@@ -373,7 +672,7 @@ class MetadataAgent:
                 "assistant",
                 "✅ Core-Felder erfasst. Fahre fort zur Überprüfung."
             )
-            return state
+            return None
         
         # Get CURRENT special schema
         schema_file = state.special_schemas[state.current_special_schema_index]
@@ -382,7 +681,7 @@ class MetadataAgent:
         
         # Load special schema fields
         try:
-            fields = self.schema_manager.get_fields(schema_file)
+            fields = self._schemas(state).get_fields(schema_file)
             
             # Initialize field statuses (only if first time seeing this schema)
             for field in fields:
@@ -395,7 +694,7 @@ class MetadataAgent:
                     )
             
             # Merge templates
-            template = self.schema_manager.get_output_template(schema_file)
+            template = self._schemas(state).get_output_template(schema_file)
             state.metadata.update(template)
         except FileNotFoundError:
             state.add_message(
@@ -403,7 +702,7 @@ class MetadataAgent:
                 f"⚠️ Schema '{schema_file}' wurde nicht gefunden. Überspringe..."
             )
             state.special_required_complete = True
-            return state
+            return None
         
         # Inform user that schema was loaded
         schema_name = schema_file.replace('.json', '').replace('_', ' ').title()
@@ -423,23 +722,13 @@ class MetadataAgent:
                 "assistant",
                 f"✅ Keine Pflichtfelder im Schema '{schema_name}'."
             )
-            return state
-        
-        ai_fillable = [f for f in required_fields if f.ai_fillable]
-        
-        # Get user text
-        user_text = " ".join([msg.content for msg in state.messages if msg.role == "user"])
-        
-        if user_text and ai_fillable:
-            # Extract metadata using GPT-5
-            extracted = self._extract_fields(user_text, ai_fillable, state.metadata)
-            
-            # Update state - mark as AI-suggested (needs confirmation)
-            for field_id, value in extracted.items():
-                if value:
-                    state.update_field(field_id, value, confirmed=False, ai_suggested=True)
+            return None
         
-        # Build overview of required special fields
+        return required_fields, schema_name
+    
+    def _render_special_required(self, state: WorkflowState, required_fields: List[Field], schema_name: str,
+                                 skip_completion: bool) -> WorkflowState:
+        """Show overview of required fields of the current special schema."""
         message_parts = [f"📝 **Pflichtfelder ({schema_name}):**\n"]
         
         filled_fields = []
@@ -489,19 +778,41 @@ class MetadataAgent:
         
         return state
     
+    @instrument_node
     def _extract_special_optional_node(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
         """Extract optional fields from CURRENT special schema."""
+        phase = self._begin_special_optional(state, skip_history)
+        if phase is None:
+            return state
+        self._run_phase_extraction(state, [f for f in phase[0] if f.ai_fillable])
+        return self._render_special_optional(state, *phase)
+    
+    @instrument_node
+    async def _extract_special_optional_node_async(self, state: WorkflowState, skip_history: bool = False, skip_completion: bool = False) -> WorkflowState:
+        """Async variant of _extract_special_optional_node."""
+        phase = self._begin_special_optional(state, skip_history)
+        if phase is None:
+            return state
+        await self._run_phase_extraction_async(state, [f for f in phase[0] if f.ai_fillable])
+        return self._render_special_optional(state, *phase)
+    
+    def _begin_special_optional(self, state: WorkflowState, skip_history: bool) -> Optional[tuple]:
+        """Enter the special optional phase for the current special schema.
+
+        Returns:
+            tuple: (optional_fields, schema_name, schema_number, total_schemas), or None if there is nothing to extract
+        """
         state.phase = WorkflowPhase.EXTRACT_SPECIAL_OPTIONAL
         if not skip_history:
             state.save_phase_to_history()
         
         if not state.special_required_complete or not state.special_schemas:
             state.special_optional_complete = True
-            return state
+            return None
         
         if state.current_special_schema_index >= len(state.special_schemas):
             state.special_optional_complete = True
-            return state
+            return None
         
         # Get CURRENT special schema
         schema_file = state.special_schemas[state.current_special_schema_index]
@@ -511,10 +822,10 @@ class MetadataAgent:
         
         # Get fields from current schema
         try:
-            fields = self.schema_manager.get_fields(schema_file)
+            fields = self._schemas(state).get_fields(schema_file)
         except FileNotFoundError:
             state.special_optional_complete = True
-            return state
+            return None
         
         # Get optional fields (not required)
         optional_fields = [f for f in fields if not f.required]
@@ -534,23 +845,13 @@ class MetadataAgent:
                     "assistant",
                     f"✅ Keine optionalen Felder im Schema '{schema_name}'."
                 )
-            return state
-        
-        ai_fillable = [f for f in optional_fields if f.ai_fillable]
-        
-        # Get user text
-        user_text = " ".join([msg.content for msg in state.messages if msg.role == "user"])
+            return None
         
-        if user_text and ai_fillable:
-            # Extract metadata using GPT-5
-            extracted = self._extract_fields(user_text, ai_fillable, state.metadata)
-            
-            # Update state
-            for field_id, value in extracted.items():
-                if value:  # Only update if there's a value
-                    state.update_field(field_id, value, confirmed=False, ai_suggested=True)
-        
-        # Build overview of optional special fields
+        return optional_fields, schema_name, schema_number, total_schemas
+    
+    def _render_special_optional(self, state: WorkflowState, optional_fields: List[Field], schema_name: str,
+                                 schema_number: int, total_schemas: int) -> WorkflowState:
+        """Show overview of optional fields of the current special schema."""
         message_parts = [f"📋 **Optionale Felder ({schema_name}):** ({schema_number}/{total_schemas})\n"]
         
         # List available optional field names
@@ -602,6 +903,7 @@ class MetadataAgent:
         # Don't mark as complete yet - wait for user confirmation with 'weiter'
         return state
     
+    @instrument_node
     def _review_node(self, state: WorkflowState, skip_history: bool = False) -> WorkflowState:
         """Review and finalize metadata."""
         state.phase = WorkflowPhase.REVIEW
@@ -637,67 +939,818 @@ class MetadataAgent:
         state.phase = WorkflowPhase.COMPLETE
         return state
     
-    def _call_gpt5(self, input_text: str, reasoning_effort: str = None, verbosity: str = None) -> Dict[str, Any]:
-        """Call LLM API - uses GPT-5 Responses API for gpt-5* models, Chat Completions API for others."""
+    def run_headless(self, text: str, content_type: Optional[str] = None, include_optional: bool = True,
+                     profile: Optional[str] = None, speculative_k: Optional[int] = None) -> WorkflowState:
+        """Run the complete extraction without chat interaction.
+        
+        Independent LLM calls run concurrently in two stages:
+        1. core required, core optional and content type detection
+        2. special required and special optional (depend on the detected schema)
+        
+        Results are merged into the state in the fixed phase order, so the
+        outcome is identical to running the nodes one after another.
+        
+        The "fused" profile asks for all jobs of a stage in one LLM call instead
+        (core fields + content type, then the special schema) - two round trips
+        in total. Each field set is still validated on its own.
+        
+        Args:
+            text: Input text describing the resource
+            content_type: Content type label (e.g. "Veranstaltung") - None for automatic detection
+            include_optional: Also extract optional core/special fields
+            profile: "phased" or "fused" (default: from EXTRACTION_PROFILE env or "phased")
+            speculative_k: Extract the special schemas of the k most likely content types already in
+                stage 1 and keep the detected one's results (default: from SPECULATIVE_TOP_K env, 0 = off)
+        
+        Timings and token counts are recorded in state.performance.
+        """
+        state = self._begin_headless(text)
+        fused = (profile or self.extraction_profile) == "fused"
+        
+        speculation = None
+        with recording(state.performance), span("run_headless", "workflow"):
+            try:
+                with span("core_stage", "stage"):
+                    jobs = self._plan_core_stage(state, content_type, include_optional, fused)
+                    speculation = self._start_speculation(
+                        self._plan_speculation(state, content_type, include_optional, fused, speculative_k))
+                    self._commit_core_stage(state, jobs, self._run_jobs(jobs), content_type, include_optional)
+        
+                with span("special_stage", "stage"):
+                    jobs = self._plan_special_stage(state, include_optional, fused)
+                    results = self._finish_speculation(state, speculation)
+                    if results is None:
+                        results = self._run_jobs(jobs)
+                    self._commit_special_stage(state, jobs, results, include_optional)
+            finally:
+                # A failed stage must not leave speculative calls running (no-op once finished)
+                self._cancel_speculation(speculation)
+        
+            return self._review_node(state)
+    
+    async def run_headless_async(self, text: str, content_type: Optional[str] = None, include_optional: bool = True,
+                                 profile: Optional[str] = None, speculative_k: Optional[int] = None) -> WorkflowState:
+        """Async variant of run_headless."""
+        state = self._begin_headless(text)
+        fused = (profile or self.extraction_profile) == "fused"
+        
+        speculation = None
+        with recording(state.performance), span("run_headless", "workflow"):
+            try:
+                with span("core_stage", "stage"):
+                    jobs = self._plan_core_stage(state, content_type, include_optional, fused)
+                    speculation = self._start_speculation_async(
+                        self._plan_speculation(state, content_type, include_optional, fused, speculative_k))
+                    self._commit_core_stage(state, jobs, await self._run_jobs_async(jobs), content_type, include_optional)
+        
+                with span("special_stage", "stage"):
+                    jobs = self._plan_special_stage(state, include_optional, fused)
+                    results = await self._finish_speculation_async(state, speculation)
+                    if results is None:
+                        results = await self._run_jobs_async(jobs)
+                    self._commit_special_stage(state, jobs, results, include_optional)
+            finally:
+                self._cancel_speculation_async(speculation)
+        
+            return self._review_node(state)
+    
+    def _begin_headless(self, text: str) -> WorkflowState:
+        """Create and initialize a state for a headless run."""
+        state = WorkflowState()
+        state.add_message("user", text)
+        return self._init_node(state)
+    
+    def _run_jobs(self, jobs: Dict[str, tuple]) -> Dict[str, Any]:
+        """Run independent LLM jobs concurrently in a thread pool.
+        
+        Jobs are tuples ("fields", text, fields) or ("content_type", text, available_types).
+        """
+        if not jobs:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            # Each job runs in a copy of the caller's context so its spans reach the workflow report
+            futures = {
+                name: executor.submit(contextvars.copy_context().run, self._run_job, name, job)
+                for name, job in jobs.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+    
+    async def _run_jobs_async(self, jobs: Dict[str, tuple]) -> Dict[str, Any]:
+        """Run independent LLM jobs concurrently on the event loop."""
+        names = list(jobs.keys())
+        results = await asyncio.gather(*(self._run_job_async(name, jobs[name]) for name in names))
+        return dict(zip(names, results))
+    
+    def _run_job(self, name: str, job: tuple) -> Any:
+        kind, text, arg = job
+        with span(name, "job"):
+            if kind == "content_type":
+                return self._detect_content_types(text, arg)
+            if kind == "fused":
+                return self._extract_fused(text, arg)
+            return self._extract_fields(text, arg, {})
+    
+    async def _run_job_async(self, name: str, job: tuple) -> Any:
+        kind, text, arg = job
+        with span(name, "job"):
+            if kind == "content_type":
+                return await self._detect_content_types_async(text, arg)
+            if kind == "fused":
+                return await self._extract_fused_async(text, arg)
+            return await self._extract_fields_async(text, arg, {})
+    
+    def _build_job_requests(self, job: tuple) -> List[Dict[str, Any]]:
+        """Request kwargs for the calls _run_job makes for a job (used by the batch runner).
+        
+        Expects a job split by _split_rule_values. Field jobs get one request per document
+        chunk and field shard, in that order (see _extract_fields); _parse_job_outputs merges
+        their answers again.
+        """
+        kind, text, arg = job
+        if kind == "content_type":
+            # Long documents: the beginning says what kind of resource it is
+            prompt = self._build_content_type_prompt(self._document_chunks(text)[0].text, arg)
+            return [self._build_llm_request(prompt, "minimal", "low")]
+        if kind == "fused":
+            fields, content_types = self._fused_fields(arg)
+            if not fields and content_types is None:
+                return []
+            return [self._build_llm_request(self._build_extraction_prompt(text, fields, content_types), "minimal", "low",
+                                            self._response_schema(fields, content_types))]
+        if not arg:
+            return []
+        return [
+            self._build_llm_request(self._build_extraction_prompt(chunk.text, shard), "minimal", "low",
+                                    self._response_schema(shard))
+            for chunk in self._document_chunks(text) for shard in self._shard_fields(arg)
+        ]
+    
+    def _parse_job_outputs(self, job: tuple, output_texts: List[Optional[str]]) -> Any:
+        """Parse the answers to the requests of _build_job_requests like _run_job does.
+        
+        Shard answers are merged per chunk and chunk results reduced; a failed request (None)
+        counts as an empty answer.
+        """
+        kind, text, arg = job
+        if kind != "fields":
+            return self._parse_job_output(job, output_texts[0] or "")
+        chunks = self._document_chunks(text)
+        shards = self._shard_fields(arg)
+        parsed = [self._parse_job_output(job, output_text) if output_text is not None else {}
+                  for output_text in output_texts]
+        results = [self._merge_shards(parsed[i * len(shards):(i + 1) * len(shards)], shards) for i in range(len(chunks))]
+        if len(chunks) == 1:
+            return results[0]
+        return reduce_chunk_results(results, chunks, arg)
+    
+    def _parse_job_output(self, job: tuple, output_text: str) -> Any:
+        """Parse the answer to a job request like _run_job does (empty result on unparseable output)."""
+        kind, text, arg = job
+        try:
+            if kind == "content_type":
+                return self._parse_content_types(output_text, arg)
+            if kind == "fused":
+                return self._parse_fused_output(output_text, arg)
+            return self._parse_extraction_output(output_text, arg)
+        except Exception as e:
+            print(f"Error parsing {kind} output: {e}")
+            return [] if kind == "content_type" else {}
+    
+    def _plan_core_stage(self, state: WorkflowState, content_type: Optional[str], include_optional: bool,
+                         fused: Optional[bool] = None) -> Dict[str, tuple]:
+        """Collect the LLM jobs that only depend on the user text (one fused job if fused)."""
+        user_text = self._get_user_text(state)
+        jobs = {}
+        if not user_text:
+            return jobs
+        
+        # Field jobs cover the whole phase: the rules run once per phase, in the job (see _extract_fields)
+        required = [f for f in self._schemas(state).get_required_fields("core.json") if f.ai_fillable]
+        if required:
+            jobs["core_required"] = ("fields", user_text, required)
+        
+        if include_optional:
+            optional = [f for f in self._schemas(state).get_optional_fields("core.json") if f.ai_fillable]
+            if optional:
+                jobs["core_optional"] = ("fields", user_text, optional)
+        
+        if content_type is None:
+            try:
+                available_types = list(self._schemas(state).get_available_special_schemas().keys())
+            except Exception as e:
+                print(f"⚠️ Fehler beim Laden der verfügbaren Schemata: {e}")
+                available_types = []
+            # A confident local classification needs no job - _commit_core_stage classifies again
+            if available_types and self._classify_content_type(user_text, available_types, self._schemas(state)) is None:
+                jobs["content_type"] = ("content_type", user_text, available_types)
         
+        return self._fuse_jobs("core_fused", jobs, fused)
+    
+    def _commit_core_stage(self, state: WorkflowState, jobs: Dict[str, tuple], results: Dict[str, Any],
+                           content_type: Optional[str], include_optional: bool) -> None:
+        """Merge core stage results into the state in phase order."""
+        jobs, results = self._expand_fused_jobs(jobs, results)
+        user_text = self._get_user_text(state)
+        
+        # Core required
+        required_fields = self._begin_core_required(state, skip_history=False)
+        self._apply_extracted(state, results.get("core_required") or {}, skip_empty=False)
+        self._render_core_required(state, required_fields, skip_completion=False)
+        state.core_required_complete = True
+        
+        # Core optional
+        if include_optional:
+            optional_fields = self._begin_core_optional(state, skip_history=False)
+            if optional_fields is not None:
+                self._apply_extracted(state, results.get("core_optional") or {})
+            self._render_core_optional(state, optional_fields)
+        state.core_optional_complete = True
+        
+        # Content type: detected or given by the caller
+        if content_type is None:
+            available_schemas = self._begin_suggest_special_schemas(state, skip_history=False)
+            if available_schemas is not None and "content_type" in jobs:
+                self._apply_suggested_content_types(state, available_schemas, results.get("content_type") or [])
+            elif available_schemas is not None:
+                local = self._classify_content_type(user_text, list(available_schemas.keys()), self._schemas(state),
+                                                   log=False)
+                if local is not None:
+                    self._apply_suggested_content_types(state, available_schemas, [local])
+            # Only use the FIRST detected schema
+            state.selected_content_types = state.selected_content_types[:1]
+            state.special_schemas = state.special_schemas[:1]
+        else:
+            schema_file = self._schemas(state).get_available_special_schemas().get(content_type)
+            if schema_file:
+                state.selected_content_types = [content_type]
+                state.special_schemas = [schema_file]
+        state.special_schema_confirmed = True
+    
+    def _plan_special_stage(self, state: WorkflowState, include_optional: bool,
+                            fused: Optional[bool] = None) -> Dict[str, tuple]:
+        """Collect the LLM jobs for the selected special schema (one fused job if fused)."""
+        user_text = self._get_user_text(state)
+        if not user_text or not state.special_schemas:
+            return {}
+        return self._plan_special_jobs(state, user_text, state.special_schemas[state.current_special_schema_index],
+                                       include_optional, fused)
+    
+    def _plan_special_jobs(self, state: WorkflowState, user_text: str, schema_file: str, include_optional: bool,
+                           fused: Optional[bool] = None) -> Dict[str, tuple]:
+        """LLM jobs for the fields of one special schema."""
+        jobs = {}
         try:
-            if self.is_gpt5:
-                # GPT-5 models: Use Responses API with reasoning and verbosity
-                reasoning_effort = reasoning_effort or self.default_reasoning_effort
-                verbosity = verbosity or self.default_verbosity
-                
-                response = self.client.responses.create(
-                    model=self.model,
-                    input=input_text,
-                    reasoning={"effort": reasoning_effort},
-                    text={"verbosity": verbosity}
-                )
-                return {
-                    "output_text": response.output_text,
-                    "response_id": response.id,
-                    "tokens": response.usage.total_tokens
-                }
-            else:
-                # Other models (GPT-4, GPT-3.5, etc.): Use standard Chat Completions API
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": input_text}],
-                    temperature=0.1  # Low temperature for consistent extraction
-                )
-                return {
-                    "output_text": response.choices[0].message.content,
-                    "response_id": response.id,
-                    "tokens": response.usage.total_tokens
-                }
+            fields = self._schemas(state).get_fields(schema_file)
+        except FileNotFoundError:
+            return jobs
+        
+        required = [f for f in fields if f.required and f.ai_fillable]
+        if required:
+            jobs["special_required"] = ("fields", user_text, required)
+        
+        if include_optional:
+            optional = [f for f in fields if not f.required and f.ai_fillable]
+            if optional:
+                jobs["special_optional"] = ("fields", user_text, optional)
+        
+        return self._fuse_jobs("special_fused", jobs, fused)
+    
+    def _plan_speculation(self, state: WorkflowState, content_type: Optional[str], include_optional: bool,
+                          fused: Optional[bool], speculative_k: Optional[int]) -> Dict[str, Dict[str, tuple]]:
+        """Special stage jobs per candidate schema file, best pre-score first.
+        
+        Only content types with a positive local pre-score are candidates. Candidates
+        are added while the calls that can be discarded stay within speculative_max_wasted_calls.
+        """
+        k = self.speculative_top_k if speculative_k is None else speculative_k
+        user_text = self._get_user_text(state)
+        if k <= 0 or content_type is not None or not user_text:
+            return {}
+        
+        try:
+            available_schemas = self._schemas(state).get_available_special_schemas()
         except Exception as e:
-            print(f"LLM API Error: {e}")
-            return {"output_text": f"Error: {str(e)}", "response_id": None, "tokens": 0}
+            print(f"⚠️ Fehler beim Laden der verfügbaren Schemata: {e}")
+            return {}
+        
+        scorer, _ = self._content_type_models_for(self._schemas(state))
+        ranking = scorer.rank(user_text, available_schemas)[:k]
+        local = self._classify_content_type(user_text, list(available_schemas.keys()), self._schemas(state), log=False)
+        if local is not None:
+            ranking = [(local, 1.0)]  # Detection needs no LLM call - only the classified type is extracted early
+        
+        candidates: Dict[str, Dict[str, tuple]] = {}
+        for label, score in ranking:
+            if score <= 0:
+                break
+            jobs = self._plan_special_jobs(state, user_text, available_schemas[label], include_optional, fused)
+            if not jobs:
+                continue
+            # Worst case: every candidate but the cheapest is discarded
+            sizes = [len(j) for j in candidates.values()] + [len(jobs)]
+            if sum(sizes) - min(sizes) > self.speculative_max_wasted_calls:
+                break
+            candidates[available_schemas[label]] = jobs
+        return candidates
     
-    def _detect_content_types(self, text: str, available_types: List[str]) -> List[str]:
-        """Use GPT-5 to detect content types from text."""
-        if not available_types:
-            return []
+    def _start_speculation(self, candidates: Dict[str, Dict[str, tuple]]) -> Optional[tuple]:
+        """Submit the speculative jobs. Returns (executor, {schema file: {job name: future}}) or None."""
+        if not candidates:
+            return None
+        executor = ThreadPoolExecutor(max_workers=sum(len(jobs) for jobs in candidates.values()))
+        futures = {
+            schema_file: {
+                name: executor.submit(contextvars.copy_context().run, self._run_job, f"speculative_{name}", job)
+                for name, job in jobs.items()
+            }
+            for schema_file, jobs in candidates.items()
+        }
+        return executor, futures
+    
+    def _finish_speculation(self, state: WorkflowState, speculation: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        """Results of the detected schema's speculative jobs (None on a miss); other jobs are cancelled or discarded."""
+        if speculation is None:
+            return None
+        executor, futures = speculation
+        winner = state.special_schemas[0] if state.special_schemas else None
+        try:
+            results = None
+            wasted = cancelled = 0
+            for schema_file, jobs in futures.items():
+                if schema_file == winner:
+                    results = {name: future.result() for name, future in jobs.items()}
+                    continue
+                for future in jobs.values():
+                    if future.cancel():
+                        cancelled += 1
+                    else:
+                        wasted += 1
+            self._record_speculation(futures, results is not None, wasted, cancelled)
+            return results
+        finally:
+            # Discarded calls that are already running finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _cancel_speculation(self, speculation: Optional[tuple]) -> None:
+        """Cancel the speculative jobs that have not started and release the executor (running calls finish)."""
+        if speculation is not None:
+            executor, _ = speculation
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _start_speculation_async(self, candidates: Dict[str, Dict[str, tuple]]) -> Optional[Dict[str, Dict[str, asyncio.Task]]]:
+        """Async variant of _start_speculation - one task per speculative job."""
+        if not candidates:
+            return None
+        return {
+            schema_file: {
+                name: asyncio.ensure_future(self._run_job_async(f"speculative_{name}", job))
+                for name, job in jobs.items()
+            }
+            for schema_file, jobs in candidates.items()
+        }
+    
+    async def _finish_speculation_async(self, state: WorkflowState,
+                                        tasks: Optional[Dict[str, Dict[str, asyncio.Task]]]) -> Optional[Dict[str, Any]]:
+        """Async variant of _finish_speculation - running discarded calls are cancelled."""
+        if tasks is None:
+            return None
+        winner = state.special_schemas[0] if state.special_schemas else None
+        wasted = cancelled = 0
+        for schema_file, jobs in tasks.items():
+            if schema_file == winner:
+                continue
+            for task in jobs.values():
+                if task.done():
+                    wasted += 1
+                    if not task.cancelled():
+                        task.exception()  # Discard the outcome without "exception never retrieved" warnings
+                else:
+                    task.cancel()
+                    cancelled += 1
+        
+        results = None
+        if winner in tasks:
+            names = list(tasks[winner])
+            results = dict(zip(names, await asyncio.gather(*tasks[winner].values())))
+        self._record_speculation(tasks, results is not None, wasted, cancelled)
+        return results
+    
+    def _cancel_speculation_async(self, tasks: Optional[Dict[str, Dict[str, asyncio.Task]]]) -> None:
+        """Async variant of _cancel_speculation - cancels every speculative task that is still running."""
+        for jobs in (tasks or {}).values():
+            for task in jobs.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Discard the outcome without "exception never retrieved" warnings
+    
+    def _record_speculation(self, candidates: Dict[str, Dict[str, Any]], hit: bool, wasted: int, cancelled: int) -> None:
+        with self._usage_lock:
+            self.speculation_stats["runs"] += 1
+            self.speculation_stats["hits" if hit else "misses"] += 1
+            self.speculation_stats["calls"] += sum(len(jobs) for jobs in candidates.values())
+            self.speculation_stats["wasted_calls"] += wasted
+            self.speculation_stats["cancelled_calls"] += cancelled
+    
+    def _commit_special_stage(self, state: WorkflowState, jobs: Dict[str, tuple], results: Dict[str, Any],
+                              include_optional: bool) -> None:
+        """Merge special stage results into the state in phase order."""
+        jobs, results = self._expand_fused_jobs(jobs, results)
+        if not state.special_schemas:
+            return
+        
+        phase = self._begin_special_required(state, skip_history=False)
+        if phase is not None:
+            required_fields, schema_name = phase
+            self._apply_extracted(state, results.get("special_required") or {})
+            self._render_special_required(state, required_fields, schema_name, skip_completion=False)
+        state.special_required_complete = True
+        
+        if include_optional:
+            phase = self._begin_special_optional(state, skip_history=False)
+            if phase is not None:
+                self._apply_extracted(state, results.get("special_optional") or {})
+                self._render_special_optional(state, *phase)
+        state.special_optional_complete = True
+    
+    def _rule_values(self, text: str, fields: List[Field]) -> Dict[str, Any]:
+        """Values the deterministic rules determine for the fields, normalized like LLM answers."""
+        if self.rule_extractor is None:
+            return {}
+        values = self.rule_extractor.extract(text, fields)
+        return self._normalize_extracted(values, fields) if values else {}
+    
+    def _split_rule_values(self, job: tuple) -> tuple:
+        """(job reduced to the fields left for the LLM, rule values) - per part for fused jobs, None for
+        content type jobs. The rules run once here; _with_rule_values adds their values to the job's result."""
+        kind, text, arg = job
+        if kind == "fields":
+            values = self._rule_values(text, arg)
+            return (kind, text, [f for f in arg if f.id not in values]), values
+        if kind == "fused":
+            parts, values = {}, {}
+            for name, part in arg.items():
+                parts[name], values[name] = self._split_rule_values(part)
+            return (kind, text, parts), values
+        return job, None
+    
+    def _with_rule_values(self, job: tuple, result: Any, values: Any) -> Any:
+        """Result of a job split by _split_rule_values, completed by its rule values."""
+        kind = job[0]
+        if kind == "fields":
+            return {**(result or {}), **values}
+        if kind == "fused":
+            result = dict(result or {})
+            for name, part in job[2].items():
+                if values[name] is not None:
+                    result[name] = self._with_rule_values(part, result.get(name), values[name])
+            return result
+        return result
+    
+    def _fuse_jobs(self, name: str, jobs: Dict[str, tuple], fused: Optional[bool]) -> Dict[str, tuple]:
+        """Combine the jobs of a stage into one ("fused", text, {job name: job}) job."""
+        if fused is None:
+            fused = self.extraction_profile == "fused"
+        if not fused or len(jobs) < 2:
+            return jobs
+        text = next(iter(jobs.values()))[1]
+        if len(self._document_chunks(text)) > 1:
+            # Long documents are extracted per chunk and reduced phase by phase (see _extract_fields)
+            return jobs
+        return {name: ("fused", text, jobs)}
+    
+    def _expand_fused_jobs(self, jobs: Dict[str, tuple], results: Dict[str, Any]) -> tuple:
+        """Replace fused jobs and their results by the original per-phase jobs and results."""
+        expanded_jobs, expanded_results = {}, {}
+        for name, job in jobs.items():
+            if job[0] == "fused":
+                expanded_jobs.update(job[2])
+                expanded_results.update(results.get(name) or {})
+            else:
+                expanded_jobs[name] = job
+                if name in results:
+                    expanded_results[name] = results[name]
+        return expanded_jobs, expanded_results
+    
+    def _build_llm_request(self, input_text: str, reasoning_effort: str = None, verbosity: str = None,
+                           response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build request kwargs - Responses API for gpt-5* models, Chat Completions API for others.
         
-        prompt = f"""Analysiere folgenden Text und identifiziere die passende Inhaltsart:
-
-Text: {text}
+        Args:
+            response_schema: Structured Outputs schema ({"name", "schema", "strict"}) the answer must follow
+        """
+        if self.is_gpt5:
+            # GPT-5 models: Use Responses API with reasoning and verbosity
+            request = {
+                "model": self.model,
+                "input": input_text,
+                "reasoning": {"effort": reasoning_effort or self.default_reasoning_effort},
+                "text": {"verbosity": verbosity or self.default_verbosity}
+            }
+            if response_schema:
+                request["text"]["format"] = {"type": "json_schema", **response_schema}
+            return request
+        # Other models (GPT-4, GPT-3.5, etc.): Use standard Chat Completions API
+        request = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": input_text}],
+            "temperature": 0.1  # Low temperature for consistent extraction
+        }
+        if response_schema:
+            request["response_format"] = {"type": "json_schema", "json_schema": response_schema}
+        return request
+    
+    def _response_schema(self, fields: List[Field], content_types: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Compiled Structured Outputs schema for an extraction call (None if disabled)."""
+        if not self.structured_outputs or not fields:
+            return None
+        return self.response_schemas.get(fields, content_types=content_types)
+    
+    def _parse_llm_response(self, response: Any) -> Dict[str, Any]:
+        """Convert a Responses / Chat Completions result into the agent's response dict."""
+        if self.is_gpt5:
+            output_text = response.output_text
+        else:
+            output_text = response.choices[0].message.content
+        return {
+            "output_text": output_text,
+            "response_id": response.id,
+            **self._usage_counts(response.usage)
+        }
+    
+    def _usage_counts(self, usage: Any) -> Dict[str, int]:
+        """Token counts of a Responses / Chat Completions usage object."""
+        if self.is_gpt5:
+            input_tokens = getattr(usage, "input_tokens", 0)
+            output_tokens = getattr(usage, "output_tokens", 0)
+            details = getattr(usage, "input_tokens_details", None)
+        else:
+            input_tokens = getattr(usage, "prompt_tokens", 0)
+            output_tokens = getattr(usage, "completion_tokens", 0)
+            details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "tokens": usage.total_tokens,
+            "input_tokens": input_tokens or 0,
+            "output_tokens": output_tokens or 0,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0
+        }
+    
+    def _record_usage(self, result: Dict[str, Any], call_span: Optional[Span] = None) -> None:
+        """Add the token counts of an API call to usage_stats (and the call's span)."""
+        if call_span is not None:
+            call_span.input_tokens = result.get("input_tokens", 0)
+            call_span.output_tokens = result.get("output_tokens", 0)
+            call_span.cached_tokens = result.get("cached_tokens", 0)
+        with self._usage_lock:
+            self.usage_stats["calls"] += 1
+            self.usage_stats["input_tokens"] += result.get("input_tokens", 0)
+            self.usage_stats["cached_tokens"] += result.get("cached_tokens", 0)
+            self.usage_stats["total_tokens"] += result.get("tokens", 0)
+    
+    def prompt_cache_hit_rate(self) -> float:
+        """Share of input tokens served from the provider's prompt cache."""
+        input_tokens = self.usage_stats["input_tokens"]
+        return self.usage_stats["cached_tokens"] / input_tokens if input_tokens else 0.0
+    
+    def _cache_key(self, request: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a request (None if caching is disabled)."""
+        if self.cache is None:
+            return None
+        prompt = request.get("input") or request["messages"][0]["content"]
+        options = {k: v for k, v in request.items() if k not in ("model", "input", "messages")}
+        return self.cache.make_key(
+            request["model"],
+            request.get("reasoning", {}).get("effort"),
+            request.get("text", {}).get("verbosity"),
+            prompt,
+            options
+        )
+    
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Look up a cached response."""
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            cached["cache_hit"] = True
+        return cached
+    
+    def _call_gpt5(self, input_text: str, reasoning_effort: str = None, verbosity: str = None,
+                   response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Call LLM API - uses GPT-5 Responses API for gpt-5* models, Chat Completions API for others.
+        
+        Transient errors are retried with backoff; raises an LLMError subclass when the call fails.
+        """
+        with span("llm_call", "llm") as call_span:
+            request = self._build_llm_request(input_text, reasoning_effort, verbosity, response_schema)
+            cache_key = self._cache_key(request)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                call_span.cache_hit = True
+                return cached
+        
+            result = self.retry_policy.call(
+                lambda: self.transport.create(request, self.retry_policy.timeout),
+                self.circuit_breaker,
+                on_retry=call_span.add_retry
+            )
+            self._record_usage(result, call_span)
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+            return result
+    
+    async def _call_gpt5_async(self, input_text: str, reasoning_effort: str = None, verbosity: str = None,
+                               response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of _call_gpt5 (AsyncOpenAI client for the default transport)."""
+        with span("llm_call", "llm") as call_span:
+            request = self._build_llm_request(input_text, reasoning_effort, verbosity, response_schema)
+            cache_key = self._cache_key(request)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                call_span.cache_hit = True
+                return cached
+        
+            result = await self.retry_policy.call_async(
+                lambda: self.transport.create_async(request, self.retry_policy.timeout),
+                self.circuit_breaker,
+                on_retry=call_span.add_retry
+            )
+            self._record_usage(result, call_span)
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+            return result
+    
+    def _call_gpt5_stream(self, input_text: str, reasoning_effort: str = None, verbosity: str = None,
+                          response_schema: Optional[Dict[str, Any]] = None, report: Optional[PerformanceReport] = None,
+                          parent: Optional[str] = None) -> Iterator[str]:
+        """Streaming variant of _call_gpt5 - yields the output text in chunks.
+        
+        Only opening the stream is retried; errors after the first chunk are raised as LLMError.
+        The complete answer is stored in the cache like a regular call. The call is recorded
+        as an "llm" span into report (metrics only if None), counted towards the parent span.
+        """
+        # Recorded without the span context: a generator may be resumed from different threads
+        call_span = Span(name="llm_call", kind="llm", parent=parent, start=time.time())
+        started = time.perf_counter()
+        try:
+            yield from self._stream_llm_call(input_text, reasoning_effort, verbosity, response_schema, call_span)
+        except GeneratorExit:
+            raise  # The consumer stopped reading - no error of the call
+        except BaseException as e:
+            call_span.error = type(e).__name__
+            raise
+        finally:
+            call_span.duration = time.perf_counter() - started
+            record_span(report, call_span)
+    
+    def _stream_llm_call(self, input_text: str, reasoning_effort: Optional[str], verbosity: Optional[str],
+                         response_schema: Optional[Dict[str, Any]], call_span: Span) -> Iterator[str]:
+        request = self._build_llm_request(input_text, reasoning_effort, verbosity, response_schema)
+        cache_key = self._cache_key(request)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            call_span.cache_hit = True
+            yield cached["output_text"]
+            return
+        if not self.transport.supports_streaming:
+            # Offline transports answer in one piece
+            result = self.retry_policy.call(
+                lambda: self.transport.create(request, self.retry_policy.timeout),
+                self.circuit_breaker,
+                on_retry=call_span.add_retry
+            )
+            self._record_usage(result, call_span)
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+            yield result["output_text"]
+            return
+        
+        stream_kwargs = {"stream": True, "timeout": self.retry_policy.timeout}
+        if self.is_gpt5:
+            create = self.client.responses.create
+        else:
+            create = self.client.chat.completions.create
+            stream_kwargs["stream_options"] = {"include_usage": True}
+        stream = self.retry_policy.call(lambda: create(**request, **stream_kwargs), self.circuit_breaker,
+                                        on_retry=call_span.add_retry)
+        
+        parts = []
+        result = {"output_text": "", "response_id": None, "tokens": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+        try:
+            for event in stream:
+                if self.is_gpt5:
+                    if event.type == "response.output_text.delta":
+                        parts.append(event.delta)
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        result["response_id"] = event.response.id
+                        result.update(self._usage_counts(event.response.usage))
+                else:
+                    result["response_id"] = event.id
+                    if event.choices and event.choices[0].delta.content:
+                        parts.append(event.choices[0].delta.content)
+                        yield event.choices[0].delta.content
+                    if getattr(event, "usage", None):
+                        result.update(self._usage_counts(event.usage))
+        except LLMError:
+            raise
+        except Exception as e:
+            error = classify_error(e)
+            if error is None:
+                self.circuit_breaker.release()
+                raise
+            self.circuit_breaker.record_failure(error)
+            raise error from e
+        
+        result["output_text"] = "".join(parts)
+        self._record_usage(result, call_span)
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+    
+    def _classify_content_type(self, text: str, available_types: List[str], schemas: SchemaManager,
+                               log: bool = True) -> Optional[str]:
+        """Content type the local classifier is confident about (on the session's schemas) - None if the LLM has to decide."""
+        _, classifier = self._content_type_models_for(schemas)
+        # An uncalibrated confidence does not track the accuracy - leave the decision to the LLM
+        if classifier is None or not classifier.calibrated or not available_types:
+            return None
+        available = {label: schema_file for label, schema_file in schemas.get_available_special_schemas().items()
+                     if label in available_types}
+        # Long documents: the beginning says what kind of resource it is
+        label, confidence = classifier.predict(self._document_chunks(text)[0].text, available)
+        confident = label is not None and confidence >= self.content_type_threshold
+        if log:
+            self.content_type_stats["local" if confident else "llm"] += 1
+            if confident:
+                print(f"🧭 Inhaltsart lokal erkannt: {label} (Konfidenz {confidence:.2f}) - kein LLM-Call")
+            else:
+                print(f"🧭 Inhaltsart lokal unsicher ({label}, Konfidenz {confidence:.2f}) - frage das LLM")
+        return label if confident else None
+    
+    def _build_content_type_prompt(self, text: str, available_types: List[str]) -> str:
+        """Build the prompt for content type detection."""
+        # Static instructions first, variable text last (provider prefix caching)
+        return f"""Analysiere den Text am Ende und identifiziere die passende Inhaltsart.
 
 Verfügbare Inhaltsarten:
 {chr(10).join(available_types)}
 
 Antworte nur mit EINEM Wort aus der Liste der verfügbaren Inhaltsarten.
-Wähle die am besten passende Kategorie."""
+Wähle die am besten passende Kategorie.
+
+Text: {text}"""
+    
+    def _parse_content_types(self, content: str, available_types: List[str]) -> List[str]:
+        """Parse the detected content type from the LLM answer."""
+        # Parse response (could be comma-separated even though we ask for one)
+        detected = [t.strip() for t in content.strip().replace(",", " ").split()]
+        
+        # Filter to only valid types
+        valid = [t for t in detected if t in available_types]
+        return valid[:1]  # Return only 1 type
+    
+    def _detect_content_types(self, text: str, available_types: List[str],
+                              schemas: Optional[SchemaManager] = None) -> List[str]:
+        """Use GPT-5 to detect content types from text. Raises LLMError if the LLM call fails.
+        
+        With the session's schemas, a confident local classification (see _classify_content_type)
+        is used without a call. Headless jobs pass none - their plan already classified locally.
+        """
+        if not available_types:
+            return []
+        local = self._classify_content_type(text, available_types, schemas) if schemas is not None else None
+        if local is not None:
+            return [local]
+        
+        # Long documents: the beginning says what kind of resource it is
+        prompt = self._build_content_type_prompt(self._document_chunks(text)[0].text, available_types)
         
         try:
             response = self._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low")
-            content = response["output_text"].strip()
-            
-            # Parse response (could be comma-separated even though we ask for one)
-            detected = [t.strip() for t in content.replace(",", " ").split()]
-            
-            # Filter to only valid types
-            valid = [t for t in detected if t in available_types]
-            return valid[:1]  # Return only 1 type
+            return self._parse_content_types(response["output_text"], available_types)
+        except LLMError:
+            raise
+        except Exception as e:
+            print(f"Error detecting content types: {e}")
+            return []
+    
+    async def _detect_content_types_async(self, text: str, available_types: List[str],
+                                          schemas: Optional[SchemaManager] = None) -> List[str]:
+        """Async variant of _detect_content_types."""
+        if not available_types:
+            return []
+        local = self._classify_content_type(text, available_types, schemas) if schemas is not None else None
+        if local is not None:
+            return [local]
+        
+        # Long documents: the beginning says what kind of resource it is
+        prompt = self._build_content_type_prompt(self._document_chunks(text)[0].text, available_types)
+        
+        try:
+            response = await self._call_gpt5_async(prompt, reasoning_effort="minimal", verbosity="low")
+            return self._parse_content_types(response["output_text"], available_types)
+        except LLMError:
+            raise
         except Exception as e:
             print(f"Error detecting content types: {e}")
             return []
@@ -725,17 +1778,24 @@ Wähle die am besten passende Kategorie."""
                 # Normalize the value according to schema rules
                 normalized_value = self.validator.normalize_value(value, field)
                 
+                # Snap near-misses to the vocabulary and report what changed
+                normalized_value, snaps = self.validator.snap_to_vocabulary(
+                    normalized_value, field, self.vocab_snap_threshold)
+                for original, label, similarity in snaps:
+                    print(f"🔧 {field.prompt.get('label', field_id)}: '{original}' → '{label}' "
+                          f"(Ähnlichkeit {similarity:.2f})")
+                
                 # Validate vocabulary if defined
                 if field.vocabulary and normalized_value:
                     vocab_type = field.vocabulary.get("type", "open")
-                    concepts = field.get_vocabulary_concepts()
+                    index = field.vocabulary_index
                     
-                    if vocab_type == "closed" and concepts:
-                        # Check if value is in allowed concepts
-                        allowed_labels = [c.get("label", "") for c in concepts]
+                    if vocab_type == "closed" and index.labels:
+                        # Check if value is in allowed concepts (precompiled label set)
+                        allowed_labels = index.label_list
                         
                         if isinstance(normalized_value, list):
-                            invalid = [v for v in normalized_value if v not in allowed_labels]
+                            invalid = [str(v) for v in normalized_value if not isinstance(v, str) or v not in index.labels]
                             if invalid:
                                 warnings.append(
                                     f"⚠️ **{field.prompt.get('label', field_id)}**: "
@@ -743,7 +1803,7 @@ Wähle die am besten passende Kategorie."""
                                     f"   Erlaubt: {', '.join(allowed_labels[:5])}{'...' if len(allowed_labels) > 5 else ''}"
                                 )
                         else:
-                            if normalized_value not in allowed_labels:
+                            if not isinstance(normalized_value, str) or normalized_value not in index.labels:
                                 warnings.append(
                                     f"⚠️ **{field.prompt.get('label', field_id)}**: "
                                     f"'{normalized_value}' ist nicht in der erlaubten Liste.\n"
@@ -767,8 +1827,37 @@ Wähle die am besten passende Kategorie."""
         
         return normalized, warnings
     
-    def _extract_fields(self, text: str, fields: List[Field], current_metadata: Dict) -> Dict[str, Any]:
-        """Extract field values from text using GPT-5."""
+    def _build_extraction_prompt(self, text: str, fields: List[Field], content_types: Optional[List[str]] = None) -> str:
+        """Build the field extraction prompt - static prefix first, user text last.
+        
+        Providers cache the longest previously seen prompt prefix, so everything that
+        only depends on the field list comes before the variable text. The vocabulary
+        shortlist depends on the text and goes between the two.
+        """
+        prefix = self._build_extraction_prefix(fields, content_types)
+        return f"{prefix}{self._vocabulary_hints(text, fields)}\n\nText:\n{text}"
+    
+    def _vocabulary_hints(self, text: str, fields: List[Field]) -> str:
+        """Prompt block with the concepts of the large vocabularies most relevant to the text."""
+        if self.vocabulary_shortlist is None:
+            return ""
+        shortlists = self.vocabulary_shortlist.shortlist(text, fields)
+        if not shortlists:
+            return ""
+        lines = [f"- {field_id}: {', '.join(labels)}" for field_id, labels in shortlists.items()]
+        return ("\n\nPassende Werte für Felder mit großem Vokabular (nach Relevanz für den Text, "
+                "Werte exakt übernehmen):\n" + "\n".join(lines))
+    
+    def _build_extraction_prefix(self, fields: List[Field], content_types: Optional[List[str]] = None) -> str:
+        """Static part of the extraction prompt (instructions, field descriptions, vocabulary hints).
+        
+        Memoized per field list, i.e. per (schema file, phase, schema version) - byte-identical across calls.
+        With content_types (fused extraction) the content type is asked for as an extra key.
+        """
+        return self._prompt_prefixes.get_or_build(fields, content_types,
+                                                  lambda: self._compose_extraction_prefix(fields, content_types))
+        
+    def _compose_extraction_prefix(self, fields: List[Field], content_types: Optional[List[str]]) -> str:
         # Build field descriptions for prompt
         field_descriptions = []
         for field in fields:
@@ -780,56 +1869,294 @@ Wähle die am besten passende Kategorie."""
             vocab_info = ""
             if field.vocabulary:
                 concepts = field.get_vocabulary_concepts()
-                if concepts and len(concepts) < 20:  # Only show if not too many
+                if self.vocabulary_shortlist is not None and concepts:
+                    if self.vocabulary_shortlist.applies(field):
+                        vocab_info = f" Kontrolliertes Vokabular ({len(concepts)} Werte), passende Werte siehe unten"
+                    else:
+                        vocab_info = f" Mögliche Werte: {', '.join(c.get('label', '') for c in concepts)}"
+                elif concepts and len(concepts) < 20:  # Only show if not too many
                     vocab_labels = [c.get("label", "") for c in concepts[:10]]
                     vocab_info = f" Mögliche Werte: {', '.join(vocab_labels)}"
             
             field_descriptions.append(
                 f"- **{field.id}** ({label}): {description} [{datatype}, {multiple}]{vocab_info}"
             )
+        if content_types:
+            field_descriptions.append(
+                f"- **{CONTENT_TYPE_KEY}** (Inhaltsart): Die am besten passende Inhaltsart, "
+                f"genau ein Wert aus: {', '.join(content_types)} [string, Einzelwert]"
+            )
         
-        prompt = f"""Du bist ein Experte für Metadatenextraktion aus Bildungsinhalten.
-Extrahiere strukturierte Metadaten aus dem Text.
+        return f"""Du bist ein Experte für Metadatenextraktion aus Bildungsinhalten.
+Extrahiere strukturierte Metadaten aus dem Text am Ende.
 Antworte NUR mit einem validen JSON-Objekt, ohne zusätzlichen Text.
 
 Extrahiere folgende Felder aus dem Text:
 
 {chr(10).join(field_descriptions)}
 
-Text:
-{text}
-
 Antworte mit einem JSON-Objekt mit den Feldnamen als Keys.
 Verwende null für Felder, die nicht extrahiert werden können.
 Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
+    
+    def _parse_extraction_output(self, content: str, fields: List[Field]) -> Dict[str, Any]:
+        """Parse the JSON answer of an extraction call and validate/normalize the values."""
+        # Extract JSON from response
+        return self._normalize_extracted(parse_json_object(content), fields)
+    
+    def _normalize_extracted(self, extracted: Dict[str, Any], fields: List[Field]) -> Dict[str, Any]:
+        """Drop nulls and validate/normalize the extracted values of one field set."""
+        # Filter out null values
+        raw_extracted = {k: strip_nulls(v) for k, v in extracted.items() if v is not None}
+        
+        # Validate and normalize
+        normalized, validation_warnings = self._validate_and_normalize_fields(raw_extracted, fields)
+        self._log_validation_warnings(validation_warnings)
+        
+        return normalized
+    
+    def _log_validation_warnings(self, validation_warnings: List[str]) -> None:
+        """Print the warnings of _validate_and_normalize_fields and count them on the current span."""
+        add_validation_warnings(len(validation_warnings))
+        if validation_warnings:
+            print(f"🔍 Validierung: {len(validation_warnings)} Warnungen")
+            for w in validation_warnings:
+                print(f"  {w}")
+    
+    def _extract_fields(self, text: str, fields: List[Field], current_metadata: Dict) -> Dict[str, Any]:
+        """Extract field values from text using GPT-5. Raises LLMError if the LLM call fails.
+        
+        Fields the deterministic rules fill are not asked from the LLM; no call is made
+        if none are left. Long texts are extracted per chunk in parallel and reduced
+        (see _document_chunks), large field lists as concurrent shards (see _shard_fields).
+        """
+        values = self._rule_values(text, fields)
+        fields = [f for f in fields if f.id not in values]
+        if not fields:
+            print(f"📐 Alle {len(values)} Felder per Regel extrahiert - kein LLM-Call")
+            return values
+        
+        chunks = self._document_chunks(text)
+        if len(chunks) == 1:
+            extracted = self._extract_sharded(text, fields)
+        else:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self._extract_sharded, chunk.text, fields)
+                    for chunk in chunks
+                ]
+                extracted = reduce_chunk_results([future.result() for future in futures], chunks, fields)
+        return {**extracted, **values}
+    
+    async def _extract_fields_async(self, text: str, fields: List[Field], current_metadata: Dict) -> Dict[str, Any]:
+        """Async variant of _extract_fields - shares prompt building and validation with the sync path."""
+        values = self._rule_values(text, fields)
+        fields = [f for f in fields if f.id not in values]
+        if not fields:
+            print(f"📐 Alle {len(values)} Felder per Regel extrahiert - kein LLM-Call")
+            return values
+        
+        chunks = self._document_chunks(text)
+        if len(chunks) == 1:
+            extracted = await self._extract_sharded_async(text, fields)
+        else:
+            results = await asyncio.gather(*(self._extract_sharded_async(chunk.text, fields) for chunk in chunks))
+            extracted = reduce_chunk_results(list(results), chunks, fields)
+        return {**extracted, **values}
+    
+    def _document_chunks(self, text: str) -> List[Chunk]:
+        """The text as one chunk, or paragraph chunks if it exceeds long_document_tokens."""
+        if self.long_document_tokens <= 0 or estimate_tokens(text) <= self.long_document_tokens:
+            return [Chunk(0, 0, len(text), text)]
+        return chunk_text(text, self.long_document_chunk_tokens)
+    
+    def _extract_sharded(self, text: str, fields: List[Field]) -> Dict[str, Any]:
+        """Extract the fields from one text, as concurrent shards for large field lists."""
+        shards = self._shard_fields(fields)
+        if len(shards) == 1:
+            return self._extract_shard(text, fields, fields)
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._extract_shard, text, shard, fields)
+                for shard in shards
+            ]
+            return self._merge_shards([future.result() for future in futures], shards)
+    
+    async def _extract_sharded_async(self, text: str, fields: List[Field]) -> Dict[str, Any]:
+        """Async variant of _extract_sharded."""
+        shards = self._shard_fields(fields)
+        if len(shards) == 1:
+            return await self._extract_shard_async(text, fields, fields)
+        results = await asyncio.gather(*(self._extract_shard_async(text, shard, fields) for shard in shards))
+        return self._merge_shards(list(results), shards)
+    
+    def _extract_shard(self, text: str, shard: List[Field], fields: List[Field]) -> Dict[str, Any]:
+        """One extraction call for the shard's fields; the answer is validated against all fields of the phase."""
+        prompt = self._build_extraction_prompt(text, shard)
         
         try:
-            response = self._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low")
-            content = response["output_text"].strip()
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                extracted = json.loads(json_match.group())
-                # Filter out null values
-                raw_extracted = {k: v for k, v in extracted.items() if v is not None}
-                
-                # Validate and normalize
-                normalized, validation_warnings = self._validate_and_normalize_fields(raw_extracted, fields)
-                
-                # Log warnings
-                if validation_warnings:
-                    print(f"🔍 Validierung: {len(validation_warnings)} Warnungen")
-                    for w in validation_warnings:
-                        print(f"  {w}")
-                
-                return normalized
-            else:
-                return {}
+            response = self._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low",
+                                       response_schema=self._response_schema(shard))
+            return self._parse_extraction_output(response["output_text"], fields)
+        except LLMError:
+            raise
         except Exception as e:
             print(f"Error extracting fields: {e}")
             return {}
     
+    async def _extract_shard_async(self, text: str, shard: List[Field], fields: List[Field]) -> Dict[str, Any]:
+        """Async variant of _extract_shard."""
+        prompt = self._build_extraction_prompt(text, shard)
+        
+        try:
+            response = await self._call_gpt5_async(prompt, reasoning_effort="minimal", verbosity="low",
+                                                   response_schema=self._response_schema(shard))
+            return self._parse_extraction_output(response["output_text"], fields)
+        except LLMError:
+            raise
+        except Exception as e:
+            print(f"Error extracting fields: {e}")
+            return {}
+    
+    def _shard_fields(self, fields: List[Field]) -> List[List[Field]]:
+        """Split a field list into shards of at most field_shard_size fields along schema groups.
+        
+        Consecutive groups are packed into one shard while they fit; groups larger
+        than the shard size are split. Short lists stay a single shard.
+        """
+        size = self.field_shard_size
+        if size <= 0 or len(fields) <= size:
+            return [fields]
+        
+        groups: Dict[str, List[Field]] = {}
+        for field in fields:
+            groups.setdefault(field.group, []).append(field)
+        
+        shards: List[List[Field]] = []
+        current: List[Field] = []
+        for group_fields in groups.values():
+            for start in range(0, len(group_fields), size):
+                chunk = group_fields[start:start + size]
+                if current and len(current) + len(chunk) > size:
+                    shards.append(current)
+                    current = []
+                current = current + chunk
+        if current:
+            shards.append(current)
+        return shards
+    
+    def _merge_shards(self, results: List[Dict[str, Any]], shards: List[List[Field]]) -> Dict[str, Any]:
+        """Merge shard answers. A field answered by several shards keeps the value of the shard
+        that asked for it ("owner"); with "union", list values of all shards are combined."""
+        owner = {field.id: i for i, shard in enumerate(shards) for field in shard}
+        merged: Dict[str, Any] = {}
+        for i, result in enumerate(results):
+            for field_id, value in result.items():
+                if field_id not in merged:
+                    merged[field_id] = value
+                elif self.field_shard_merge == "union" and isinstance(merged[field_id], list) and isinstance(value, list):
+                    merged[field_id] = merged[field_id] + [v for v in value if v not in merged[field_id]]
+                elif owner.get(field_id) == i:
+                    merged[field_id] = value
+        return merged
+    
+    def _fused_fields(self, parts: Dict[str, tuple]) -> tuple:
+        """Fields and content types asked for by a fused job."""
+        fields = [f for kind, _, arg in parts.values() if kind == "fields" for f in arg]
+        content_types = next((arg for kind, _, arg in parts.values() if kind == "content_type"), None)
+        return fields, content_types
+    
+    def _parse_fused_output(self, content: str, parts: Dict[str, tuple]) -> Dict[str, Any]:
+        """Split the answer of a fused call into the results of its jobs - each field set is validated on its own."""
+        extracted = parse_json_object(content)
+        detected = extracted.pop(CONTENT_TYPE_KEY, None)
+        results = {}
+        for name, (kind, _, arg) in parts.items():
+            if kind == "content_type":
+                results[name] = [detected] if detected in arg else []
+            else:
+                field_ids = {f.id for f in arg}
+                results[name] = self._normalize_extracted({k: v for k, v in extracted.items() if k in field_ids}, arg)
+        return results
+    
+    def _extract_fused(self, text: str, parts: Dict[str, tuple]) -> Dict[str, Any]:
+        """Run the jobs of a fused job in one LLM call. Raises LLMError if the LLM call fails.
+        
+        Fields the deterministic rules fill are not asked from the LLM (see _extract_fields).
+        """
+        job, values = self._split_rule_values(("fused", text, parts))
+        fields, content_types = self._fused_fields(job[2])
+        if not fields and content_types is None:
+            return self._with_rule_values(job, {}, values)
+        prompt = self._build_extraction_prompt(text, fields, content_types)
+        
+        try:
+            response = self._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low",
+                                       response_schema=self._response_schema(fields, content_types))
+            return self._with_rule_values(job, self._parse_fused_output(response["output_text"], job[2]), values)
+        except LLMError:
+            raise
+        except Exception as e:
+            print(f"Error extracting fields: {e}")
+            return self._with_rule_values(job, {}, values)
+    
+    async def _extract_fused_async(self, text: str, parts: Dict[str, tuple]) -> Dict[str, Any]:
+        """Async variant of _extract_fused."""
+        job, values = self._split_rule_values(("fused", text, parts))
+        fields, content_types = self._fused_fields(job[2])
+        if not fields and content_types is None:
+            return self._with_rule_values(job, {}, values)
+        prompt = self._build_extraction_prompt(text, fields, content_types)
+        
+        try:
+            response = await self._call_gpt5_async(prompt, reasoning_effort="minimal", verbosity="low",
+                                                   response_schema=self._response_schema(fields, content_types))
+            return self._with_rule_values(job, self._parse_fused_output(response["output_text"], job[2]), values)
+        except LLMError:
+            raise
+        except Exception as e:
+            print(f"Error extracting fields: {e}")
+            return self._with_rule_values(job, {}, values)
+    
+    def _extract_fields_stream(self, text: str, fields: List[Field], current_metadata: Dict,
+                               report: Optional[PerformanceReport] = None, parent: Optional[str] = None) -> Iterator[tuple]:
+        """Streaming variant of _extract_fields.
+        
+        Yields (field_id, value) as soon as the value of a field is complete in the
+        streamed answer - each value is validated/normalized on its own.
+        Raises LLMError if the LLM call fails.
+        """
+        if len(self._document_chunks(text)) > 1:
+            # Long documents are reduced over all chunks - nothing to stream field by field
+            yield from self._extract_fields(text, fields, current_metadata).items()
+            return
+        
+        # Rule values first - the LLM is only asked for the remaining fields
+        values = self._rule_values(text, fields)
+        yield from values.items()
+        fields = [f for f in fields if f.id not in values]
+        if not fields:
+            return
+        
+        prompt = self._build_extraction_prompt(text, fields)
+        parser = IncrementalJSONObjectParser()
+        
+        for delta in self._call_gpt5_stream(prompt, reasoning_effort="minimal", verbosity="low",
+                                            response_schema=self._response_schema(fields), report=report, parent=parent):
+            try:
+                members = parser.feed(delta)
+            except ValueError as e:
+                print(f"Error extracting fields: {e}")
+                return
+            for field_id, value in members:
+                if value is None:
+                    continue
+                normalized, validation_warnings = self._validate_and_normalize_fields({field_id: strip_nulls(value)}, fields)
+                self._log_validation_warnings(validation_warnings)
+                if field_id in normalized:
+                    yield field_id, normalized[field_id]
+    
+    @instrument_node
     def process_user_input(self, state: WorkflowState, user_input: str) -> WorkflowState:
         """Process user input and update state."""
         state.add_message("user", user_input)
@@ -837,6 +2164,7 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
         
         # Check for back navigation first
         if user_input.lower().strip() in ["zurück", "back", "zurück", "zurueck"]:
+            state.messages[-1].source = False
             if state.go_back_phase():
                 # Reset completion flags based on phase
                 if state.phase == WorkflowPhase.EXTRACT_CORE_REQUIRED:
@@ -885,6 +2213,7 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
         
         # Handle phase-specific logic
         if state.phase == WorkflowPhase.SUGGEST_SPECIAL_SCHEMAS:
+            state.messages[-1].source = False  # A selection, not a description
             # Check for confirmation or schema selection
             if any(word in user_input.lower() for word in ["ja", "yes", "korrekt", "richtig"]):
                 state.special_schema_confirmed = True
@@ -896,7 +2225,7 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
             else:
                 # Try to extract content type from input (number or name)
                 try:
-                    available = self.schema_manager.get_available_special_schemas()
+                    available = self._schemas(state).get_available_special_schemas()
                     schema_list = state.metadata.get("_temp_schema_list", list(available.keys()))
                     
                     # Parse user input - could be numbers or names, comma-separated
@@ -951,6 +2280,8 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
             
             # Check if user is providing corrections/additions
             is_correction = not is_navigation_command and len(user_input) > 2
+            if not is_correction:
+                state.messages[-1].source = False
             
             # Only extract/update fields if user is providing corrections
             if is_correction:
@@ -965,16 +2296,16 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
                     state.special_optional_complete = False
                 # Try to extract field values from input
                 if state.phase == WorkflowPhase.EXTRACT_CORE_REQUIRED:
-                    fields = self.schema_manager.get_required_fields("core.json")
+                    fields = self._schemas(state).get_required_fields("core.json")
                 elif state.phase == WorkflowPhase.EXTRACT_CORE_OPTIONAL:
-                    fields = self.schema_manager.get_optional_fields("core.json")
+                    fields = self._schemas(state).get_optional_fields("core.json")
                 elif state.phase == WorkflowPhase.EXTRACT_SPECIAL_REQUIRED:
                     # Get required fields from CURRENT special schema
                     fields = []
                     if state.current_special_schema_index < len(state.special_schemas):
                         schema_file = state.special_schemas[state.current_special_schema_index]
                         try:
-                            schema_fields = self.schema_manager.get_fields(schema_file)
+                            schema_fields = self._schemas(state).get_fields(schema_file)
                             fields = [f for f in schema_fields if f.required]
                         except FileNotFoundError:
                             pass
@@ -984,15 +2315,19 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
                     if state.current_special_schema_index < len(state.special_schemas):
                         schema_file = state.special_schemas[state.current_special_schema_index]
                         try:
-                            schema_fields = self.schema_manager.get_fields(schema_file)
+                            schema_fields = self._schemas(state).get_fields(schema_file)
                             fields = [f for f in schema_fields if not f.required]
                         except FileNotFoundError:
                             pass
                 
                 # Extract fields
                 extracted = self._extract_fields(user_input, fields, state.metadata)
+                provenance = extracted.pop(PROVENANCE_KEY, {})
                 for field_id, value in extracted.items():
                     state.update_field(field_id, value, confirmed=True)
+                self._apply_provenance(state, provenance)
+                # The correction is applied - the re-rendered node must not extract it a second time
+                state.mark_phase_extracted()
                 
                 # After corrections, re-display the fields to show updated values
                 state.add_message(
@@ -1029,7 +2364,7 @@ Für Listen verwende Arrays. Für Einzelwerte verwende Strings."""
                     if state.current_special_schema_index < len(state.special_schemas):
                         schema_file = state.special_schemas[state.current_special_schema_index]
                         try:
-                            schema_fields = self.schema_manager.get_fields(schema_file)
+                            schema_fields = self._schemas(state).get_fields(schema_file)
                             special_required_fields = [f.id for f in schema_fields if f.required]
                             
                             unfilled = [f for f in special_required_fields if f not in state.field_status or not state.field_status[f].is_filled]
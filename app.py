@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from typing import List, Tuple, Dict
 from agent import MetadataAgent
 from models import WorkflowState, WorkflowPhase, Message
+from llm_resilience import LLMError
+from instrumentation import start_metrics_server
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +18,14 @@ try:
 except ValueError as e:
     raise ValueError(f"Configuration error: {e}. Please check your .env file.")
 
+# Reload changed schema files while the UI is running (running sessions keep their version)
+if os.getenv("SCHEMA_WATCH", "true").lower() in ("1", "true", "yes"):
+    agent.schema_registry.start(float(os.getenv("SCHEMA_WATCH_INTERVAL", "2")))
+
+# Optional Prometheus endpoint (/metrics)
+if os.getenv("METRICS_PORT"):
+    start_metrics_server(int(os.getenv("METRICS_PORT")))
+
 # Global state (in production, use session management)
 workflow_state = WorkflowState()
 
@@ -111,70 +121,85 @@ def format_json_preview(state: WorkflowState) -> str:
 
 
 def chat_interaction(user_message: str, history: List[Tuple[str, str]]):
-    """Handle chat interaction."""
+    """Handle chat interaction.
+    
+    Generator: yields intermediate outputs while fields are streamed in, then the final outputs.
+    """
     global workflow_state
     
     if not user_message.strip():
-        return history, "", format_intermediate_results(workflow_state), format_json_preview(workflow_state)
+        yield history, "", format_intermediate_results(workflow_state), format_json_preview(workflow_state)
+        return
     
     # Note: User message is added in process_user_input, so don't add it here
     
-    # Process through workflow based on current phase (new workflow order)
-    if workflow_state.phase == WorkflowPhase.INIT:
-        # First user input: add message and extract core required fields
-        workflow_state.add_message("user", user_message)
-        # First user input: extract core required fields
-        workflow_state = agent._extract_core_required_node(workflow_state)
-        
-    elif workflow_state.phase == WorkflowPhase.EXTRACT_CORE_REQUIRED:
-        # User is confirming/correcting required fields
-        workflow_state = agent.process_user_input(workflow_state, user_message)
-        # Move to optional fields only if confirmed
-        if workflow_state.core_required_complete:
-            workflow_state = agent._extract_core_optional_node(workflow_state)
-            
-    elif workflow_state.phase == WorkflowPhase.EXTRACT_CORE_OPTIONAL:
-        # User is adding optional fields or saying 'weiter'
-        workflow_state = agent.process_user_input(workflow_state, user_message)
-        # Move to suggest schemas if user said 'weiter'
-        if workflow_state.core_optional_complete:
-            workflow_state = agent._suggest_special_schemas_node(workflow_state)
+    try:
+        # Process through workflow based on current phase (new workflow order)
+        if workflow_state.phase == WorkflowPhase.INIT:
+            # First user input: add message and extract core required fields
+            workflow_state.add_message("user", user_message)
+            # First user input: extract core required fields (streamed - fields appear as they arrive)
+            chat_history = format_chat_history(workflow_state.messages)
+            for workflow_state in agent._extract_core_required_node_stream(workflow_state):
+                yield chat_history, "", format_intermediate_results(workflow_state), format_json_preview(workflow_state)
             
-    elif workflow_state.phase == WorkflowPhase.SUGGEST_SPECIAL_SCHEMAS:
-        # User is confirming content type
-        workflow_state = agent.process_user_input(workflow_state, user_message)
-        # Move to special required if confirmed
-        if workflow_state.special_schema_confirmed:
-            workflow_state = agent._extract_special_required_node(workflow_state)
-            
-    elif workflow_state.phase == WorkflowPhase.EXTRACT_SPECIAL_REQUIRED:
-        # User is confirming/correcting special required fields
-        workflow_state = agent.process_user_input(workflow_state, user_message)
-        # Move to special optional if confirmed
-        if workflow_state.special_required_complete:
-            workflow_state = agent._extract_special_optional_node(workflow_state)
-            
-    elif workflow_state.phase == WorkflowPhase.EXTRACT_SPECIAL_OPTIONAL:
-        # User is adding special optional fields or saying 'weiter'
-        workflow_state = agent.process_user_input(workflow_state, user_message)
-        # Check if we need to process more schemas or go to review
-        if workflow_state.special_optional_complete:
-            # Check via routing function if more schemas
-            route = agent._route_after_special_optional(workflow_state)
-            if route == "next_schema":
+        elif workflow_state.phase == WorkflowPhase.EXTRACT_CORE_REQUIRED:
+            # User is confirming/correcting required fields
+            workflow_state = agent.process_user_input(workflow_state, user_message)
+            # Move to optional fields only if confirmed
+            if workflow_state.core_required_complete:
+                workflow_state = agent._extract_core_optional_node(workflow_state)
+                
+        elif workflow_state.phase == WorkflowPhase.EXTRACT_CORE_OPTIONAL:
+            # User is adding optional fields or saying 'weiter'
+            workflow_state = agent.process_user_input(workflow_state, user_message)
+            # Move to suggest schemas if user said 'weiter'
+            if workflow_state.core_optional_complete:
+                workflow_state = agent._suggest_special_schemas_node(workflow_state)
+                
+        elif workflow_state.phase == WorkflowPhase.SUGGEST_SPECIAL_SCHEMAS:
+            # User is confirming content type
+            workflow_state = agent.process_user_input(workflow_state, user_message)
+            # Move to special required if confirmed
+            if workflow_state.special_schema_confirmed:
                 workflow_state = agent._extract_special_required_node(workflow_state)
-            else:
-                workflow_state = agent._review_node(workflow_state)
-            
-    elif workflow_state.phase == WorkflowPhase.REVIEW or workflow_state.phase == WorkflowPhase.COMPLETE:
-        workflow_state.add_message("assistant", "Die Extraktion ist abgeschlossen. Sie können 'Neu starten' klicken für eine neue Extraktion.")
+                
+        elif workflow_state.phase == WorkflowPhase.EXTRACT_SPECIAL_REQUIRED:
+            # User is confirming/correcting special required fields
+            workflow_state = agent.process_user_input(workflow_state, user_message)
+            # Move to special optional if confirmed
+            if workflow_state.special_required_complete:
+                workflow_state = agent._extract_special_optional_node(workflow_state)
+                
+        elif workflow_state.phase == WorkflowPhase.EXTRACT_SPECIAL_OPTIONAL:
+            # User is adding special optional fields or saying 'weiter'
+            workflow_state = agent.process_user_input(workflow_state, user_message)
+            # Check if we need to process more schemas or go to review
+            if workflow_state.special_optional_complete:
+                # Check via routing function if more schemas
+                route = agent._route_after_special_optional(workflow_state)
+                if route == "next_schema":
+                    workflow_state = agent._extract_special_required_node(workflow_state)
+                else:
+                    workflow_state = agent._review_node(workflow_state)
+                
+        elif workflow_state.phase == WorkflowPhase.REVIEW or workflow_state.phase == WorkflowPhase.COMPLETE:
+            workflow_state.add_message("assistant", "Die Extraktion ist abgeschlossen. Sie können 'Neu starten' klicken für eine neue Extraktion.")
+    except LLMError as e:
+        # LLM unavailable (rate limit, timeout, circuit breaker) - keep state, let user retry
+        print(f"❌ LLM-Fehler: {e}")
+        workflow_state.add_message(
+            "assistant",
+            f"⚠️ Der KI-Dienst ist gerade nicht erreichbar ({type(e).__name__}). "
+            "Bitte senden Sie Ihre Nachricht in Kürze erneut."
+        )
     
     # Format outputs
     chat_history = format_chat_history(workflow_state.messages)
     intermediate = format_intermediate_results(workflow_state)
     json_preview = format_json_preview(workflow_state)
     
-    return chat_history, "", intermediate, json_preview
+    yield chat_history, "", intermediate, json_preview
 
 
 def reset_workflow():
@@ -270,7 +295,7 @@ with gr.Blocks(title="Metadaten-Extraktion Agent", theme=gr.themes.Soft(), css=c
     
     # Event handlers
     def send_message(msg, history):
-        return chat_interaction(msg, history)
+        yield from chat_interaction(msg, history)
     
     send_btn.click(
         fn=send_message,
@@ -4,8 +4,8 @@ import json
 import os
 from dotenv import load_dotenv
 from agent import MetadataAgent
-from models import WorkflowState
 from schema_loader import SchemaManager
+from instrumentation import start_metrics_server
 
 # Load environment
 load_dotenv()
@@ -14,6 +14,10 @@ load_dotenv()
 agent = MetadataAgent()
 schema_manager = SchemaManager()
 
+# Optional Prometheus endpoint (/metrics)
+if os.getenv("METRICS_PORT"):
+    start_metrics_server(int(os.getenv("METRICS_PORT")))
+
 # Get available content types (exclude core.json)
 available_schemas = schema_manager.get_available_special_schemas()
 content_type_choices = ["Automatisch"] + list(available_schemas.keys())
@@ -37,55 +41,21 @@ def extract_metadata(text: str, content_type: str) -> tuple:
         return "", "⚠️ Bitte Text eingeben"
     
     try:
-        state = WorkflowState()
-        state.add_message("user", text)
-        
-        # Phase 1: Init
-        state = agent._init_node(state)
-        
-        # Phase 2: Core Required
-        state = agent._extract_core_required_node(state)
-        state.core_required_complete = True
-        
-        # Phase 3: Core Optional
-        state = agent._extract_core_optional_node(state)
-        state.core_optional_complete = True
-        
-        # Phase 4: Schema Detection
         if content_type == "Automatisch":
-            # Automatic detection
-            state = agent._suggest_special_schemas_node(state)
+            # Automatic detection (runs in parallel with the core phases)
+            state = agent.run_headless(text)
             if state.selected_content_types:
-                state.selected_content_types = state.selected_content_types[:1]
-                state.special_schemas = state.special_schemas[:1]
                 detected_type = state.selected_content_types[0]
                 status_msg = f"🔍 Erkannte Inhaltsart: **{detected_type}**"
             else:
                 status_msg = "✅ Nur Core-Felder extrahiert (keine Inhaltsart erkannt)"
-            state.special_schema_confirmed = True
         else:
             # Manual selection
-            schema_file = schema_file_map.get(content_type)
-            if schema_file:
-                state.selected_content_types = [content_type]
-                state.special_schemas = [schema_file]
-                state.special_schema_confirmed = True
+            if schema_file_map.get(content_type):
                 status_msg = f"📋 Gewählte Inhaltsart: **{content_type}**"
             else:
                 status_msg = f"⚠️ Schema für '{content_type}' nicht gefunden"
-        
-        # Phase 5: Special Schema Fields
-        if state.special_schemas:
-            # 5a: Required
-            state = agent._extract_special_required_node(state)
-            state.special_required_complete = True
-            
-            # 5b: Optional
-            state = agent._extract_special_optional_node(state)
-            state.special_optional_complete = True
-        
-        # Phase 6: Review
-        state = agent._review_node(state)
+            state = agent.run_headless(text, content_type=content_type)
         
         # Extract final metadata
         final_metadata = {k: v for k, v in state.metadata.items() if v and not k.startswith("_")}
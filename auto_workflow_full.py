@@ -1,9 +1,9 @@
 """Minimales Beispiel: Automatische Metadatenextraktion ohne Chat-UI."""
 import os
 import json
+import time
 from dotenv import load_dotenv
 from agent import MetadataAgent
-from models import WorkflowState
 
 # Load environment
 # Load all configuration from .env
@@ -26,7 +26,6 @@ def main():
     # Initialize Agent
     # ⚡ Alle Einstellungen werden aus .env geladen (OPENAI_API_KEY, OPENAI_MODEL, etc.)
     agent = MetadataAgent()
-    state = WorkflowState()
     
     print("📝 Eingabetext:")
     print("-" * 70)
@@ -34,19 +33,20 @@ def main():
     print("-" * 70)
     print()
     
-    # Add user input to state
-    state.add_message("user", TEXT)
-    
-    # === PHASE 1: INIT ===
-    print("⚙️  Phase 1: Initialisierung...")
-    state = agent._init_node(state)
-    print(f"✅ Core-Schema geladen: {len(state.field_status)} Felder\n")
-    
-    # === PHASE 2: CORE REQUIRED ===
-    print("📋 Phase 2: Core-Pflichtfelder extrahieren...")
-    state = agent._extract_core_required_node(state)
-    
-    # Show extracted required fields
+    # === EXTRAKTION ===
+    # Phase 2-4 (Core-Pflicht, Core-Optional, Schema-Erkennung) laufen parallel,
+    # danach Phase 5a/5b (Spezial-Pflicht, Spezial-Optional) parallel.
+    print("⚡ Extrahiere Metadaten (parallele Phasen)...")
+    start = time.perf_counter()
+    state = agent.run_headless(TEXT)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Extraktion abgeschlossen in {elapsed:.2f}s")
+    usage = agent.usage_stats
+    print(f"⚡ Prompt-Cache: {usage['cached_tokens']}/{usage['input_tokens']} Input-Tokens aus dem Cache "
+          f"({agent.prompt_cache_hit_rate():.0%})\n")
+    
+    # === CORE REQUIRED ===
+    print("📋 Core-Pflichtfelder:")
     for field_id in ["cclom:title", "cclom:general_description", "cclom:general_keyword"]:
         status = state.field_status.get(field_id)
         if status and status.is_filled:
@@ -56,79 +56,43 @@ def main():
             else:
                 value = str(value)[:60]
             print(f"   ✅ {status.field_label}: {value}...")
-    
-    state.core_required_complete = True
     print()
     
-    # === PHASE 3: CORE OPTIONAL ===
-    print("📋 Phase 3: Core-Optionale Felder extrahieren...")
-    state = agent._extract_core_optional_node(state)
-    
-    # Show some optional fields
+    # === CORE OPTIONAL ===
+    core_fields = {f.id for f in agent.schema_manager.get_fields("core.json")}
     optional_filled = [f for f in state.field_status.values() 
-                      if f.is_filled and not f.is_required]
-    print(f"   ✅ {len(optional_filled)} optionale Felder extrahiert")
+                      if f.is_filled and not f.is_required and f.field_id in core_fields]
+    print(f"📋 Core-Optionale Felder: {len(optional_filled)} extrahiert")
     for field in optional_filled[:3]:
         value = str(field.value)[:50]
         print(f"      • {field.field_label}: {value}...")
-    
-    state.core_optional_complete = True
     print()
     
-    # === PHASE 4: SPECIAL SCHEMA DETECTION ===
-    print("🔍 Phase 4: Spezial-Schema erkennen...")
-    state = agent._suggest_special_schemas_node(state)
-    
-    # ⚠️ WICHTIG: Nur das ERSTE erkannte Schema verwenden
+    # === SPECIAL SCHEMA ===
     if state.selected_content_types:
-        # Limitiere auf 1 Schema (falls mehrere erkannt wurden)
-        state.selected_content_types = state.selected_content_types[:1]
-        state.special_schemas = state.special_schemas[:1]
-        
-        print(f"   ✅ Erkannt: {state.selected_content_types[0]}")
+        print(f"🔍 Erkannt: {state.selected_content_types[0]}")
         print(f"   📋 Schema: {state.special_schemas[0]}")
-        state.special_schema_confirmed = True
-    else:
-        print("   ⚠️  Kein Spezial-Schema erkannt")
-        state.special_schema_confirmed = True
-    print()
-    
-    # === PHASE 5: SPECIAL SCHEMA FIELDS ===
-    if state.special_schemas:
-        print("📋 Phase 5: Spezial-Schema Felder extrahieren...")
         
-        # 5a: Special Required
-        state = agent._extract_special_required_node(state)
         special_required = [f for f in state.field_status.values() 
                            if f.is_filled and f.is_required and 
-                           not f.field_id.startswith("cclom:")]
-        
+                           f.field_id not in core_fields]
         if special_required:
             print(f"   ✅ {len(special_required)} Pflichtfelder:")
             for field in special_required:
                 value = str(field.value)[:50]
                 print(f"      • {field.field_label}: {value}...")
         
-        state.special_required_complete = True
-        
-        # 5b: Special Optional
-        state = agent._extract_special_optional_node(state)
         special_optional = [f for f in state.field_status.values() 
                            if f.is_filled and not f.is_required and 
-                           not f.field_id.startswith("cclom:")]
-        
+                           f.field_id not in core_fields]
         if special_optional:
             print(f"   ✅ {len(special_optional)} optionale Felder:")
             for field in special_optional[:3]:
                 value = str(field.value)[:50]
                 print(f"      • {field.field_label}: {value}...")
-        
-        state.special_optional_complete = True
-        print()
-    
-    # === PHASE 6: REVIEW ===
-    print("✅ Phase 6: Finalisierung...")
-    state = agent._review_node(state)
+    else:
+        print("⚠️  Kein Spezial-Schema erkannt")
+    print()
     
     # Count total fields
     total_filled = len([f for f in state.field_status.values() if f.is_filled])
@@ -3,7 +3,6 @@ import os
 import json
 from dotenv import load_dotenv
 from agent import MetadataAgent
-from models import WorkflowState
 
 # Load all configuration from .env
 load_dotenv()
@@ -19,41 +18,14 @@ def main():
     # ⚡ ULTRA-PERFORMANCE: Nur Pflichtfelder für maximale Geschwindigkeit
     # Alle Einstellungen werden aus .env geladen
     agent = MetadataAgent()
-    state = WorkflowState()
-    state.add_message("user", TEXT)
     
-    # Phase 1: Init
-    print("⚙️  Initialisierung...")
-    state = agent._init_node(state)
-    
-    # Phase 2: Nur Core Required (3 Felder)
-    print("📋 Core-Pflichtfelder extrahieren...")
-    state = agent._extract_core_required_node(state)
-    state.core_required_complete = True
-    
-    # Skip Phase 3 (Core Optional)
-    state.core_optional_complete = True
-    
-    # Phase 4: Schema Detection
-    print("🔍 Spezial-Schema erkennen...")
-    state = agent._suggest_special_schemas_node(state)
+    # Fused-Profil: Core-Pflichtfelder + Schema-Erkennung in EINEM LLM-Call,
+    # danach die Spezial-Pflichtfelder (keine optionalen Felder) - 2 Round-Trips
+    print("📋 Core-Pflichtfelder extrahieren + Spezial-Schema erkennen...")
+    state = agent.run_headless(TEXT, include_optional=False, profile="fused")
     if state.selected_content_types:
-        state.selected_content_types = state.selected_content_types[:1]
-        state.special_schemas = state.special_schemas[:1]
         print(f"   ✅ Erkannt: {state.selected_content_types[0]}")
-        state.special_schema_confirmed = True
-    else:
-        state.special_schema_confirmed = True
-    
-    # Phase 5: Nur Special Required (keine Optional)
-    if state.special_schemas:
-        print("📋 Spezial-Pflichtfelder extrahieren...")
-        state = agent._extract_special_required_node(state)
-        state.special_required_complete = True
-        state.special_optional_complete = True
-    
-    # Phase 6: Review
-    state = agent._review_node(state)
+        print("📋 Spezial-Pflichtfelder extrahiert")
     
     # Export
     final_metadata = {k: v for k, v in state.metadata.items() if v and not k.startswith("_")}
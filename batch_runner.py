@@ -0,0 +1,344 @@
+"""Offline bulk extraction via the OpenAI Batch API.
+
+Usage:
+    python batch_runner.py records.jsonl results.jsonl
+
+Each input line is {"id": ..., "text": ..., "content_type": optional} (or just a JSON string).
+The phases of all records run as two batches: core required/optional plus content
+type detection first, then the special schema phases of the detected types.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from agent import MetadataAgent
+from models import WorkflowState
+
+_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# Batch API limits per batch: requests and input file size
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    """Read input records from a JSONL file (id defaults to the line number)."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"text": record}
+            record.setdefault("id", str(line_no))
+            records.append(record)
+    return records
+
+
+def write_results(states: Dict[str, WorkflowState], path: str) -> None:
+    """Write one line per record with the filled metadata."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record_id, state in states.items():
+            metadata = {
+                k: v for k, v in state.metadata.items()
+                if v is not None and v != "" and v != [] and not k.startswith("_")
+            }
+            line = {"id": record_id, "content_types": state.selected_content_types, "metadata": metadata}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def response_output_text(body: Dict[str, Any]) -> str:
+    """Output text of a raw Responses / Chat Completions body as returned in batch results."""
+    if "choices" in body:
+        return body["choices"][0]["message"].get("content") or ""
+    parts = []
+    for item in body.get("output", []):
+        if item.get("type") == "message":
+            parts.extend(c.get("text", "") for c in item.get("content", []) if c.get("type") == "output_text")
+    return "".join(parts)
+
+
+class BatchRunner:
+    """Runs the headless workflow for many records through the Batch API.
+
+    Uses the same planning and merge steps as MetadataAgent.run_headless, so
+    every record ends up in the same WorkflowState a headless run would produce.
+    """
+    
+    def __init__(self, agent: MetadataAgent, client: Any = None, work_dir: str = "batch_runs",
+                 poll_interval: Optional[float] = None, completion_window: str = "24h",
+                 max_requests: int = MAX_BATCH_REQUESTS, max_bytes: int = MAX_BATCH_BYTES):
+        """
+        Args:
+            agent: Agent providing prompts, schemas and validation
+            client: Client with files/batches endpoints (default: agent.client; LocalBatchClient for offline runs)
+            work_dir: Directory for the request files
+            poll_interval: Seconds between status checks (default: from BATCH_POLL_INTERVAL env or 30)
+            completion_window: Batch API completion window
+            max_requests: Max requests per batch - larger stages are split into several batches
+            max_bytes: Max size of a batch request file
+        """
+        self.agent = agent
+        self.client = client or agent.client
+        self.work_dir = Path(work_dir)
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("BATCH_POLL_INTERVAL", 30))
+        self.completion_window = completion_window
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+    
+    @property
+    def endpoint(self) -> str:
+        return "/v1/responses" if self.agent.is_gpt5 else "/v1/chat/completions"
+    
+    def run(self, records: List[Dict[str, Any]], include_optional: bool = True) -> Dict[str, WorkflowState]:
+        """Extract metadata for all records. Returns the final state per record id."""
+        states = {str(r["id"]): self.agent._begin_headless(r["text"]) for r in records}
+        content_types = {str(r["id"]): r.get("content_type") for r in records}
+        
+        # Stage 1: core phases and content type detection
+        jobs = {
+            record_id: self.agent._plan_core_stage(state, content_types[record_id], include_optional)
+            for record_id, state in states.items()
+        }
+        results = self._run_stage("core", jobs)
+        for record_id, state in states.items():
+            self.agent._commit_core_stage(state, jobs[record_id], results.get(record_id, {}),
+                                          content_types[record_id], include_optional)
+        
+        # Stage 2: special schema phases, chained on the detected content types
+        jobs = {
+            record_id: self.agent._plan_special_stage(state, include_optional)
+            for record_id, state in states.items()
+        }
+        results = self._run_stage("special", jobs)
+        for record_id, state in states.items():
+            self.agent._commit_special_stage(state, jobs[record_id], results.get(record_id, {}), include_optional)
+            states[record_id] = self.agent._review_node(state)
+        
+        return states
+    
+    def _split(self, lines: List[bytes]) -> List[List[bytes]]:
+        """Split serialized request lines into parts within max_requests and max_bytes."""
+        parts: List[List[bytes]] = []
+        size = 0
+        for line in lines:
+            if len(line) > self.max_bytes:
+                print(f"⚠️ Request mit {len(line)} Bytes überschreitet das Batch-Limit. Überspringe...")
+                continue
+            if not parts or len(parts[-1]) >= self.max_requests or size + len(line) > self.max_bytes:
+                parts.append([])
+                size = 0
+            parts[-1].append(line)
+            size += len(line)
+        return parts
+    
+    def _run_stage(self, stage: str, jobs: Dict[str, Dict[str, tuple]]) -> Dict[str, Dict[str, Any]]:
+        """Run the jobs of all records as batches within the Batch API limits.
+        
+        All batches of the stage are submitted before waiting, so they run in parallel.
+        Returns results per record id and job name, merged by custom_id. A job of a long
+        document or a large field list has several requests (per chunk and shard).
+        """
+        lines = []
+        index = {}
+        outputs: Dict[tuple, List[Optional[str]]] = {}
+        # Rule pre-extraction runs once per job; only the remaining fields are requested
+        split_jobs = {}
+        for record_id, record_jobs in jobs.items():
+            for name, job in record_jobs.items():
+                split_jobs[(record_id, name)] = self.agent._split_rule_values(job)
+                bodies = self.agent._build_job_requests(split_jobs[(record_id, name)][0])
+                outputs[(record_id, name)] = [None] * len(bodies)
+                for part, body in enumerate(bodies):
+                    custom_id = f"{stage}-{len(lines)}"
+                    index[custom_id] = (record_id, name, part)
+                    lines.append({
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": self.endpoint,
+                        "body": body
+                    })
+        
+        parts = self._split([(json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8") for line in lines])
+        if parts:
+            self.work_dir.mkdir(parents=True, exist_ok=True)
+        batch_ids = []
+        for number, part in enumerate(parts, 1):
+            input_path = self.work_dir / (f"{stage}_requests.jsonl" if len(parts) == 1 else f"{stage}_requests_{number}.jsonl")
+            with open(input_path, "wb") as f:
+                f.writelines(part)
+            batch_ids.append(self.submit(input_path, len(part)))
+        
+        failed = 0
+        for batch_id in batch_ids:
+            batch = self.wait(batch_id)
+            # Requests that failed end up in the error file; a batch that failed as a whole has neither file
+            for line in self._read_file(batch.output_file_id) + self._read_file(batch.error_file_id):
+                record_id, name, part = index[line["custom_id"]]
+                response = line.get("response") or {}
+                if line.get("error") or response.get("status_code") != 200:
+                    failed += 1
+                    continue
+                outputs[(record_id, name)][part] = response_output_text(response["body"])
+        
+        # A job keeps the answers of its successful requests and its rule values; without both it has no result
+        results: Dict[str, Dict[str, Any]] = {}
+        for (record_id, name), output_texts in outputs.items():
+            job, values = split_jobs[(record_id, name)]
+            answered = any(output_text is not None for output_text in output_texts)
+            if answered or values is not None:
+                result = self.agent._parse_job_outputs(job, output_texts) if answered else None
+                results.setdefault(record_id, {})[name] = self.agent._with_rule_values(job, result, values)
+        
+        missing = sum(output_texts.count(None) for output_texts in outputs.values())
+        if missing:
+            print(f"⚠️ Stage {stage}: {missing} von {len(lines)} Requests ohne Ergebnis ({failed} fehlgeschlagen)")
+        return results
+    
+    def submit(self, input_path: Path, request_count: int) -> str:
+        """Upload a request file and create the batch. Returns the batch id."""
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.endpoint,
+            completion_window=self.completion_window
+        )
+        print(f"📤 Batch {batch.id} eingereicht ({request_count} Requests)")
+        return batch.id
+    
+    def wait(self, batch_id: str) -> Any:
+        """Poll until the batch is finished. Returns the final batch (possibly without output file)."""
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in _FINAL_STATUSES:
+                break
+            counts = batch.request_counts
+            if counts is not None:
+                print(f"⏳ Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total})")
+            time.sleep(self.poll_interval)
+        
+        print(f"📥 Batch {batch_id}: {batch.status}")
+        if not batch.output_file_id:
+            print(f"⚠️ Batch {batch_id} ohne Ergebnisdatei beendet (Status: {batch.status})")
+        return batch
+    
+    def _read_file(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        content = self.client.files.content(file_id).text
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+class LocalBatchClient:
+    """Local stand-in for the files/batches endpoints of the OpenAI client.
+
+    A batch is executed line by line when it is created: responder(url, body)
+    returns the response body. Use a rule-based responder to test the runner
+    offline, or forward_to(client) to run batches against an endpoint without
+    Batch API (e.g. a local OpenAI-compatible server).
+    """
+    
+    def __init__(self, responder: Callable[[str, Dict[str, Any]], Dict[str, Any]]):
+        self.responder = responder
+        self._files: Dict[str, str] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+    
+    @staticmethod
+    def forward_to(client: Any) -> Callable[[str, Dict[str, Any]], Dict[str, Any]]:
+        """Responder that sends each request to a regular OpenAI client."""
+        def responder(url: str, body: Dict[str, Any]) -> Dict[str, Any]:
+            create = client.responses.create if url.endswith("/responses") else client.chat.completions.create
+            return create(**body).model_dump()
+        return responder
+    
+    def _create_file(self, file: Any, purpose: str) -> SimpleNamespace:
+        content = file.read()
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self._files[file_id] = content
+        return SimpleNamespace(id=file_id, purpose=purpose)
+    
+    def _file_content(self, file_id: str) -> SimpleNamespace:
+        return SimpleNamespace(text=self._files[file_id])
+    
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str) -> SimpleNamespace:
+        output, errors = [], []
+        for line in self._files[input_file_id].splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            try:
+                body = self.responder(request["url"], request["body"])
+                output.append({
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": body},
+                    "error": None
+                })
+            except Exception as e:
+                errors.append({
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": None,
+                    "error": {"code": type(e).__name__, "message": str(e)}
+                })
+        
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch = SimpleNamespace(
+            id=batch_id,
+            status="completed",
+            endpoint=endpoint,
+            input_file_id=input_file_id,
+            output_file_id=self._store_lines(output),
+            error_file_id=self._store_lines(errors),
+            request_counts=SimpleNamespace(total=len(output) + len(errors), completed=len(output), failed=len(errors))
+        )
+        self._batches[batch_id] = batch
+        return batch
+    
+    def _retrieve_batch(self, batch_id: str) -> SimpleNamespace:
+        return self._batches[batch_id]
+    
+    def _store_lines(self, lines: List[Dict[str, Any]]) -> Optional[str]:
+        if not lines:
+            return None
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self._files[file_id] = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+        return file_id
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Metadatenextraktion für viele Datensätze über die Batch API")
+    parser.add_argument("input", help="JSONL mit {\"id\", \"text\"} pro Zeile")
+    parser.add_argument("output", help="JSONL-Datei für die Ergebnisse")
+    parser.add_argument("--required-only", action="store_true", help="Nur Pflichtfelder extrahieren")
+    parser.add_argument("--local", action="store_true",
+                        help="Batches lokal über den normalen Endpunkt ausführen (ohne Batch API)")
+    parser.add_argument("--work-dir", default="batch_runs", help="Verzeichnis für die Request-Dateien")
+    args = parser.parse_args()
+    
+    agent = MetadataAgent()
+    client = LocalBatchClient(LocalBatchClient.forward_to(agent.client)) if args.local else None
+    runner = BatchRunner(agent, client=client, work_dir=args.work_dir)
+    
+    records = read_records(args.input)
+    print(f"📄 {len(records)} Datensätze aus {args.input}")
+    states = runner.run(records, include_optional=not args.required_only)
+    write_results(states, args.output)
+    print(f"💾 Ergebnisse gespeichert in: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
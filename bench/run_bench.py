@@ -0,0 +1,246 @@
+"""Throughput benchmark: full extraction workflow over a text corpus with a replayed or simulated LLM.
+
+Usage:
+    python bench/run_bench.py                                      # fake model, fixed 50ms per call
+    python bench/run_bench.py --latency lognormal:1.0,0.5 --concurrency 1,4,16
+    python bench/run_bench.py --transport replay --cassette cassettes/bench.json --latency recorded
+    python bench/run_bench.py --compare bench/results/<older run>.json
+
+Reports per-phase latency percentiles, LLM calls and tokens per record,
+records/second per concurrency level and peak RSS. Every run is written
+as JSON to bench/results/ so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from agent import MetadataAgent  # noqa: E402
+from batch_runner import read_records  # noqa: E402
+from compare_performance import percentile, run_sequential  # noqa: E402
+from llm_transport import FakeModelTransport, LatencyModel, RecordReplayTransport  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where not available)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def distribution(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {
+        "mean": statistics.mean(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+    }
+
+
+def make_agent(args: argparse.Namespace) -> MetadataAgent:
+    latency = LatencyModel(args.latency, seed=args.seed)
+    if args.transport == "replay":
+        transport = RecordReplayTransport(args.cassette, mode="replay", latency=latency)
+    else:
+        transport = FakeModelTransport(latency)
+    agent = MetadataAgent(transport=transport)
+    agent.cache = None  # Every record has to reach the (simulated) LLM
+    return agent
+
+
+def process_record(agent: MetadataAgent, record: Dict[str, Any], workflow: str, profile: str = "phased",
+                   speculative_k: int = 0) -> Dict[str, Any]:
+    """Run one record like auto_workflow_full.py / app_minimal.extract_metadata and collect its measurements."""
+    start = time.perf_counter()
+    try:
+        if workflow == "sequential":
+            state = run_sequential(agent, record["text"])
+        else:
+            state = agent.run_headless(record["text"], content_type=record.get("content_type"), profile=profile,
+                                       speculative_k=speculative_k)
+    except Exception as e:
+        return {"id": record["id"], "error": f"{type(e).__name__}: {e}", "duration": time.perf_counter() - start}
+    
+    llm = state.performance.llm_totals()
+    return {
+        "id": record["id"],
+        "error": None,
+        "duration": time.perf_counter() - start,
+        "llm_calls": llm["calls"],
+        "input_tokens": llm["input_tokens"],
+        "output_tokens": llm["output_tokens"],
+        "cached_tokens": llm["cached_tokens"],
+        "phases": {
+            name: entry["duration"] for name, entry in state.performance.summary().items()
+            if entry["kind"] in ("node", "stage", "job")
+        },
+    }
+
+
+def run_level(agent: MetadataAgent, records: List[Dict[str, Any]], concurrency: int, workflow: str,
+              profile: str = "phased", speculative_k: int = 0) -> Dict[str, Any]:
+    """Process all records with the given number of concurrent workflows."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda r: process_record(agent, r, workflow, profile, speculative_k), records))
+    wall_time = time.perf_counter() - start
+    
+    ok = [r for r in results if r["error"] is None]
+    phases: Dict[str, List[float]] = {}
+    for result in ok:
+        for name, duration in result["phases"].items():
+            phases.setdefault(name, []).append(duration)
+    per_record = lambda key: statistics.mean(r[key] for r in ok) if ok else 0.0  # noqa: E731
+    
+    return {
+        "concurrency": concurrency,
+        "records": len(results),
+        "errors": [{"id": r["id"], "error": r["error"]} for r in results if r["error"]],
+        "wall_time": wall_time,
+        "records_per_second": len(ok) / wall_time if wall_time else 0.0,
+        "record_latency": distribution([r["duration"] for r in ok]),
+        "phases": {name: distribution(values) for name, values in phases.items()},
+        "llm_calls_per_record": per_record("llm_calls"),
+        "input_tokens_per_record": per_record("input_tokens"),
+        "output_tokens_per_record": per_record("output_tokens"),
+        "cached_tokens_per_record": per_record("cached_tokens"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    latency = level["record_latency"]
+    print(f"\n⚡ Concurrency {level['concurrency']}: {level['records_per_second']:.2f} Datensätze/s "
+          f"({level['records']} in {level['wall_time']:.2f}s, {len(level['errors'])} Fehler)")
+    for error in level["errors"][:3]:
+        print(f"   ❌ {error['id']}: {error['error']}")
+    if latency:
+        print(f"   Datensatz: p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  p99 {latency['p99']:.2f}s")
+    for name, values in level["phases"].items():
+        print(f"   {name:32s}: p50 {values['p50']:6.2f}s  p95 {values['p95']:6.2f}s  p99 {values['p99']:6.2f}s")
+    print(f"   Pro Datensatz: {level['llm_calls_per_record']:.1f} LLM-Calls, "
+          f"{level['input_tokens_per_record']:.0f} Input-Tokens ({level['cached_tokens_per_record']:.0f} cached), "
+          f"{level['output_tokens_per_record']:.0f} Output-Tokens")
+    if level["peak_rss_mb"] is not None:
+        print(f"   Peak RSS: {level['peak_rss_mb']:.1f} MB")
+
+
+def print_comparison(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    print(f"\n📊 Vergleich mit {previous['meta'].get('commit')} ({previous['meta'].get('timestamp')})")
+    old_levels = {level["concurrency"]: level for level in previous["levels"]}
+    for level in current["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        throughput = level["records_per_second"] / old["records_per_second"] - 1 if old["records_per_second"] else 0.0
+        old_p50 = old["record_latency"].get("p50", 0.0)
+        p50 = level["record_latency"].get("p50", 0.0)
+        latency = p50 / old_p50 - 1 if old_p50 else 0.0
+        print(f"   Concurrency {level['concurrency']:3d}: Durchsatz {throughput:+7.1%}  p50 {latency:+7.1%}  "
+              f"LLM-Calls {level['llm_calls_per_record'] - old['llm_calls_per_record']:+.1f}/Datensatz")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durchsatz-Benchmark der Extraktions-Pipeline")
+    parser.add_argument("--corpus", default=os.path.join(BENCH_DIR, "corpus.jsonl"), help="JSONL mit {\"id\", \"text\"}")
+    parser.add_argument("--transport", choices=["fake", "replay"], default="fake", help="Simuliertes oder aufgezeichnetes LLM")
+    parser.add_argument("--cassette", default="cassettes/llm.json", help="Cassette für --transport replay")
+    parser.add_argument("--latency", default="fixed:0.05", help="Latenz pro LLM-Call (siehe LatencyModel)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed für zufällige Latenzen")
+    parser.add_argument("--concurrency", default="1,4,8", help="Parallel laufende Workflows, kommagetrennt")
+    parser.add_argument("--repeat", type=int, default=1, help="Korpus n-mal durchlaufen")
+    parser.add_argument("--workflow", choices=["headless", "sequential"], default="headless",
+                        help="run_headless (parallele Phasen) oder Phasen nacheinander")
+    parser.add_argument("--profile", choices=["phased", "fused"], default="phased",
+                        help="Headless-Profil: ein Call pro Phase oder ein Call pro Stufe")
+    parser.add_argument("--speculative-k", type=int, default=0,
+                        help="Spezialschemata der k wahrscheinlichsten Inhaltsarten spekulativ extrahieren")
+    parser.add_argument("--output", help="JSON-Datei (Standard: bench/results/<Zeit>-<Commit>.json)")
+    parser.add_argument("--compare", help="Früheres Ergebnis-JSON zum Vergleich")
+    args = parser.parse_args()
+    
+    # Paths are relative to the caller, the schemas are loaded relative to the repository root
+    for name in ("corpus", "cassette", "output", "compare"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    os.chdir(ROOT_DIR)
+    
+    records = read_records(args.corpus) * args.repeat
+    agent = make_agent(args)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    
+    print("=" * 70)
+    print(f"🏁 Benchmark: {len(records)} Datensätze, Transport {args.transport} ({args.latency}), "
+          f"Workflow {args.workflow}, Profil {args.profile}")
+    print("=" * 70)
+    
+    process_record(agent, records[0], args.workflow, args.profile, args.speculative_k)  # Warm-up: schemas, prompt prefixes, response schemas
+    
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": agent.model,
+            "transport": args.transport,
+            "latency": args.latency,
+            "seed": args.seed,
+            "workflow": args.workflow,
+            "profile": args.profile,
+            "speculative_k": args.speculative_k,
+            "corpus": os.path.relpath(args.corpus, ROOT_DIR),
+            "records": len(records),
+        },
+        "levels": [],
+    }
+    for concurrency in levels:
+        level = run_level(agent, records, concurrency, args.workflow, args.profile, args.speculative_k)
+        print_level(level)
+        report["levels"].append(level)
+    
+    output = args.output
+    if not output:
+        os.makedirs(os.path.join(BENCH_DIR, "results"), exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(BENCH_DIR, "results", f"{stamp}-{report['meta']['commit'] or 'nogit'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Ergebnis gespeichert in: {output}")
+    
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Microbenchmark: normalize_metadata + validate_metadata over bulk records of all schemas.
+
+Usage:
+    python bench/validation_bench.py                     # 2000 records per schema
+    python bench/validation_bench.py --records 10000 --repeat 7
+    python bench/validation_bench.py --batch             # validate_metadata per record vs. validate_batch
+
+Records are generated from the schemas (examples, vocabulary labels in varied
+spelling, padded whitespace, numbers), so every normalization and validation
+rule is exercised. Reports the best of --repeat runs in µs per record.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from schema_loader import Field, SchemaManager  # noqa: E402
+from validator import MetadataValidator  # noqa: E402
+
+
+def sample_value(field: Field, rng: random.Random) -> Any:
+    """A plausible, often slightly messy value for the field."""
+    concepts = field.get_vocabulary_concepts()
+    if concepts:
+        concept = rng.choice(concepts)
+        terms = [concept.get("label", "")] + concept.get("altLabels", [])
+        term = rng.choice(terms)
+        value = rng.choice([term, term.lower(), f" {term} "])
+    elif field.datatype in ("number", "integer"):
+        value = rng.choice([rng.randint(0, 500), rng.uniform(0, 5), -1])
+    else:
+        examples = [e for e in field.prompt.get("examples", []) if isinstance(e, str)]
+        value = rng.choice(examples) if examples else f"Beispiel {rng.randint(1, 99)}"
+        value = rng.choice([value, f"  {value}  ", value.upper(), value.replace(" ", "   ")])
+    if field.multiple:
+        return [value, value] if rng.random() < 0.3 else [value]
+    return value
+
+
+def make_records(fields: List[Field], count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [{f.id: sample_value(f, rng) for f in fields if rng.random() < 0.7} for _ in range(count)]
+
+
+def measure(validator: MetadataValidator, records: List[Dict[str, Any]], fields: List[Field], repeat: int) -> float:
+    """Best of repeat runs, in µs per record."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record in records:
+            validator.validate_metadata(validator.normalize_metadata(record, fields), fields)
+        best = min(best, time.perf_counter() - start)
+    return best / len(records) * 1e6
+
+
+def measure_batch(validator: MetadataValidator, records: List[Dict[str, Any]], fields: List[Field],
+                  repeat: int) -> Tuple[float, float]:
+    """Validation of normalized records: validate_metadata per record vs. validate_batch, best of repeat, in µs per record."""
+    records = [validator.normalize_metadata(record, fields) for record in records]
+    per_record = batch = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record in records:
+            validator.validate_metadata(record, fields)
+        per_record = min(per_record, time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in validator.validate_batch(records, fields):
+            pass
+        batch = min(batch, time.perf_counter() - start)
+    return per_record / len(records) * 1e6, batch / len(records) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark der Normalisierung und Validierung")
+    parser.add_argument("--records", type=int, default=2000, help="Datensätze pro Schema")
+    parser.add_argument("--repeat", type=int, default=5, help="Durchläufe, der schnellste zählt")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch", action="store_true", help="Nur Validierung: pro Datensatz vs. validate_batch")
+    args = parser.parse_args()
+    os.chdir(ROOT_DIR)
+    
+    schema_manager = SchemaManager()
+    validator = MetadataValidator()
+    schemas = ["core.json"] + sorted(set(schema_manager.get_available_special_schemas().values()))
+    
+    if args.batch:
+        print(f"⏱️  validate_metadata pro Datensatz vs. validate_batch, {args.records} Datensätze pro Schema, best of {args.repeat}")
+        for schema_file in schemas:
+            fields = schema_manager.get_fields(schema_file)
+            if fields:
+                records = make_records(fields, args.records, args.seed)
+                per_record, batch = measure_batch(validator, records, fields, args.repeat)
+                print(f"   {schema_file:32s}: {per_record:6.1f} → {batch:6.1f} µs/Datensatz ({per_record / batch:.1f}x)")
+        return
+    
+    print(f"⏱️  normalize_metadata + validate_metadata, {args.records} Datensätze pro Schema, best of {args.repeat}")
+    total_time = total_records = 0.0
+    for schema_file in schemas:
+        fields = schema_manager.get_fields(schema_file)
+        if not fields:  # JSON-Schema style profiles have no field definitions
+            continue
+        records = make_records(fields, args.records, args.seed)
+        per_record = measure(validator, records, fields, args.repeat)
+        total_time += per_record * len(records)
+        total_records += len(records)
+        print(f"   {schema_file:32s}: {per_record:7.1f} µs/Datensatz ({len(fields)} Felder)")
+    print(f"   {'Gesamt':32s}: {total_time / total_records:7.1f} µs/Datensatz")
+
+
+if __name__ == "__main__":
+    main()
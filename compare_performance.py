@@ -0,0 +1,96 @@
+"""Performance-Messung: Zeit und Tokens pro Phase, sequenziell vs. parallel (headless)."""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from agent import MetadataAgent
+from auto_workflow_full import TEXT
+from instrumentation import metrics
+from models import WorkflowState
+
+load_dotenv()
+
+
+def run_sequential(agent: MetadataAgent, text: str) -> WorkflowState:
+    """All phases one after another - like the chat workflow with every phase confirmed."""
+    state = WorkflowState()
+    state.add_message("user", text)
+    state = agent._init_node(state)
+    state = agent._extract_core_required_node(state)
+    state.core_required_complete = True
+    state = agent._extract_core_optional_node(state)
+    state.core_optional_complete = True
+    state = agent._suggest_special_schemas_node(state)
+    state.selected_content_types = state.selected_content_types[:1]
+    state.special_schemas = state.special_schemas[:1]
+    state.special_schema_confirmed = True
+    state = agent._extract_special_required_node(state)
+    state.special_required_complete = True
+    state = agent._extract_special_optional_node(state)
+    return agent._review_node(state)
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def print_phase_table(durations: Dict[str, List[float]], total: float) -> None:
+    for name, values in durations.items():
+        mean = statistics.mean(values)
+        share = mean / total if total else 0.0
+        bar = "█" * int(share * 20)
+        print(f"   {name:32s}: {mean:6.2f}s  {bar:20s} {share:6.1%}  "
+              f"p50 {percentile(values, 0.5):5.2f}s  p95 {percentile(values, 0.95):5.2f}s")
+
+
+def measure(label: str, run, runs: int) -> List[float]:
+    print("=" * 70)
+    print(f"⏱️  {label} ({runs} Durchläufe)")
+    print("=" * 70)
+    
+    totals = []
+    durations: Dict[str, List[float]] = {}
+    last_state = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        last_state = run()
+        totals.append(time.perf_counter() - start)
+        for name, entry in last_state.performance.summary().items():
+            if entry["kind"] in ("node", "job"):
+                durations.setdefault(name, []).append(entry["duration"])
+    
+    print_phase_table(durations, statistics.mean(totals))
+    llm = last_state.performance.llm_totals()
+    print(f"\n   Gesamt: {statistics.mean(totals):.2f}s (p50 {percentile(totals, 0.5):.2f}s, p95 {percentile(totals, 0.95):.2f}s)")
+    print(f"   Letzter Durchlauf: {llm['calls']} LLM-Calls, {llm['input_tokens']} Input-Tokens "
+          f"({llm['cached_tokens']} cached), {llm['output_tokens']} Output-Tokens, {llm['retries']} Retries")
+    print()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeit und Tokens pro Phase messen")
+    parser.add_argument("--runs", type=int, default=1, help="Anzahl Durchläufe pro Variante")
+    parser.add_argument("--metrics", action="store_true", help="Prometheus-Metriken ausgeben")
+    args = parser.parse_args()
+    
+    agent = MetadataAgent()
+    agent.cache = None  # Measure real API calls, not the response cache
+    
+    sequential = measure("Sequenziell (Chat-Workflow)", lambda: run_sequential(agent, TEXT), args.runs)
+    parallel = measure("Parallel (run_headless)", lambda: agent.run_headless(TEXT), args.runs)
+    
+    speedup = statistics.mean(sequential) / statistics.mean(parallel)
+    print(f"⚡ Speedup parallel vs. sequenziell: {speedup:.1f}x")
+    
+    if args.metrics:
+        print()
+        print(metrics.render())
+
+
+if __name__ == "__main__":
+    main()
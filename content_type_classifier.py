@@ -0,0 +1,165 @@
+"""Local content type classifier (TF-IDF over word stems and character n-grams) - no LLM call."""
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from content_type_scoring import ContentTypeScorer, inverse_document_frequency, schema_terms, stem, words
+from schema_loader import SchemaManager
+
+_NGRAM = 4
+
+
+def features(text: str) -> Dict[str, int]:
+    """Counts of word stems ("w:tagung") and character 4-grams of the words ("<tag", "agun", ...)."""
+    counts: Dict[str, int] = {}
+    for word in words(text):
+        key = "w:" + stem(word)
+        counts[key] = counts.get(key, 0) + 1
+        padded = f"<{word}>"
+        for i in range(len(padded) - _NGRAM + 1):
+            gram = padded[i:i + _NGRAM]
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    """Labelled texts from a JSONL file with {"text", "content_type"} per line (e.g. a batch input file)."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if isinstance(record, dict) and record.get("content_type"):
+                    records.append(record)
+    return records
+
+
+class ContentTypeClassifier:
+    """Nearest-centroid classifier over TF-IDF weighted features.
+
+    Each content type is trained on the label and terms of its schema (the same
+    texts the ContentTypeScorer profiles) plus any labelled texts passed to learn().
+    predict() returns the best label with a confidence: a softmax over the cosine
+    similarities, sharpened by `scale`. DEFAULT_SCALE is only a starting point -
+    the confidence tracks the accuracy once calibrate() has fitted `scale` on
+    labelled texts (`calibrated`).
+    """
+    
+    DEFAULT_SCALE = 40.0
+    
+    def __init__(self, scorer: ContentTypeScorer, scale: float = DEFAULT_SCALE):
+        self.scorer = scorer
+        self.scale = scale
+        self.calibrated = False
+        self._history: Dict[str, Dict[str, int]] = {}  # label -> feature counts of labelled texts
+        # Model per set of available schemas: (labels, idf, feature -> [(label index, weight), ...])
+        self._models: Dict[Tuple[Tuple[str, str], ...], tuple] = {}
+    
+    @property
+    def schema_manager(self) -> SchemaManager:
+        return self.scorer.schema_manager
+    
+    def with_scorer(self, scorer: ContentTypeScorer) -> "ContentTypeClassifier":
+        """Classifier for another schema version (the scorer's) - shares the labelled texts and the calibration."""
+        classifier = ContentTypeClassifier(scorer, self.scale)
+        classifier.calibrated = self.calibrated
+        classifier._history = self._history
+        return classifier
+    
+    def _model(self, available_schemas: Dict[str, str]) -> tuple:
+        key = tuple(sorted(available_schemas.items()))
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        
+        labels = [label for label, _ in key]
+        documents = []
+        for label, schema_file in key:
+            counts = features(" ".join([label] + schema_terms(self.schema_manager, schema_file)))
+            for feature, count in self._history.get(label, {}).items():
+                counts[feature] = counts.get(feature, 0) + count
+            documents.append(counts)
+        
+        idf = inverse_document_frequency(documents)
+        
+        # Inverted index of the normalized centroids: one lookup per text feature
+        index: Dict[str, List[Tuple[int, float]]] = {}
+        for i, counts in enumerate(documents):
+            for feature, weight in self._vector(counts, idf).items():
+                index.setdefault(feature, []).append((i, weight))
+        
+        model = (labels, idf, index)
+        self._models[key] = model
+        return model
+    
+    @staticmethod
+    def _vector(counts: Dict[str, int], idf: Dict[str, float]) -> Dict[str, float]:
+        vector = {f: (1 + math.log(c)) * idf[f] for f, c in counts.items() if f in idf}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {f: w / norm for f, w in vector.items()}
+    
+    def similarities(self, text: str, available_schemas: Dict[str, str]) -> List[Tuple[str, float]]:
+        """Cosine similarity of the text to each content type, best first."""
+        labels, idf, index = self._model(available_schemas)
+        scores = [0.0] * len(labels)
+        for feature, weight in self._vector(features(text), idf).items():
+            for i, centroid_weight in index.get(feature, ()):
+                scores[i] += weight * centroid_weight
+        return sorted(zip(labels, scores), key=lambda item: -item[1])
+    
+    def _probabilities(self, similarities: List[Tuple[str, float]], scale: float) -> List[Tuple[str, float]]:
+        top = similarities[0][1]
+        exps = [(label, math.exp(scale * (score - top))) for label, score in similarities]
+        total = sum(e for _, e in exps)
+        return [(label, e / total) for label, e in exps]
+    
+    def predict(self, text: str, available_schemas: Dict[str, str]) -> Tuple[Optional[str], float]:
+        """(best label, confidence in [0, 1]); (None, 0.0) if the text has no signal."""
+        if not available_schemas:
+            return None, 0.0
+        similarities = self.similarities(text, available_schemas)
+        if similarities[0][1] <= 0:
+            return None, 0.0
+        return self._probabilities(similarities, self.scale)[0]
+    
+    def learn(self, records: List[Dict[str, Any]]) -> int:
+        """Add labelled texts ({"text", "content_type"}) to the training data. Returns the number used."""
+        used = 0
+        for record in records:
+            label, text = record.get("content_type"), record.get("text")
+            if not label or not text:
+                continue
+            history = self._history.setdefault(label, {})
+            for feature, count in features(text).items():
+                history[feature] = history.get(feature, 0) + count
+            used += 1
+        if used:
+            self._models.clear()
+        return used
+    
+    def calibrate(self, records: List[Dict[str, Any]], available_schemas: Dict[str, str]) -> float:
+        """Fit `scale` to labelled texts by minimizing their negative log-likelihood. Returns the new scale.
+
+        Call before learn() with the same records - otherwise the confidences are fitted
+        on texts the model was trained on and come out too high.
+        """
+        labelled = [(self.similarities(r["text"], available_schemas), r["content_type"])
+                    for r in records if r.get("content_type") in available_schemas and r.get("text")]
+        if not labelled:
+            return self.scale
+        
+        def loss(scale: float) -> float:
+            total = 0.0
+            for similarities, label in labelled:
+                probability = dict(self._probabilities(similarities, scale))[label]
+                total -= math.log(max(probability, 1e-12))
+            return total
+        
+        self.scale = min((2.0 ** (i / 2) for i in range(2, 17)), key=loss)  # 2 ... 256
+        self.calibrated = True
+        return self.scale
+    
+    def fit_history(self, records: List[Dict[str, Any]], available_schemas: Dict[str, str]) -> int:
+        """Calibrate on labelled texts, then learn from them. Returns the number of texts learned."""
+        self.calibrate(records, available_schemas)
+        return self.learn(records)
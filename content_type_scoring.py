@@ -0,0 +1,100 @@
+"""Cheap local pre-score of content types (special schemas) for a text - no LLM call."""
+import json
+import math
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from schema_loader import SchemaManager
+
+# Words shorter than this carry no signal (articles, prepositions, ...)
+_MIN_WORD_LENGTH = 4
+# German inflection/compounds: words are compared by their first characters ("Tagungen" ~ "Tagung")
+_STEM_LENGTH = 6
+
+
+def words(text: str) -> List[str]:
+    """Lowercased words that carry signal."""
+    return [w for w in re.findall(r"[a-zäöüß]+", text.lower()) if len(w) >= _MIN_WORD_LENGTH]
+
+
+def stem(word: str) -> str:
+    return word[:_STEM_LENGTH]
+
+
+def stems(text: str) -> List[str]:
+    return [stem(w) for w in words(text)]
+
+
+def schema_terms(schema_manager: SchemaManager, schema_file: str) -> List[str]:
+    """Texts describing a schema: title, description, group labels, field labels, descriptions, examples and concept labels."""
+    schema = schema_manager.load_schema(schema_file)
+    # Field-based profiles have groups and fields, JSON-Schema style files a title and description
+    terms = [str(schema.get(key, "")) for key in ("title", "description")]
+    terms.extend(group.get("label", "") for group in schema.get("groups", []))
+    for field in schema_manager.get_fields(schema_file):
+        terms.append(field.prompt.get("label", ""))
+        terms.append(field.prompt.get("description", ""))
+        terms.extend(example if isinstance(example, str) else json.dumps(example, ensure_ascii=False)
+                     for example in field.prompt.get("examples", []))
+        terms.extend(concept.get("label", "") for concept in field.get_vocabulary_concepts())
+    return terms
+
+
+def inverse_document_frequency(documents: Iterable[Iterable[str]]) -> Dict[str, float]:
+    """idf = log(1 + N / df) of every term of the documents (terms of a document counted once)."""
+    document_frequency: Dict[str, int] = {}
+    total = 0
+    for document in documents:
+        total += 1
+        for term in set(document):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    return {term: math.log(1 + total / count) for term, count in document_frequency.items()}
+
+
+class ContentTypeScorer:
+    """Ranks content types by the overlap of the text with the vocabulary of their schema files.
+
+    The profile of a special schema consists of its content type label and the
+    terms of its schema file (see schema_terms). Terms that occur
+    in many schemas (e.g. "name", "beschreibung") are down-weighted (idf), and
+    scores are normalized by profile size so large schemas do not win by default.
+    """
+    
+    LABEL_WEIGHT = 3.0
+    
+    def __init__(self, schema_manager: SchemaManager):
+        self.schema_manager = schema_manager
+        self._profiles: Dict[str, Dict[str, float]] = {}  # schema file -> stem -> weight
+        self._idf: Dict[Tuple[str, ...], Dict[str, float]] = {}
+    
+    def _profile(self, label: str, schema_file: str) -> Dict[str, float]:
+        profile = self._profiles.get(schema_file)
+        if profile is not None:
+            return profile
+        
+        profile = {s: self.LABEL_WEIGHT for s in stems(label)}
+        for s in stems(" ".join(schema_terms(self.schema_manager, schema_file))):
+            profile.setdefault(s, 1.0)
+        
+        self._profiles[schema_file] = profile
+        return profile
+    
+    def _inverse_document_frequency(self, available_schemas: Dict[str, str]) -> Dict[str, float]:
+        key = tuple(sorted(available_schemas.values()))
+        idf = self._idf.get(key)
+        if idf is None:
+            idf = inverse_document_frequency(self._profile(label, schema_file)
+                                             for label, schema_file in available_schemas.items())
+            self._idf[key] = idf
+        return idf
+    
+    def rank(self, text: str, available_schemas: Dict[str, str]) -> List[Tuple[str, float]]:
+        """Content type labels with their score, best first (labels without signal score 0)."""
+        idf = self._inverse_document_frequency(available_schemas)
+        text_stems = set(stems(text))
+        scores = []
+        for label, schema_file in available_schemas.items():
+            profile = self._profile(label, schema_file)
+            score = sum(weight * idf[s] for s, weight in profile.items() if s in text_stems)
+            scores.append((label, score / math.log(len(profile) + 2)))
+        return sorted(scores, key=lambda item: -item[1])
@@ -0,0 +1,166 @@
+"""Latency/token instrumentation: spans per node and LLM call, Prometheus export."""
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+from models import PerformanceReport, Span
+
+# Report of the running workflow and innermost open span (task/thread local)
+_current_report: ContextVar[Optional[PerformanceReport]] = ContextVar("performance_report", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("performance_span", default=None)
+
+
+@contextmanager
+def recording(report: PerformanceReport) -> Iterator[PerformanceReport]:
+    """Record all spans opened in this context into report."""
+    token = _current_report.set(report)
+    try:
+        yield report
+    finally:
+        _current_report.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: str) -> Iterator[Span]:
+    """Time a block. The span is added to the current report and the metrics registry."""
+    parent = _current_span.get()
+    current = Span(name=name, kind=kind, parent=parent.name if parent else None, start=time.time())
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        report = _current_report.get()
+        if report is not None:
+            report.spans.append(current)
+        metrics.observe(current)
+
+
+def record_span(report: Optional[PerformanceReport], finished: Span) -> None:
+    """Add a span that was timed without span() (e.g. inside a generator) - to the metrics only if report is None."""
+    if report is not None:
+        report.spans.append(finished)
+    metrics.observe(finished)
+
+
+def add_validation_warnings(count: int) -> None:
+    """Count validation warnings on the innermost open span."""
+    current = _current_span.get()
+    if current is not None and count:
+        current.validation_warnings += count
+
+
+def instrument_node(func):
+    """Decorator for workflow nodes (sync or async): records a node span into state.performance."""
+    name = func.__name__.lstrip("_")
+    
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(self, state, *args, **kwargs):
+            with recording(state.performance), span(name, "node"):
+                return await func(self, state, *args, **kwargs)
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(self, state, *args, **kwargs):
+        with recording(state.performance), span(name, "node"):
+            return func(self, state, *args, **kwargs)
+    return wrapper
+
+
+class MetricsRegistry:
+    """Process-wide aggregates of all spans in Prometheus text format."""
+    
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations: Dict[Tuple[str, str, str], list] = {}  # (kind, name, parent) -> [bucket counts..., sum, count]
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+    
+    def observe(self, span: Span) -> None:
+        labels = (span.kind, span.name, span.parent or "")
+        with self._lock:
+            histogram = self._durations.setdefault(labels, [0] * len(self.BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(self.BUCKETS):
+                if span.duration <= bound:
+                    histogram[i] += 1
+            histogram[-2] += span.duration
+            histogram[-1] += 1
+            
+            label_pairs = (("kind", span.kind), ("name", span.name), ("parent", span.parent or ""))
+            for token_type in ("input", "output", "cached"):
+                self._inc("tokens_total", label_pairs + (("type", token_type),), getattr(span, f"{token_type}_tokens"))
+            self._inc("retries_total", label_pairs, span.retries)
+            self._inc("validation_warnings_total", label_pairs, span.validation_warnings)
+            self._inc("cache_hits_total", label_pairs, int(span.cache_hit))
+            self._inc("errors_total", label_pairs, int(span.error is not None))
+    
+    def _inc(self, metric: str, labels: Tuple[Tuple[str, str], ...], value: float) -> None:
+        if value:
+            key = (metric, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def render(self) -> str:
+        """Prometheus/OpenMetrics text exposition."""
+        lines = [
+            "# HELP metadata_agent_span_duration_seconds Duration of workflow nodes, stages, jobs and LLM calls",
+            "# TYPE metadata_agent_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name, parent), histogram in sorted(self._durations.items()):
+                labels = f'kind="{kind}",name="{name}",parent="{parent}"'
+                for bound, count in zip(self.BUCKETS, histogram):
+                    lines.append(f'metadata_agent_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'metadata_agent_span_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-1]}')
+                lines.append(f"metadata_agent_span_duration_seconds_sum{{{labels}}} {histogram[-2]:.6f}")
+                lines.append(f"metadata_agent_span_duration_seconds_count{{{labels}}} {histogram[-1]}")
+            
+            for metric in sorted({metric for metric, _ in self._counters}):
+                lines.append(f"# TYPE metadata_agent_{metric} counter")
+                for (name, labels), value in sorted(self._counters.items()):
+                    if name == metric:
+                        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                        lines.append(f"metadata_agent_{metric}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics for Prometheus in a background thread."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Prometheus-Metriken unter http://{host}:{port}/metrics")
+    return server
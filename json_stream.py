@@ -0,0 +1,144 @@
+"""Incremental JSON parsing for streamed LLM output."""
+import json
+from typing import Any, Dict, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONObjectParser:
+    """Parses a streamed JSON object and emits each top-level member as soon as its value is complete.
+
+    Text before the opening brace (e.g. a "```json" fence or prose) is skipped.
+    Every character is scanned only once, no matter how the output is split into chunks.
+
+    Example:
+        parser = IncrementalJSONObjectParser()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+
+        # Scanner state
+        self._depth = 0  # Nesting depth (1 = inside the top-level object)
+        self._in_string = False
+        self._escape = False
+
+        # Current member
+        self._expect = "key"  # "key", "key_string", "colon", "value", "value_*", "comma"
+        self._key_start = -1
+        self._key = None
+        self._value_start = -1
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add text and return the members completed by it as (key, value) pairs."""
+        if self.done or not chunk:
+            return []
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+
+        while self._pos < len(buffer) and not self.done:
+            i = self._pos
+            ch = buffer[i]
+            self._pos += 1
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key_string":
+                        self._key = json.loads(buffer[self._key_start:i + 1])
+                        self._expect = "colon"
+                    elif self._depth == 1 and self._expect == "value_string":
+                        completed.append(self._finish_value(buffer[self._value_start:i + 1]))
+                        self._expect = "comma"
+                continue
+
+            if self._depth == 1:
+                # Top level of the object: keys, colons, commas and the start/end of values
+                if self._expect == "value_scalar":
+                    # Numbers, true/false/null end at the next comma or closing brace
+                    if ch in ",}":
+                        completed.append(self._finish_value(buffer[self._value_start:i].strip()))
+                        if ch == "}":
+                            self.done = True
+                    continue
+
+                if ch in _WHITESPACE:
+                    continue
+                if self._expect == "key":
+                    if ch == '"':
+                        self._in_string = True
+                        self._key_start = i
+                        self._expect = "key_string"
+                    elif ch == "}":
+                        self.done = True
+                elif self._expect == "colon":
+                    if ch == ":":
+                        self._expect = "value"
+                elif self._expect == "value":
+                    self._value_start = i
+                    if ch in "{[":
+                        self._depth += 1
+                        self._expect = "value_nested"
+                    elif ch == '"':
+                        self._in_string = True
+                        self._expect = "value_string"
+                    else:
+                        self._expect = "value_scalar"
+                elif self._expect == "comma":
+                    if ch == ",":
+                        self._expect = "key"
+                    elif ch == "}":
+                        self.done = True
+                continue
+
+            # Inside a nested value
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    completed.append(self._finish_value(buffer[self._value_start:i + 1]))
+                    self._expect = "comma"
+
+        return completed
+
+    def _finish_value(self, raw: str) -> Tuple[str, Any]:
+        """Decode a complete member value and reset for the next member."""
+        key = self._key
+        self._key = None
+        self._expect = "key"
+        return key, json.loads(raw)
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """Parse the first JSON object in text (surrounding prose is ignored).
+
+    Raises:
+        ValueError: If no complete JSON object is found
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("Kein JSON-Objekt in der Antwort gefunden")
+    value, _ = json.JSONDecoder().raw_decode(text, start)
+    if not isinstance(value, dict):
+        raise ValueError("Antwort ist kein JSON-Objekt")
+    return value
@@ -0,0 +1,146 @@
+"""Persistent cache for LLM responses (in-memory LRU + SQLite)."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+class LLMResponseCache:
+    """Two-level cache for LLM responses.
+
+    Entries are keyed by model, reasoning effort, verbosity and a hash of the
+    prompt. Lookups hit the in-memory LRU first, then the SQLite backend.
+    Both levels evict by size; entries older than the TTL are treated as misses.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, memory_entries: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file (default: from LLM_CACHE_PATH env or ".llm_cache.sqlite"; "" = memory only)
+            ttl: Time to live in seconds (default: from LLM_CACHE_TTL env or 7 days; 0 = no expiry)
+            max_entries: Max entries on disk (default: from LLM_CACHE_MAX_ENTRIES env or 10000)
+            memory_entries: Max entries in the in-memory LRU (default: from LLM_CACHE_MEMORY_ENTRIES env or 1000)
+        """
+        self.path = path if path is not None else os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite")
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+        self.memory_entries = memory_entries if memory_entries is not None else int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 1000))
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._db = None
+        if self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, reasoning_effort: Optional[str], verbosity: Optional[str],
+                 prompt: str, extra: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from the request parameters.
+
+        Args:
+            extra: Further request options that change the answer (e.g. response format)
+        """
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8"))
+        if extra:
+            prompt_hash.update(json.dumps(extra, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return f"{model}|{reasoning_effort or '-'}|{verbosity or '-'}|{prompt_hash.hexdigest()}"
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return dict(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = json.loads(row[0]), row[1]
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created_at, value)
+                        self.stats["hits"] += 1
+                        self.stats["disk_hits"] += 1
+                        return dict(value)
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self.stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        """Put an entry into the in-memory LRU (caller holds the lock)."""
+        self._memory[key] = (created_at, dict(value))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        """Drop expired entries and the least recently used ones above max_entries (caller holds the lock)."""
+        if self.ttl:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        count = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            cursor = self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.stats["evictions"] += cursor.rowcount
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
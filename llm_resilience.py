@@ -0,0 +1,265 @@
+"""Retry, backoff and circuit breaker for LLM API calls."""
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+
+class LLMError(Exception):
+    """Base class for errors of an LLM call."""
+    retryable = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMRateLimitError(LLMError):
+    """The API rejected the call because of rate limits (HTTP 429)."""
+    retryable = True
+
+
+class LLMTimeoutError(LLMError):
+    """The call did not finish within the configured timeout."""
+    retryable = True
+
+
+class LLMConnectionError(LLMError):
+    """The API endpoint could not be reached."""
+    retryable = True
+
+
+class LLMServerError(LLMError):
+    """The API answered with a server error (HTTP 5xx)."""
+    retryable = True
+
+
+class LLMClientError(LLMError):
+    """The request was rejected (HTTP 4xx, e.g. invalid API key or bad request) - not retried."""
+
+
+class LLMCircuitOpenError(LLMError):
+    """The circuit breaker is open - the endpoint is considered unhealthy."""
+
+
+def _parse_retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After header (seconds or HTTP date) of an API error."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: Exception) -> Optional[LLMError]:
+    """Map an exception raised by the OpenAI client to a typed LLMError.
+
+    Returns None for errors that do not come from the transport or the API (e.g. a KeyError
+    while parsing a response) - they are local bugs, not retried and not counted by the breaker.
+    """
+    if isinstance(error, LLMError):
+        return error
+
+    message = str(error)
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError, TimeoutError)):
+        return LLMTimeoutError(f"Zeitüberschreitung: {message}")
+    if isinstance(error, (openai.APIConnectionError, ConnectionError)):
+        return LLMConnectionError(f"Verbindungsfehler: {message}")
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        return LLMError(message) if isinstance(error, openai.APIError) else None
+
+    retry_after = _parse_retry_after(error)
+    if status_code == 429:
+        return LLMRateLimitError(message, status_code, retry_after)
+    if status_code >= 500:
+        return LLMServerError(message, status_code, retry_after)
+    if status_code in (408, 409):
+        return LLMTimeoutError(message, status_code, retry_after)
+    return LLMClientError(message, status_code)
+
+
+class CircuitBreaker:
+    """Fails fast while the endpoint is unhealthy.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected with LLMCircuitOpenError. After `recovery_time` seconds one
+    trial call is let through (half-open); success closes the circuit again.
+    Rate limit errors do not count as failures - the endpoint is healthy, only busy.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, recovery_time: Optional[float] = None):
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", 5))
+        self.recovery_time = recovery_time if recovery_time is not None else float(os.getenv("LLM_CIRCUIT_RECOVERY_TIME", 30))
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """"closed", "open" or "half_open"."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_time:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Raise LLMCircuitOpenError if calls are currently not allowed."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+            remaining = max(0.0, self.recovery_time - (time.monotonic() - self.opened_at))
+            raise LLMCircuitOpenError(
+                f"LLM-Endpunkt vorübergehend deaktiviert (Circuit Breaker offen, noch {remaining:.0f}s)",
+                retry_after=remaining
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self) -> None:
+        """End a call whose outcome says nothing about the endpoint's health."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self, error: LLMError) -> None:
+        with self._lock:
+            if isinstance(error, LLMRateLimitError):
+                self._trial_running = False
+                return
+            if isinstance(error, LLMClientError):
+                # The endpoint answered - the request itself was wrong
+                self.failures = 0
+                self._trial_running = False
+                return
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class RetryPolicy:
+    """Classified retries with jittered exponential backoff."""
+
+    def __init__(self, max_retries: Optional[int] = None, timeout: Optional[float] = None,
+                 backoff_base: Optional[float] = None, backoff_max: Optional[float] = None):
+        """
+        Args:
+            max_retries: Retries after the first attempt (default: from LLM_MAX_RETRIES env or 4)
+            timeout: Timeout per call in seconds (default: from LLM_TIMEOUT env or 60)
+            backoff_base: Initial backoff in seconds (default: from LLM_BACKOFF_BASE env or 0.5)
+            backoff_max: Upper limit for a single backoff (default: from LLM_BACKOFF_MAX env or 30)
+        """
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", 4))
+        self.timeout = timeout if timeout is not None else float(os.getenv("LLM_TIMEOUT", 60))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.getenv("LLM_BACKOFF_BASE", 0.5))
+        self.backoff_max = backoff_max if backoff_max is not None else float(os.getenv("LLM_BACKOFF_MAX", 30))
+
+    def compute_delay(self, attempt: int, error: LLMError) -> float:
+        """Backoff before retry number `attempt` (0-based) - full jitter, at least Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if error.retry_after is not None:
+            delay = max(delay, min(error.retry_after, self.backoff_max))
+        return delay
+
+    def _should_retry(self, error: LLMError, attempt: int) -> bool:
+        return error.retryable and attempt < self.max_retries
+
+    def call(self, func: Callable[[], Any], breaker: Optional[CircuitBreaker] = None,
+             on_retry: Optional[Callable[[int, LLMError], None]] = None) -> Any:
+        """Run func with retries. Raises a typed LLMError when all attempts fail.
+        
+        Args:
+            on_retry: Called with (attempt, error) before each retry
+        """
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = func()
+            except Exception as e:
+                error = classify_error(e)
+                if error is None:
+                    if breaker is not None:
+                        breaker.release()
+                    raise
+                if breaker is not None:
+                    breaker.record_failure(error)
+                if not self._should_retry(error, attempt):
+                    raise error from e
+                delay = self.compute_delay(attempt, error)
+                print(f"⚠️ LLM-Aufruf fehlgeschlagen ({type(error).__name__}), neuer Versuch in {delay:.1f}s...")
+                if on_retry is not None:
+                    on_retry(attempt, error)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    async def call_async(self, func: Callable[[], Awaitable[Any]], breaker: Optional[CircuitBreaker] = None,
+                         on_retry: Optional[Callable[[int, LLMError], None]] = None) -> Any:
+        """Async variant of call - func returns a new awaitable per attempt."""
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = await func()
+            except Exception as e:
+                error = classify_error(e)
+                if error is None:
+                    if breaker is not None:
+                        breaker.release()
+                    raise
+                if breaker is not None:
+                    breaker.record_failure(error)
+                if not self._should_retry(error, attempt):
+                    raise error from e
+                delay = self.compute_delay(attempt, error)
+                print(f"⚠️ LLM-Aufruf fehlgeschlagen ({type(error).__name__}), neuer Versuch in {delay:.1f}s...")
+                if on_retry is not None:
+                    on_retry(attempt, error)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
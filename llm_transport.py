@@ -0,0 +1,347 @@
+"""Pluggable transports for LLM calls: OpenAI, record/replay cassettes and a rule-based fake model.
+
+A transport sends one request (the kwargs built by MetadataAgent._build_llm_request)
+and returns the agent's response dict {output_text, response_id, tokens, ...}.
+Retries, caching and instrumentation stay in the agent.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from llm_resilience import LLMClientError
+from structured_output import CONTENT_TYPE_KEY
+
+
+class CassetteMissError(LLMClientError):
+    """A replayed request is not in the cassette - not retried."""
+
+
+class OpenAITransport:
+    """Sends requests with the agent's OpenAI clients (the default)."""
+    needs_api_key = True
+    supports_streaming = True
+    
+    def __init__(self, agent: Any):
+        # The clients are looked up on every call so they can be swapped on the agent
+        self.agent = agent
+    
+    def _create(self, client: Any, request: Dict[str, Any]):
+        return client.responses.create if "input" in request else client.chat.completions.create
+    
+    def create(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        response = self._create(self.agent.client, request)(**request, timeout=timeout)
+        return self.agent._parse_llm_response(response)
+    
+    async def create_async(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        response = await self._create(self.agent.async_client, request)(**request, timeout=timeout)
+        return self.agent._parse_llm_response(response)
+
+
+class LatencyModel:
+    """Synthetic latency for offline transports.
+
+    Spec strings (e.g. from LLM_FAKE_LATENCY):
+        "fixed:0.8"           always 0.8s
+        "uniform:0.5,2.0"     uniform between 0.5s and 2.0s
+        "normal:1.2,0.3"      mean 1.2s, standard deviation 0.3s (clipped at 0)
+        "lognormal:1.0,0.5"   median 1.0s, sigma 0.5 - long tail like real API latency
+        "recorded"            latency measured while recording (optionally "recorded:0.5" to scale)
+        "" / "none"           no delay
+    """
+    
+    def __init__(self, spec: str = "", seed: Optional[int] = None):
+        self.spec = spec or "none"
+        kind, _, args = self.spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        if self.kind not in ("none", "fixed", "uniform", "normal", "lognormal", "recorded"):
+            raise ValueError(f"Unbekanntes Latenz-Modell: {spec}")
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def sample(self, recorded: Optional[float] = None) -> float:
+        """Delay in seconds for one call."""
+        with self._lock:
+            if self.kind == "fixed":
+                return self.args[0]
+            if self.kind == "uniform":
+                return self._random.uniform(self.args[0], self.args[1])
+            if self.kind == "normal":
+                return max(0.0, self._random.gauss(self.args[0], self.args[1]))
+            if self.kind == "lognormal":
+                return self._random.lognormvariate(math.log(self.args[0]), self.args[1])
+            if self.kind == "recorded":
+                return (recorded or 0.0) * (self.args[0] if self.args else 1.0)
+            return 0.0
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Stable key of a request (model, prompt and all options)."""
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RecordReplayTransport:
+    """Records requests/responses to a cassette file and replays them.
+
+    Modes:
+        "record"  call the inner transport and store every interaction
+        "replay"  answer only from the cassette (CassetteMissError otherwise)
+        "auto"    replay when present, otherwise record
+    """
+    supports_streaming = False
+    
+    def __init__(self, path: str, mode: str = "replay", inner: Any = None, latency: Optional[LatencyModel] = None):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unbekannter Cassette-Modus: {mode}")
+        if mode != "replay" and inner is None:
+            raise ValueError(f"Modus '{mode}' braucht einen Transport zum Aufzeichnen")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency or LatencyModel()
+        self._lock = threading.Lock()
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.interactions = json.load(f).get("interactions", {})
+    
+    @property
+    def needs_api_key(self) -> bool:
+        return self.mode != "replay" and getattr(self.inner, "needs_api_key", False)
+    
+    def _lookup(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = request_key(request)
+        entry = self.interactions.get(key)
+        if entry is None and self.mode == "replay":
+            raise CassetteMissError(f"Request nicht in Cassette {self.path} ({key[:12]})")
+        return entry
+    
+    def _store(self, request: Dict[str, Any], result: Dict[str, Any], latency: float) -> None:
+        with self._lock:
+            self.interactions[request_key(request)] = {"request": request, "response": result, "latency": latency}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "interactions": self.interactions}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+    
+    def create(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        entry = None if self.mode == "record" else self._lookup(request)
+        if entry is not None:
+            time.sleep(self.latency.sample(entry.get("latency")))
+            return dict(entry["response"])
+        started = time.perf_counter()
+        result = self.inner.create(request, timeout)
+        self._store(request, result, time.perf_counter() - started)
+        return result
+    
+    async def create_async(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        entry = None if self.mode == "record" else self._lookup(request)
+        if entry is not None:
+            await asyncio.sleep(self.latency.sample(entry.get("latency")))
+            return dict(entry["response"])
+        started = time.perf_counter()
+        result = await self.inner.create_async(request, timeout)
+        self._store(request, result, time.perf_counter() - started)
+        return result
+
+
+_MONTHS = {
+    "januar": 1, "februar": 2, "märz": 3, "april": 4, "mai": 5, "juni": 6, "juli": 7,
+    "august": 8, "september": 9, "oktober": 10, "november": 11, "dezember": 12,
+}
+
+# Words that point to a content type (lowercase) - used when the label itself is not in the text
+_CONTENT_TYPE_HINTS = {
+    "Veranstaltung": ["tagung", "konferenz", "workshop", "seminar", "messe", "webinar", "veranstaltung"],
+    "Person": ["professor", "dr.", "forscherin", "forscher", "lehrerin", "lehrer"],
+    "Organisation": ["verein", "stiftung", "gmbh", "institut", "universität", "hochschule", "schule"],
+    "Bildungsgänge und Bildungsangebote": ["studiengang", "ausbildung", "weiterbildung", "kurs", "lehrgang"],
+    "Tools Infrastrukturen & Services": ["tool", "plattform", "software", "app", "dienst"],
+    "Quelle": ["website", "portal", "repository", "mediathek"],
+}
+
+
+class FakeModelTransport:
+    """Rule-based stand-in for the model - deterministic, schema-valid answers without network.
+
+    Extraction requests get a JSON object with every field of the response schema
+    (or the field list of the prompt), filled by simple rules from the text:
+    titles, descriptions, keywords, dates, URLs, language and vocabulary labels.
+    Content type requests (and the content type key of fused calls) get the type
+    whose label or hint words occur in the text.
+    """
+    needs_api_key = False
+    supports_streaming = False
+    
+    def __init__(self, latency: Optional[LatencyModel] = None):
+        self.latency = latency or LatencyModel()
+        self._calls = 0
+        self._lock = threading.Lock()
+    
+    def create(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        time.sleep(self.latency.sample())
+        return self._answer(request)
+    
+    async def create_async(self, request: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency.sample())
+        return self._answer(request)
+    
+    def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = request.get("input") or request["messages"][-1]["content"]
+        text = prompt.rsplit("Text:", 1)[-1].strip()
+        schema = self._response_schema(request)
+        
+        if schema is None and "Verfügbare Inhaltsarten:" in prompt:
+            output_text = self._content_type(prompt, text)
+        else:
+            if schema is not None:
+                properties = schema.get("properties", {})
+            else:
+                properties = {field_id: {} for field_id in re.findall(r"^- \*\*(.+?)\*\*", prompt, re.MULTILINE)}
+            answer = {field_id: self._value(field_id, prop, text) for field_id, prop in properties.items()}
+            if CONTENT_TYPE_KEY in answer:
+                types = [t for t in properties[CONTENT_TYPE_KEY].get("enum", []) if t]
+                if not types:
+                    match = re.search(rf"\*\*{CONTENT_TYPE_KEY}\*\*.*?aus: (.*) \[", prompt)
+                    types = match.group(1).split(", ") if match else []
+                answer[CONTENT_TYPE_KEY] = self._match_content_type(types, text) or None
+            output_text = json.dumps(answer, ensure_ascii=False)
+        
+        with self._lock:
+            self._calls += 1
+            response_id = f"fake_{self._calls}"
+        input_tokens = len(prompt) // 4
+        output_tokens = len(output_text) // 4
+        return {
+            "output_text": output_text,
+            "response_id": response_id,
+            "tokens": input_tokens + output_tokens,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": 0,
+        }
+    
+    @staticmethod
+    def _response_schema(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        text_format = request.get("text", {}).get("format")
+        if text_format:
+            return text_format.get("schema")
+        response_format = request.get("response_format")
+        if response_format:
+            return response_format.get("json_schema", {}).get("schema")
+        return None
+    
+    def _content_type(self, prompt: str, text: str) -> str:
+        block = prompt.split("Verfügbare Inhaltsarten:", 1)[1].split("\n\n", 1)[0]
+        types = [t.strip() for t in block.strip().splitlines() if t.strip()]
+        return self._match_content_type(types, text)
+    
+    @staticmethod
+    def _match_content_type(types: List[str], text: str) -> str:
+        lowered = text.lower()
+        for content_type in types:
+            if content_type.lower() in lowered:
+                return content_type
+        for content_type in types:
+            if any(hint in lowered for hint in _CONTENT_TYPE_HINTS.get(content_type, [])):
+                return content_type
+        return types[0] if types else ""
+    
+    def _value(self, field_id: str, schema: Dict[str, Any], text: str) -> Any:
+        """Value for one field (None if no rule applies)."""
+        types = schema.get("type") or "string"
+        types = types if isinstance(types, list) else [types]
+        lowered_id = field_id.lower()
+        
+        if "array" in types:
+            items = schema.get("items", {})
+            if "enum" in items:
+                labels = [label for label in items["enum"] if label and label.lower() in text.lower()]
+                return labels or None
+            if "keyword" in lowered_id and items.get("type", "string") == "string":
+                return _keywords(text)
+            return None
+        
+        if "enum" in schema:
+            labels = [label for label in schema["enum"] if label and label.lower() in text.lower()]
+            return labels[0] if labels else None
+        
+        if "string" not in types:
+            return None
+        if "title" in lowered_id or lowered_id.endswith(":name"):
+            return _sentences(text, 1)[:120] or None
+        if "description" in lowered_id:
+            return _sentences(text, 2) or None
+        if "language" in lowered_id:
+            return "de"
+        if "date" in lowered_id:
+            dates = _dates(text)
+            if not dates:
+                return None
+            return dates[-1] if "end" in lowered_id and len(dates) > 1 else dates[0]
+        if "url" in lowered_id:
+            match = re.search(r"https?://\S+", text)
+            return match.group().rstrip(".,)") if match else None
+        return None
+
+
+def _sentences(text: str, count: int) -> str:
+    # Sentence ends: punctuation after a non-digit ("15. September" is not an end), next word capitalized
+    parts = re.split(r"(?<=[^\d\s][.!?])\s+(?=[A-ZÄÖÜ\"„])", text.strip())
+    return " ".join(parts[:count]).strip()
+
+
+def _keywords(text: str, limit: int = 5) -> Optional[List[str]]:
+    """Most frequent capitalized words (German nouns) of the text."""
+    counts: Dict[str, int] = {}
+    for word in re.findall(r"\b[A-ZÄÖÜ][\wäöüß-]{4,}\b", text):
+        if word.lower() not in _MONTHS:
+            counts[word] = counts.get(word, 0) + 1
+    ranked = sorted(counts, key=lambda w: (-counts[w], text.index(w)))
+    return ranked[:limit] or None
+
+
+def _dates(text: str) -> List[str]:
+    """ISO dates and German dates ("15. September 2026", "15.09.2026") in order of appearance."""
+    found = []
+    pattern = (r"(\d{4})-(\d{2})-(\d{2})"
+               r"|(\d{1,2})\.(\d{1,2})\.(\d{4})"
+               r"|(\d{1,2})\.\s*(?:(?:bis|-|–)\s*(\d{1,2})\.\s*)?(" + "|".join(_MONTHS) + r")\s+(\d{4})")
+    for m in re.finditer(pattern, text, re.IGNORECASE):
+        if m.group(1):
+            found.append(f"{m.group(1)}-{m.group(2)}-{m.group(3)}")
+        elif m.group(4):
+            found.append(f"{m.group(6)}-{int(m.group(5)):02d}-{int(m.group(4)):02d}")
+        else:
+            # "15. bis 16. September 2026" -> start and end date
+            month = _MONTHS[m.group(9).lower()]
+            for day in filter(None, (m.group(7), m.group(8))):
+                found.append(f"{m.group(10)}-{month:02d}-{int(day):02d}")
+    return found
+
+
+def transport_from_env(agent: Any) -> Any:
+    """Transport selected by LLM_TRANSPORT: openai (default), fake, record, replay or auto.
+
+    LLM_CASSETTE sets the cassette file, LLM_FAKE_LATENCY the synthetic latency (see LatencyModel).
+    """
+    name = os.getenv("LLM_TRANSPORT", "openai").lower()
+    latency = LatencyModel(os.getenv("LLM_FAKE_LATENCY", ""))
+    if name == "openai":
+        return OpenAITransport(agent)
+    if name == "fake":
+        return FakeModelTransport(latency)
+    if name in ("record", "replay", "auto"):
+        cassette = os.getenv("LLM_CASSETTE", "cassettes/llm.json")
+        inner = OpenAITransport(agent) if name != "replay" else None
+        return RecordReplayTransport(cassette, mode=name, inner=inner, latency=latency)
+    raise ValueError(f"Unbekannter LLM_TRANSPORT: {name}")
@@ -0,0 +1,129 @@
+"""Long-document mode: paragraph chunking and field-type-aware reduction of per-chunk results."""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from schema_loader import Field
+
+# Rough token estimate for German/English prose
+CHARS_PER_TOKEN = 4
+# Extraction result key carrying the provenance of long-document values (field id -> entries)
+PROVENANCE_KEY = "_provenance"
+
+
+@dataclass
+class Chunk:
+    """A slice of the input text; start/end are character offsets into the full text."""
+    index: int
+    start: int
+    end: int
+    text: str
+    
+    def ref(self) -> Dict[str, int]:
+        return {"index": self.index, "start": self.start, "end": self.end}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _pieces(text: str, start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    """Split text[start:end] into spans of at most max_chars: paragraphs, then sentences, then hard cuts."""
+    if end - start <= max_chars:
+        return [(start, end)]
+    
+    for separator in (r"\n\s*\n", r"(?<=[.!?])\s+", r"\s+"):
+        spans = []
+        position = start
+        for match in re.finditer(separator, text[start:end]):
+            spans.append((position, start + match.end()))
+            position = start + match.end()
+        spans.append((position, end))
+        if len(spans) > 1:
+            result = []
+            for span_start, span_end in spans:
+                result.extend(_pieces(text, span_start, span_end, max_chars))
+            return result
+    return [(i, min(i + max_chars, end)) for i in range(start, end, max_chars)]
+
+
+def chunk_text(text: str, max_tokens: int) -> List[Chunk]:
+    """Split text on paragraph boundaries into chunks of at most max_tokens (estimated).
+
+    Paragraphs are packed greedily; a paragraph longer than the budget is split
+    on sentence boundaries (and as a last resort on whitespace).
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    chunks: List[Chunk] = []
+    chunk_start = chunk_end = 0
+    for start, end in _pieces(text, 0, len(text), max_chars):
+        if end - chunk_start > max_chars and chunk_end > chunk_start:
+            chunks.append(Chunk(len(chunks), chunk_start, chunk_end, text[chunk_start:chunk_end].strip()))
+            chunk_start = start
+        chunk_end = end
+    if text[chunk_start:chunk_end].strip():
+        chunks.append(Chunk(len(chunks), chunk_start, chunk_end, text[chunk_start:chunk_end].strip()))
+    return chunks
+
+
+def _identity(value: Any) -> str:
+    """Comparison key of a value (case-insensitive for strings, stable JSON for objects)."""
+    if isinstance(value, str):
+        return value.strip().casefold()
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def _completeness(value: Any) -> int:
+    if isinstance(value, dict):
+        return sum(1 for v in value.values() if v not in (None, "", [], {}))
+    return 1
+
+
+def reduce_chunk_results(results: List[Dict[str, Any]], chunks: List[Chunk],
+                         fields: List[Field]) -> Dict[str, Any]:
+    """Merge the extraction results of all chunks into one result.
+
+    Lists (keywords, ...) are united without duplicates in order of appearance.
+    Scalars take the value most chunks agree on (ties: earliest chunk); objects
+    take the most complete value. The result carries PROVENANCE_KEY:
+    field id -> [{"value", "chunks": [{"index", "start", "end"}, ...]}, ...].
+    """
+    field_map = {f.id: f for f in fields}
+    field_ids = list(dict.fromkeys(field_id for result in results for field_id in result))
+    merged: Dict[str, Any] = {}
+    provenance: Dict[str, List[Dict[str, Any]]] = {}
+    
+    for field_id in field_ids:
+        # Distinct values (scalar answers or list items) with the chunks that produced them
+        candidates: Dict[str, Dict[str, Any]] = {}
+        is_list = False
+        for result, chunk in zip(results, chunks):
+            value = result.get(field_id)
+            if value in (None, "", [], {}):
+                continue
+            items = value if isinstance(value, list) else [value]
+            is_list = is_list or isinstance(value, list)
+            for item in items:
+                entry = candidates.setdefault(_identity(item), {"value": item, "chunks": []})
+                if chunk.ref() not in entry["chunks"]:
+                    entry["chunks"].append(chunk.ref())
+        if not candidates:
+            continue
+        
+        field = field_map.get(field_id)
+        if is_list or (field is not None and field.multiple):
+            entries = list(candidates.values())
+            merged[field_id] = [entry["value"] for entry in entries]
+        else:
+            # Majority, then completeness (objects), then the earliest chunk
+            best = max(
+                candidates.values(),
+                key=lambda entry: (len(entry["chunks"]), _completeness(entry["value"]), -entry["chunks"][0]["index"])
+            )
+            entries = [best]
+            merged[field_id] = best["value"]
+        provenance[field_id] = entries
+    
+    merged[PROVENANCE_KEY] = provenance
+    return merged
@@ -20,6 +20,8 @@ class Message(BaseModel):
     """A chat message."""
     role: Literal["user", "assistant", "system"]
     content: str
+    # False for navigation commands and schema selections (no new text to extract from)
+    source: bool = True
 
 
 class FieldStatus(BaseModel):
@@ -32,6 +34,90 @@ class FieldStatus(BaseModel):
     is_required: bool = False
     ai_suggested: bool = False
     needs_user_input: bool = False
+    provenance: Optional[List[Dict[str, Any]]] = None  # Long documents: source chunks of the value(s)
+
+
+class Span(BaseModel):
+    """Timing span of a workflow node, headless stage/job or LLM call."""
+    name: str
+    kind: Literal["workflow", "node", "stage", "job", "llm"]
+    parent: Optional[str] = None
+    start: float = 0.0  # Unix timestamp
+    duration: float = 0.0  # Seconds
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    cache_hit: bool = False
+    validation_warnings: int = 0
+    error: Optional[str] = None
+    
+    def add_retry(self, *args) -> None:
+        self.retries += 1
+
+
+class PerformanceReport(BaseModel):
+    """Spans recorded during one workflow."""
+    spans: List[Span] = Field(default_factory=list)
+    
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per node/stage/job name - LLM spans are counted towards their parent."""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            if span.kind == "llm":
+                continue
+            entry = totals.setdefault(span.name, {
+                "kind": span.kind, "count": 0, "duration": 0.0, "llm_calls": 0,
+                "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0,
+                "retries": 0, "validation_warnings": 0, "errors": 0
+            })
+            entry["count"] += 1
+            entry["duration"] += span.duration
+            entry["validation_warnings"] += span.validation_warnings
+            entry["errors"] += span.error is not None
+        for span in self.spans:
+            if span.kind != "llm" or span.parent not in totals:
+                continue
+            entry = totals[span.parent]
+            entry["llm_calls"] += 1
+            entry["input_tokens"] += span.input_tokens
+            entry["output_tokens"] += span.output_tokens
+            entry["cached_tokens"] += span.cached_tokens
+            entry["retries"] += span.retries
+            entry["errors"] += span.error is not None
+        return totals
+    
+    def llm_totals(self) -> Dict[str, Any]:
+        """Totals over all LLM calls."""
+        llm_spans = [s for s in self.spans if s.kind == "llm"]
+        return {
+            "calls": len(llm_spans),
+            "cache_hits": sum(s.cache_hit for s in llm_spans),
+            "duration": sum(s.duration for s in llm_spans),
+            "input_tokens": sum(s.input_tokens for s in llm_spans),
+            "output_tokens": sum(s.output_tokens for s in llm_spans),
+            "cached_tokens": sum(s.cached_tokens for s in llm_spans),
+            "retries": sum(s.retries for s in llm_spans),
+        }
+    
+    def format(self) -> str:
+        """Readable table of the summary."""
+        summary = self.summary()
+        if not summary:
+            return "Keine Messwerte"
+        total = max((e["duration"] for e in summary.values() if e["kind"] == "workflow"), default=0.0) \
+            or sum(e["duration"] for e in summary.values())
+        lines = []
+        for name, entry in summary.items():
+            share = entry["duration"] / total if total else 0.0
+            bar = "█" * int(share * 20)
+            lines.append(
+                f"{name:32s}: {entry['duration']:7.2f}s  {bar:20s} {share:6.1%}  "
+                f"{entry['llm_calls']} Calls, {entry['input_tokens']}/{entry['output_tokens']} Tokens "
+                f"({entry['cached_tokens']} cached), {entry['retries']} Retries, "
+                f"{entry['validation_warnings']} Warnungen"
+            )
+        return "\n".join(lines)
 
 
 class WorkflowState(BaseModel):
@@ -75,10 +161,38 @@ class WorkflowState(BaseModel):
     # Navigation history for back button
     phase_history: List[WorkflowPhase] = Field(default_factory=list)
     
+    # Schema version the session runs on (see SchemaRegistry) - set on first use, kept across reloads
+    schema_version: Optional[int] = None
+    
+    # Dirty tracking: phase key -> number of source messages at its last extraction
+    extracted_at: Dict[str, int] = Field(default_factory=dict)
+    
+    # Latency/token instrumentation of this workflow
+    performance: PerformanceReport = Field(default_factory=PerformanceReport)
+    
     def add_message(self, role: str, content: str):
         """Add a message to the chat history."""
         self.messages.append(Message(role=role, content=content))
     
+    def source_version(self) -> int:
+        """Number of user messages that carry text to extract from."""
+        return sum(1 for msg in self.messages if msg.role == "user" and msg.source)
+    
+    def phase_key(self) -> str:
+        """Key of the current extraction phase (special phases per schema file)."""
+        if (self.phase in (WorkflowPhase.EXTRACT_SPECIAL_REQUIRED, WorkflowPhase.EXTRACT_SPECIAL_OPTIONAL)
+                and self.current_special_schema_index < len(self.special_schemas)):
+            return f"{self.phase.value}:{self.special_schemas[self.current_special_schema_index]}"
+        return self.phase.value
+    
+    def is_phase_dirty(self) -> bool:
+        """True if new source text arrived since the current phase was last extracted."""
+        return self.extracted_at.get(self.phase_key()) != self.source_version()
+    
+    def mark_phase_extracted(self):
+        """Record that the current phase is up to date with all source messages."""
+        self.extracted_at[self.phase_key()] = self.source_version()
+    
     def save_phase_to_history(self):
         """Save current phase to history for back navigation."""
         if not self.phase_history or self.phase_history[-1] != self.phase:
@@ -106,6 +220,8 @@ class WorkflowState(BaseModel):
         self.field_status[field_id].is_filled = value is not None and value != "" and value != []
         self.field_status[field_id].is_confirmed = confirmed
         self.field_status[field_id].ai_suggested = ai_suggested
+        # Provenance belongs to the previous value - extraction paths record the new one afterwards
+        self.field_status[field_id].provenance = None
         
         # Update metadata
         self.metadata[field_id] = value
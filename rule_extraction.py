@@ -0,0 +1,344 @@
+"""Deterministic pre-extraction: compiled rules for fields that can be read mechanically from the text.
+
+A rule returns a value only if the text is unambiguous (one URL, one date or
+date range, one license, ...). Everything else is left to the LLM.
+"""
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from schema_loader import Field
+
+# rule(text, field) -> value, or None if the text does not determine the field with certainty
+Rule = Callable[[str, Field], Any]
+
+_MONTHS = {
+    "januar": 1, "jan": 1, "jänner": 1, "februar": 2, "feb": 2, "märz": 3, "maerz": 3, "mär": 3, "mrz": 3,
+    "april": 4, "apr": 4, "mai": 5, "juni": 6, "jun": 6, "juli": 7, "jul": 7, "august": 8, "aug": 8,
+    "september": 9, "sep": 9, "sept": 9, "oktober": 10, "okt": 10, "november": 11, "nov": 11,
+    "dezember": 12, "dez": 12,
+}
+_MONTH = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_RANGE = r"\s*(?:-|–|—|bis)\s*"
+
+_URL = re.compile(r"https?://[^\s<>\"'()\[\]]+[^\s<>\"'()\[\].,;:!?]")
+_IMAGE_URL = re.compile(r"\.(?:jpe?g|png|webp)(?:\?\S*)?$", re.IGNORECASE)
+_LICENSE_URL = re.compile(r"creativecommons\.org/(?:licenses/([a-z-]+)|publicdomain/zero)/(\d\.\d)?", re.IGNORECASE)
+_LICENSE = re.compile(
+    r"\bCC[\s-]?(0|Zero|BY(?:[\s-](?:NC|SA|ND))*)\b(?:[\s-]*(?:Version\s*)?(\d\.\d)\b)?", re.IGNORECASE
+)
+
+# ISO dates, 15.03.2025, "15. März 2025", ranges "15.-16. März 2025" / "15. März bis 2. April 2025" / "15.03.-16.03.2025"
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_NUMERIC_RANGE = re.compile(rf"\b(\d{{1,2}})\.(\d{{1,2}})\.(\d{{4}})?{_RANGE}(\d{{1,2}})\.(\d{{1,2}})\.(\d{{4}})\b")
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b")
+_WORD_RANGE = re.compile(
+    rf"\b(\d{{1,2}})\.\s*(?:({_MONTH})\.?\s*)?{_RANGE}(\d{{1,2}})\.\s*({_MONTH})\.?\s*(\d{{4}})\b", re.IGNORECASE
+)
+_WORD_DATE = re.compile(rf"\b(\d{{1,2}})\.\s*({_MONTH})\.?\s*(\d{{4}})\b", re.IGNORECASE)
+_TIME_RANGE = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(?:Uhr\s*)?(?:-|–|—|bis)\s*(\d{1,2})(?:[:.](\d{2}))?\s*Uhr\b")
+_TIME = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*Uhr\b|\b(\d{1,2}):(\d{2})\b")
+
+# Only with explicit duration context ("Dauer: 3 Stunden", "dauert 2 Tage", "Laufzeit 6 Monate") -
+# "Anmeldung 14 Tage vorher" is no duration
+_DURATION = re.compile(
+    r"\b(?:(?:Gesamt|Kurs|Lauf|Seminar|Veranstaltungs|Workshop|Ausbildungs|Studien|Maßnahmen)?dauer[nt]?"
+    r"|Laufzeit|Zeitumfang|Umfang|duration|lasts?)\b(?:[^.;!?\n\d]|(?<=\bca)\.){0,30}?"
+    r"(\d+)\s*(Minuten|Min\.|Stunden|Std\.|Tage|Tagen|Wochen|Monate|Monaten|minutes|hours|days|weeks|months)(?!\w)",
+    re.IGNORECASE
+)
+_DURATION_UNITS = {
+    "min": "PT{}M", "minuten": "PT{}M", "minutes": "PT{}M",
+    "std": "PT{}H", "stunden": "PT{}H", "hours": "PT{}H",
+    "tage": "P{}D", "tagen": "P{}D", "days": "P{}D",
+    "wochen": "P{}W", "weeks": "P{}W",
+    "monate": "P{}M", "monaten": "P{}M", "months": "P{}M",
+}
+
+_AMOUNT = r"\d(?:[\d.,]*\d)?"
+_PRICE = re.compile(
+    rf"(?:(?:€|EUR)\s*({_AMOUNT})|\b({_AMOUNT})\s*(?:€|EUR\b|Euro\b))", re.IGNORECASE
+)
+# German amounts: "1.200" / "1.200,50" (thousands separator "."), "12,50"; "12.50" as decimal point
+_GERMAN_AMOUNT = re.compile(r"\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?")
+_DECIMAL_POINT_AMOUNT = re.compile(r"\d+\.\d{1,2}")
+_FREE = re.compile(
+    r"\b(?:kostenlos\w*|kostenfrei\w*|gebührenfrei\w*|entgeltfrei\w*|unentgeltlich\w*|ohne\s+(?:Gebühr|Kosten)"
+    r"|Teilnahme\s+ist\s+frei|free\s+of\s+charge|free\s+admission)\b",
+    re.IGNORECASE
+)
+
+_LANGUAGE_NAMES = {
+    "de": r"deutsch(?:e[mnrs]?)?|german", "en": r"englisch(?:e[mnrs]?)?|english",
+    "fr": r"französisch(?:e[mnrs]?)?|french", "es": r"spanisch(?:e[mnrs]?)?|spanish",
+    "it": r"italienisch(?:e[mnrs]?)?|italian",
+}
+_LANGUAGE_MENTION = re.compile(
+    r"\b(?:auf|in)\s+(" + "|".join(_LANGUAGE_NAMES.values()) + r")(?:\s+sprache)?\b"
+    r"|\b(?:sprache|kurssprache|unterrichtssprache|language)\s*:?\s*(" + "|".join(_LANGUAGE_NAMES.values()) + r")\b",
+    re.IGNORECASE
+)
+_STOPWORDS = {
+    "de": {"der", "die", "das", "und", "ist", "mit", "für", "von", "den", "ein", "eine", "nicht", "auf", "sich", "wird", "werden", "im", "zu", "des", "dem"},
+    "en": {"the", "and", "is", "with", "for", "of", "to", "a", "an", "in", "on", "are", "be", "this", "that", "will", "by", "from", "at", "as"},
+}
+# Text language is only taken as certain with this many stopwords and this ratio over the other language
+_MIN_STOPWORDS = 8
+_STOPWORD_RATIO = 3
+
+
+def _unique(values: List[Any]) -> Optional[Any]:
+    """The value if all entries agree, otherwise None (ambiguous)."""
+    distinct = list(dict.fromkeys(values))
+    return distinct[0] if len(distinct) == 1 else None
+
+
+def _make_date(year: Any, month: Any, day: Any) -> Optional[str]:
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _month(name: Optional[str]) -> Optional[int]:
+    return _MONTHS.get(name.lower().rstrip(".")) if name else None
+
+
+@lru_cache(maxsize=256)
+def _date_mentions(text: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """All dates and date ranges of the text as (start, end or None), in order of appearance."""
+    found: List[Tuple[int, str, Optional[str]]] = []
+    taken: List[Tuple[int, int]] = []
+    
+    def add(match: re.Match, start: Optional[str], end: Optional[str] = None) -> None:
+        if start is None or any(s < match.end() and match.start() < e for s, e in taken):
+            return
+        taken.append((match.start(), match.end()))
+        found.append((match.start(), start, end if end != start else None))
+    
+    for m in _WORD_RANGE.finditer(text):
+        end_month = _month(m.group(4))
+        add(m, _make_date(m.group(5), _month(m.group(2)) or end_month, m.group(1)),
+            _make_date(m.group(5), end_month, m.group(3)))
+    for m in _NUMERIC_RANGE.finditer(text):
+        add(m, _make_date(m.group(3) or m.group(6), m.group(2), m.group(1)), _make_date(m.group(6), m.group(5), m.group(4)))
+    for m in _WORD_DATE.finditer(text):
+        add(m, _make_date(m.group(3), _month(m.group(2)), m.group(1)))
+    for m in _NUMERIC_DATE.finditer(text):
+        add(m, _make_date(m.group(3), m.group(2), m.group(1)))
+    for m in _ISO_DATE.finditer(text):
+        add(m, _make_date(m.group(1), m.group(2), m.group(3)))
+    return tuple((start, end) for _, start, end in sorted(found))
+
+
+def _clock(hour: str, minute: Optional[str]) -> Optional[str]:
+    if int(hour) > 23 or int(minute or 0) > 59:
+        return None
+    return f"{int(hour):02d}:{int(minute or 0):02d}"
+
+
+@lru_cache(maxsize=256)
+def _schedule(text: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(start, end) of the single event date or date range in the text - None if there is none or several.
+
+    A single day with one time ("18 Uhr") or one time range ("9-17 Uhr") gets ISO date-times.
+    """
+    mention = _unique(list(_date_mentions(text)))
+    if mention is None:
+        return None
+    start, end = mention
+    if end is None:
+        time_ranges = _TIME_RANGE.findall(text)
+        times = _TIME.findall(text)
+        if len(time_ranges) == 1:
+            from_hour, from_minute, to_hour, to_minute = time_ranges[0]
+            begin, finish = _clock(from_hour, from_minute), _clock(to_hour, to_minute)
+            if begin and finish:
+                return f"{start}T{begin}", f"{start}T{finish}"
+        elif not time_ranges and len(times) == 1:
+            hour, minute = (times[0][0], times[0][1]) if times[0][0] else (times[0][2], times[0][3])
+            clock = _clock(hour, minute)
+            if clock:
+                return f"{start}T{clock}", None
+    return start, end
+
+
+def _as_field_date(value: Optional[str], field: Field) -> Optional[str]:
+    """Date-only fields (datatype "date") get the date part of a date-time."""
+    if value and field.datatype == "date":
+        return value[:10]
+    return value
+
+
+def start_date_rule(text: str, field: Field) -> Optional[str]:
+    schedule = _schedule(text)
+    return _as_field_date(schedule[0], field) if schedule else None
+
+
+def end_date_rule(text: str, field: Field) -> Optional[str]:
+    schedule = _schedule(text)
+    return _as_field_date(schedule[1], field) if schedule else None
+
+
+def duration_rule(text: str, field: Field) -> Optional[str]:
+    durations = []
+    for amount, unit in _DURATION.findall(text):
+        durations.append(_DURATION_UNITS[unit.lower().rstrip(".")].format(int(amount)))
+    return _unique(durations)
+
+
+def _urls(text: str) -> List[str]:
+    return [url for url in _URL.findall(text) if not _LICENSE_URL.search(url)]
+
+
+def www_url_rule(text: str, field: Field) -> Optional[str]:
+    return _unique([url for url in _urls(text) if not _IMAGE_URL.search(url)])
+
+
+def preview_url_rule(text: str, field: Field) -> Optional[str]:
+    return _unique([url for url in _urls(text) if _IMAGE_URL.search(url)])
+
+
+@lru_cache(maxsize=256)
+def _license(text: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(key, version) of the single Creative Commons license named in the text."""
+    licenses = []
+    for kind, version in _LICENSE.findall(text):
+        kind = kind.upper()
+        if kind in ("0", "ZERO"):
+            licenses.append(("CC0", version or None))
+        else:
+            parts = re.split(r"[\s-]+", kind)
+            # Canonical order of the vocabulary: BY, NC, SA/ND
+            modifiers = sorted(set(parts[1:]), key=lambda p: ["NC", "SA", "ND"].index(p))
+            licenses.append(("CC " + "-".join(["BY"] + modifiers), version or None))
+    for kind, version in _LICENSE_URL.findall(text):
+        key = "CC " + "-".join(kind.upper().split("-")) if kind else "CC0"
+        licenses.append((key, version or None))
+    # "CC BY-SA" and "CC BY-SA 4.0" (e.g. in text and license URL) name the same license
+    keys = _unique([key for key, _ in licenses])
+    if keys is None:
+        return None
+    versions = list(dict.fromkeys(version for _, version in licenses if version))
+    if len(versions) > 1:
+        return None
+    return keys, versions[0] if versions else None
+
+
+def license_key_rule(text: str, field: Field) -> Optional[str]:
+    found = _license(text)
+    if found is None:
+        return None
+    allowed = field.vocabulary_index.labels
+    return found[0] if not allowed or found[0] in allowed else None
+
+
+def license_version_rule(text: str, field: Field) -> Optional[str]:
+    found = _license(text)
+    return found[1] if found else None
+
+
+def _amount(text: str) -> Optional[float]:
+    """Value of a price amount - None if it is ambiguous (e.g. "1,200": thousands or decimals?)."""
+    if _GERMAN_AMOUNT.fullmatch(text):
+        return float(text.replace(".", "").replace(",", "."))
+    if _DECIMAL_POINT_AMOUNT.fullmatch(text):
+        return float(text)
+    return None
+
+
+def _prices(text: str) -> Optional[List[float]]:
+    """Distinct prices of the text - None if one of them cannot be read with certainty."""
+    prices = []
+    for before, after in _PRICE.findall(text):
+        price = _amount(before or after)
+        if price is None:
+            return None
+        prices.append(price)
+    return list(dict.fromkeys(prices))
+
+
+def offers_rule(text: str, field: Field) -> Optional[List[Dict[str, Any]]]:
+    prices = [price for price in _prices(text) or [] if price > 0]
+    if not prices:
+        return None
+    shape = field.system.get("items", {}).get("shape", {})
+    offers = []
+    for price in prices:
+        offer = {"@type": "Offer"} if "@type" in shape else {}
+        offer.update({"price": price, "priceCurrency": "EUR"})
+        offers.append(offer)
+    return offers
+
+
+def free_rule(text: str, field: Field) -> Optional[bool]:
+    prices = _prices(text)
+    if prices is None:
+        return None
+    free = bool(_FREE.search(text)) or 0 in prices
+    paid = any(price > 0 for price in prices)
+    if free != paid:
+        return free
+    return None  # Neither or both ("kostenlos für Mitglieder, sonst 20 €")
+
+
+def language_rule(text: str, field: Field) -> Optional[str]:
+    """Explicitly named language ("auf Englisch", "Sprache: Deutsch"), else the clearly dominant text language."""
+    mentioned = []
+    for match in _LANGUAGE_MENTION.finditer(text):
+        name = (match.group(1) or match.group(2)).lower()
+        mentioned.extend(code for code, pattern in _LANGUAGE_NAMES.items() if re.fullmatch(pattern, name))
+    if mentioned:
+        return _unique(mentioned)
+    
+    words = re.findall(r"[a-zäöüß]+", text.lower())
+    counts = {code: sum(1 for w in words if w in stopwords) for code, stopwords in _STOPWORDS.items()}
+    best, other = sorted(counts, key=counts.get, reverse=True)
+    if counts[best] >= _MIN_STOPWORDS and counts[best] >= _STOPWORD_RATIO * counts[other]:
+        return best
+    return None
+
+
+DEFAULT_RULES: Dict[str, Rule] = {
+    "ccm:wwwurl": www_url_rule,
+    "preview:url": preview_url_rule,
+    "schema:startDate": start_date_rule,
+    "schema:endDate": end_date_rule,
+    "schema:duration": duration_rule,
+    "cclom:general_language": language_rule,
+    "ccm:commonlicense_key": license_key_rule,
+    "ccm:commonlicense_cc_version": license_version_rule,
+    "schema:offers": offers_rule,
+    "schema:isAccessibleForFree": free_rule,
+}
+
+
+class RuleExtractor:
+    """Runs the registered rules for the fields of a phase before the LLM is asked.
+
+    Rules are looked up by field id; register() adds or replaces one
+    (e.g. for project-specific schemas).
+    """
+    
+    def __init__(self, rules: Optional[Dict[str, Rule]] = None):
+        self.rules: Dict[str, Rule] = dict(DEFAULT_RULES if rules is None else rules)
+    
+    def register(self, field_id: str, rule: Rule) -> None:
+        self.rules[field_id] = rule
+    
+    def extract(self, text: str, fields: List[Field]) -> Dict[str, Any]:
+        """Values of the fields the rules determine with certainty (fields without a result are omitted)."""
+        values = {}
+        for field in fields:
+            rule = self.rules.get(field.id)
+            if rule is None:
+                continue
+            try:
+                value = rule(text, field)
+            except Exception as e:
+                print(f"⚠️ Regel für {field.id} fehlgeschlagen: {e}")
+                continue
+            if value not in (None, "", []):
+                values[field.id] = value
+        return values
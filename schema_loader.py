@@ -1,9 +1,113 @@
 """Schema loader and manager for metadata extraction."""
+import hashlib
 import json
 import os
+import pickle
+from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Any, Tuple
+from dataclasses import dataclass, field as dataclass_field, fields as dataclass_fields
+
+# Bump when Field or VocabularyIndex change - compiled schema artifacts of older formats are rebuilt
+SCHEMA_CACHE_FORMAT = 1
+
+
+def _trigrams(term: str) -> FrozenSet[str]:
+    padded = f"  {term} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass(frozen=True)
+class VocabularyIndex:
+    """Lookup tables of a field vocabulary, compiled once when the field is created.
+    
+    Only top-level concepts count (like get_vocabulary_concepts). The folded
+    tables are keyed by str.casefold() of labels and altLabels.
+    """
+    labels: FrozenSet[str]
+    label_list: Tuple[str, ...]  # Schema order, for messages and prompts
+    label_to_uri: Mapping[str, str]
+    alt_label_to_uri: Mapping[str, str]
+    uri_to_label: Mapping[str, str]
+    term_to_uri: Mapping[str, str]  # Labels and altLabels (a later concept wins, as in the schema)
+    folded_to_label: Mapping[str, str]  # Folded label or altLabel -> label
+    folded_to_uri: Mapping[str, str]
+    trigrams: Mapping[str, FrozenSet[str]]  # Trigram -> folded labels/altLabels containing it (fuzzy lookup)
+    
+    @classmethod
+    def compile(cls, concepts: List[Dict[str, Any]]) -> "VocabularyIndex":
+        label_list = []
+        label_to_uri, alt_label_to_uri, uri_to_label, term_to_uri = {}, {}, {}, {}
+        folded_to_label, folded_to_uri = {}, {}
+        for concept in concepts:
+            label = concept.get("label", "")
+            if not label:
+                continue
+            label_list.append(label)
+            uri = concept.get("uri", "")
+            alt_labels = concept.get("altLabels", [])
+            for term in [label] + alt_labels:
+                folded_to_label.setdefault(term.casefold(), label)
+            if not uri:
+                continue
+            label_to_uri[label] = uri
+            uri_to_label.setdefault(uri, label)
+            term_to_uri[label] = uri
+            folded_to_uri.setdefault(label.casefold(), uri)
+            for alt in alt_labels:
+                alt_label_to_uri[alt] = uri
+                term_to_uri[alt] = uri
+                folded_to_uri.setdefault(alt.casefold(), uri)
+        postings: Dict[str, set] = {}
+        for term in folded_to_label:
+            for gram in _trigrams(term):
+                postings.setdefault(gram, set()).add(term)
+        return cls(
+            labels=frozenset(label_list),
+            label_list=tuple(label_list),
+            label_to_uri=MappingProxyType(label_to_uri),
+            alt_label_to_uri=MappingProxyType(alt_label_to_uri),
+            uri_to_label=MappingProxyType(uri_to_label),
+            term_to_uri=MappingProxyType(term_to_uri),
+            folded_to_label=MappingProxyType(folded_to_label),
+            folded_to_uri=MappingProxyType(folded_to_uri),
+            trigrams=MappingProxyType({gram: frozenset(terms) for gram, terms in postings.items()}),
+        )
+    
+    def canonical_label(self, value: Any) -> Any:
+        """The concept label a value stands for, ignoring case and resolving altLabels (value itself if none)."""
+        if not isinstance(value, str) or value in self.labels:
+            return value
+        return self.folded_to_label.get(value.strip().casefold(), value)
+    
+    def nearest_label(self, value: str, shortlist: int = 10) -> Optional[Tuple[str, float]]:
+        """(label, similarity 0..1) of the label or altLabel closest to value.
+        
+        Terms sharing the most trigrams with the value are shortlisted, then
+        compared by edit similarity (difflib ratio, case-insensitive).
+        """
+        folded = value.strip().casefold()
+        if not folded:
+            return None
+        shared: Dict[str, int] = {}
+        for gram in _trigrams(folded):
+            for term in self.trigrams.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        if not shared:
+            return None
+        candidates = sorted(shared, key=lambda term: -shared[term])[:shortlist]
+        score, term = max((SequenceMatcher(None, folded, term).ratio(), term) for term in candidates)
+        return self.folded_to_label[term], score
+
+    def __reduce__(self):
+        # MappingProxyType cannot be pickled: the tables are stored as dicts
+        values = [getattr(self, f.name) for f in dataclass_fields(self)]
+        return self._restore, tuple(dict(v) if isinstance(v, MappingProxyType) else v for v in values)
+    
+    @classmethod
+    def _restore(cls, *values) -> "VocabularyIndex":
+        return cls(*(MappingProxyType(v) if isinstance(v, dict) else v for v in values))
 
 
 @dataclass
@@ -14,6 +118,13 @@ class Field:
     group_label: str
     prompt: Dict[str, Any]
     system: Dict[str, Any]
+    # Compiled from the vocabulary in __post_init__ (empty if the field has none)
+    vocabulary_index: VocabularyIndex = dataclass_field(init=False, repr=False, compare=False)
+    # Normalization/validation plan, compiled by MetadataValidator on first use (see validator.FieldPlan)
+    validation_plan: Any = dataclass_field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.vocabulary_index = VocabularyIndex.compile(self.get_vocabulary_concepts())
     
     @property
     def path(self) -> str:
@@ -54,36 +165,36 @@ class Field:
 class SchemaManager:
     """Manages schema loading and field access."""
     
-    def __init__(self, schema_dir: str = "schemata"):
+    def __init__(self, schema_dir: str = "schemata", cache_dir: Optional[str] = None):
+        """
+        Args:
+            schema_dir: Directory of the schema JSON files
+            cache_dir: Directory for compiled schema artifacts (default: from SCHEMA_CACHE_DIR env
+                or ".schema_cache" next to schema_dir; "" = always parse the JSON)
+        """
         self.schema_dir = Path(schema_dir)
+        if cache_dir is None:
+            cache_dir = os.getenv("SCHEMA_CACHE_DIR")
+        if cache_dir is None:
+            cache_dir = str(self.schema_dir.resolve().parent / ".schema_cache")
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.schemas: Dict[str, Dict] = {}
         self.fields_cache: Dict[str, List[Field]] = {}
+        self.special_schemas_cache: Dict[str, Dict[str, str]] = {}
+        self.version = 0  # Set by SchemaRegistry for the versions it loads
     
-    def load_schema(self, schema_name: str) -> Dict:
-        """Load a schema file by name."""
-        if schema_name in self.schemas:
-            return self.schemas[schema_name]
-        
+    def _schema_path(self, schema_name: str) -> Path:
         schema_path = self.schema_dir / schema_name
         if not schema_path.exists():
             schema_path = self.schema_dir / f"{schema_name}.json"
         
         if not schema_path.exists():
             raise FileNotFoundError(f"Schema file not found: {schema_name}")
+        return schema_path
         
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema = json.load(f)
-        
-        self.schemas[schema_name] = schema
-        return schema
-    
-    def get_fields(self, schema_name: str) -> List[Field]:
-        """Get all fields from a schema as Field objects."""
-        if schema_name in self.fields_cache:
-            return self.fields_cache[schema_name]
-        
-        schema = self.load_schema(schema_name)
-        fields = [
+    @staticmethod
+    def _compile(schema: Dict) -> List[Field]:
+        return [
             Field(
                 id=f["id"],
                 group=f.get("group", ""),
@@ -94,8 +205,74 @@ class SchemaManager:
             for f in schema.get("fields", [])
         ]
         
-        self.fields_cache[schema_name] = fields
-        return fields
+    def _load(self, schema_name: str) -> None:
+        """Load schema and fields from the compiled artifact, or parse and compile the JSON file.
+        
+        Artifacts are keyed by the resolved schema path, so schema directories sharing a
+        cache directory keep their own. An artifact is valid while the file's mtime and size
+        are unchanged. Otherwise the content hash decides: a touched but unchanged file
+        (e.g. a fresh checkout) reuses the artifact, a changed one is parsed and compiled again.
+        """
+        schema_path = self._schema_path(schema_name)
+        stat = schema_path.stat()
+        signature = (SCHEMA_CACHE_FORMAT, stat.st_mtime_ns, stat.st_size)
+        if self.cache_dir is None:
+            schema = json.loads(schema_path.read_bytes().decode('utf-8'))
+            self.schemas[schema_name], self.fields_cache[schema_name] = schema, self._compile(schema)
+            return
+        
+        path_key = hashlib.sha256(str(schema_path.resolve()).encode('utf-8')).hexdigest()[:16]
+        artifact_path = self.cache_dir / f"{schema_path.name}.{path_key}.pickle"
+        content = digest = None
+        try:
+            with open(artifact_path, 'rb') as f:
+                header = pickle.load(f)  # (format, mtime_ns, size, content hash)
+                if header[:3] != signature and header[0] == SCHEMA_CACHE_FORMAT:
+                    content = schema_path.read_bytes()
+                    digest = hashlib.sha256(content).hexdigest()
+                if header[:3] == signature or digest == header[3]:
+                    schema, fields = pickle.load(f)
+                    self.schemas[schema_name], self.fields_cache[schema_name] = schema, fields
+                    if digest is not None:
+                        self._store(artifact_path, signature + (digest,), (schema, fields))
+                    return
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Schema-Cache '{artifact_path}' unlesbar ({e}). Baue neu...")
+        
+        if content is None:
+            content = schema_path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()
+        schema = json.loads(content.decode('utf-8'))
+        fields = self._compile(schema)
+        self.schemas[schema_name], self.fields_cache[schema_name] = schema, fields
+        self._store(artifact_path, signature + (digest,), (schema, fields))
+    
+    @staticmethod
+    def _store(artifact_path: Path, header: Tuple, payload: Tuple) -> None:
+        """Write the artifact atomically; other processes see the old or the new file, never a partial one."""
+        try:
+            artifact_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = artifact_path.with_name(f"{artifact_path.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, artifact_path)
+        except OSError as e:
+            print(f"⚠️ Schema-Cache '{artifact_path}' nicht schreibbar: {e}")
+    
+    def load_schema(self, schema_name: str) -> Dict:
+        """Load a schema file by name."""
+        if schema_name not in self.schemas:
+            self._load(schema_name)
+        return self.schemas[schema_name]
+    
+    def get_fields(self, schema_name: str) -> List[Field]:
+        """Get all fields from a schema as Field objects."""
+        if schema_name not in self.fields_cache:
+            self._load(schema_name)
+        return self.fields_cache[schema_name]
     
     def get_required_fields(self, schema_name: str) -> List[Field]:
         """Get only required fields from a schema."""
@@ -128,11 +305,16 @@ class SchemaManager:
     
     def get_available_special_schemas(self, schema_name: str = "core.json") -> Dict[str, str]:
         """Get available special schemas from the content type field.
-        Only returns schemas where the file actually exists.
+        Only returns schemas where the file actually exists (checked once, on first call).
         
         Returns:
             Dict mapping label to schema_file
         """
+        if schema_name not in self.special_schemas_cache:
+            self.special_schemas_cache[schema_name] = self._special_schemas(schema_name)
+        return dict(self.special_schemas_cache[schema_name])
+    
+    def _special_schemas(self, schema_name: str) -> Dict[str, str]:
         content_type_field = self.get_content_type_field(schema_name)
         if not content_type_field:
             return {}
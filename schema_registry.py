@@ -0,0 +1,200 @@
+"""Hot-reloading schema registry: watches the schema directory and swaps in recompiled versions."""
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from schema_loader import SchemaManager
+
+# inotify events that change a schema file: written, moved in/out (atomic saves), deleted, touched
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_DELETE = 0x200
+_EVENTS = _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE
+# Editors often write several files in a row - wait for them before recompiling
+_DEBOUNCE = 0.2
+
+
+class _Inotify:
+    """Minimal inotify binding (Linux, via ctypes). Raises AttributeError or OSError where unavailable."""
+    
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), _EVENTS) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+    
+    def wait(self, timeout: float) -> bool:
+        """True if files changed within timeout seconds (the pending events are consumed)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+    
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class SchemaRegistry:
+    """Versioned snapshots of a schema directory, reloaded when its files change.
+
+    Every version is a SchemaManager with all schemas, fields and the content
+    type -> schema map loaded up front, so lookups never touch the disk. A reload
+    compiles the changed directory into a new manager (unchanged files come from
+    the compiled schema cache) and swaps it in with a single assignment: readers
+    see the old or the new version, never a mix. Running sessions keep their
+    version via get(version); the last keep_versions versions stay available.
+    """
+    
+    def __init__(self, schema_dir: str = "schemata", cache_dir: Optional[str] = None, keep_versions: int = 16):
+        self.schema_dir = Path(schema_dir)
+        self.cache_dir = cache_dir
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()  # Serializes reloads
+        self._listeners: List[weakref.WeakMethod] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signature = self._directory_signature()
+        self.current = self._compile(1)
+        self._versions: Dict[int, SchemaManager] = {1: self.current}
+    
+    @property
+    def version(self) -> int:
+        return self.current.version
+    
+    def get(self, version: Optional[int] = None) -> SchemaManager:
+        """The schemas of the given version (the current one if None).
+
+        Raises KeyError if the version is unknown or no longer kept.
+        """
+        if version is None:
+            return self.current
+        manager = self._versions.get(version)
+        if manager is None:
+            raise KeyError(f"Schema version {version} is not available (kept: {sorted(self._versions)})")
+        return manager
+    
+    def subscribe(self, method: Callable[[SchemaManager], None]) -> None:
+        """Call a bound method with the new manager after each reload (held weakly)."""
+        self._listeners.append(weakref.WeakMethod(method))
+    
+    def _directory_signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        signature = []
+        for path in sorted(self.schema_dir.glob("*.json")):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Deleted while listing
+                continue
+            signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+    
+    def _compile(self, version: int) -> SchemaManager:
+        manager = SchemaManager(str(self.schema_dir), cache_dir=self.cache_dir)
+        for path in sorted(self.schema_dir.glob("*.json")):
+            manager.get_fields(path.name)
+        manager.get_available_special_schemas()
+        manager.version = version
+        return manager
+    
+    def reload_if_changed(self) -> bool:
+        """Recompile and swap in a new version if a schema file changed. Returns True if it did.
+
+        A directory that does not compile (e.g. a file saved halfway) keeps the
+        current version; the next change is tried again.
+        """
+        with self._lock:
+            signature = self._directory_signature()
+            if signature == self._signature:
+                return False
+            self._signature = signature
+            try:
+                manager = self._compile(self.current.version + 1)
+            except Exception as e:
+                print(f"⚠️ Schemata nicht neu geladen ({e}). Version {self.current.version} bleibt aktiv.")
+                return False
+            self._versions[manager.version] = manager
+            for old in sorted(self._versions)[:-self.keep_versions]:
+                del self._versions[old]
+            self.current = manager
+        
+        print(f"🔄 Schemata neu geladen: Version {manager.version}")
+        for listener in list(self._listeners):
+            method = listener()
+            if method is None:
+                self._listeners.remove(listener)
+            else:
+                method(manager)
+        return True
+    
+    def start(self, poll_interval: float = 2.0) -> None:
+        """Watch the schema directory in a daemon thread.
+
+        Uses inotify where available; every poll_interval seconds the directory is
+        also compared by mtime and size (the only check without inotify, e.g. on
+        macOS or network file systems).
+        """
+        if self._thread is not None:
+            return
+        try:
+            watcher = _Inotify(self.schema_dir)
+        except (AttributeError, OSError):
+            watcher = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(watcher, poll_interval),
+                                        name="schema-registry", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop watching (waits for the watcher thread)."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+    
+    def _watch(self, watcher: Optional[_Inotify], poll_interval: float) -> None:
+        try:
+            while not self._stop.is_set():
+                if watcher is None:
+                    self._stop.wait(poll_interval)
+                elif watcher.wait(poll_interval):
+                    self._stop.wait(_DEBOUNCE)
+                if self._stop.is_set():
+                    break
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    print(f"⚠️ Schema-Überwachung: {e}")
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+
+_shared: Dict[Tuple[str, Optional[str]], SchemaRegistry] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_registry(schema_dir: str = "schemata", cache_dir: Optional[str] = None) -> SchemaRegistry:
+    """One registry per schema directory and process, shared by all agents (one watcher thread)."""
+    key = (os.path.abspath(schema_dir), cache_dir)
+    with _shared_lock:
+        registry = _shared.get(key)
+        if registry is None:
+            registry = SchemaRegistry(schema_dir, cache_dir)
+            _shared[key] = registry
+        return registry
@@ -0,0 +1,217 @@
+"""Compile Field definitions into JSON Schemas for Structured Outputs."""
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from schema_loader import Field
+
+# Scalar datatypes of the schema files -> JSON Schema types
+_SCALAR_TYPES = {
+    "string": "string",
+    "uri": "string",
+    "date": "string",
+    "datetime": "string",
+    "integer": "integer",
+    "number": "number",
+    "boolean": "boolean",
+}
+
+
+# Extra answer key of fused extraction calls: the detected content type
+CONTENT_TYPE_KEY = "_content_type"
+
+
+class _NotRepresentable(Exception):
+    """A field shape cannot be expressed in strict mode."""
+
+
+def _nullable(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Allow null in addition to the schema's type (strict mode needs every key, so absent = null)."""
+    if "anyOf" in schema:
+        return {"anyOf": schema["anyOf"] + [{"type": "null"}]}
+    schema = dict(schema)
+    schema["type"] = [schema["type"], "null"]
+    if "enum" in schema:
+        schema["enum"] = schema["enum"] + [None]
+    return schema
+
+
+def _scalar_schema(datatype: str) -> Dict[str, Any]:
+    datatype = (datatype or "string").rstrip("?")
+    if datatype.startswith("union("):
+        return {"type": "string"}
+    if datatype not in _SCALAR_TYPES:
+        raise _NotRepresentable(datatype)
+    return {"type": _SCALAR_TYPES[datatype]}
+
+
+def _shape_schema(shape: Dict[str, Any]) -> Dict[str, Any]:
+    """Object schema from a field shape.
+
+    Shapes come in several notations across the schema files:
+    {"name": {"type": "string"}}, {"name": "string", "url": "uri?"} and nested
+    objects without "type". "@type" entries only document the schema.org type;
+    {"oneOf": [...]} lists alternative shapes.
+    """
+    if "oneOf" in shape:
+        alternatives = []
+        for alternative in shape["oneOf"]:
+            try:
+                alternatives.append(_shape_schema(alternative))
+            except _NotRepresentable:
+                continue
+        if not alternatives:
+            raise _NotRepresentable("oneOf")
+        return alternatives[0] if len(alternatives) == 1 else {"anyOf": alternatives}
+    
+    properties = {}
+    for key, spec in shape.items():
+        if key.startswith("@"):
+            continue
+        if isinstance(spec, str):
+            prop = _scalar_schema(spec)
+        elif isinstance(spec, dict) and "type" in spec:
+            if spec["type"] == "array":
+                prop = {"type": "array", "items": {"type": "string"}}
+            elif spec["type"] == "object" and "shape" in spec:
+                prop = _shape_schema(spec["shape"])
+            else:
+                prop = _scalar_schema(spec["type"])
+        elif isinstance(spec, dict):
+            prop = _shape_schema(spec)
+        else:
+            raise _NotRepresentable(key)
+        properties[key] = _nullable(prop)
+    
+    if not properties:
+        raise _NotRepresentable("empty shape")
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def _item_schema(system: Dict[str, Any], datatype: str) -> Dict[str, Any]:
+    """Schema of a single value of a field."""
+    vocabulary = system.get("vocabulary") or {}
+    if vocabulary.get("type") == "closed" and vocabulary.get("concepts"):
+        labels = [c["label"] for c in vocabulary["concepts"] if c.get("label")]
+        return {"type": "string", "enum": labels}
+    
+    items = system.get("items")
+    shape = system.get("shape")
+    if isinstance(items, dict):
+        shape = items.get("shape", shape)
+        if shape is None:
+            return _scalar_schema(items.get("datatype") or items.get("type"))
+    if datatype in ("object", "array") and shape:
+        return _shape_schema(shape)
+    if datatype == "array":
+        return {"type": "string"}
+    return _scalar_schema(datatype)
+
+
+def field_json_schema(field: Field) -> Dict[str, Any]:
+    """Nullable JSON Schema for the value of one field.
+
+    Raises:
+        _NotRepresentable: If the field cannot be expressed in strict mode (e.g. free-form JSON)
+    """
+    system = field.system
+    datatype = field.datatype
+    item = _item_schema(system, datatype)
+    if datatype == "array" or field.multiple:
+        return _nullable({"type": "array", "items": item})
+    return _nullable(item)
+
+
+def build_response_schema(fields: List[Field], name: str, content_types: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Compile fields into a JSON Schema response format.
+
+    All field ids are required keys (null = not found) and no other keys are allowed.
+    Fields that cannot be expressed in strict mode accept any value; the schema
+    is then sent non-strict. With content_types, the answer also carries the
+    detected content type under CONTENT_TYPE_KEY (fused extraction).
+
+    Returns:
+        Dict with "name", "schema" and "strict"
+    """
+    properties = {}
+    strict = True
+    for field in fields:
+        try:
+            properties[field.id] = field_json_schema(field)
+        except _NotRepresentable:
+            properties[field.id] = {}
+            strict = False
+    if content_types:
+        properties[CONTENT_TYPE_KEY] = _nullable({"type": "string", "enum": list(content_types)})
+    
+    return {
+        "name": re.sub(r"[^a-zA-Z0-9_-]", "_", name)[:64],
+        "schema": {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        },
+        "strict": strict,
+    }
+
+
+class FieldListCache:
+    """Bounded LRU cache of values built from a field list (and the content types of fused calls).
+
+    The field lists of a phase come from the SchemaManager's cache, so the
+    tuple of Field objects identifies the (schema file, phase, schema version)
+    combination. Entries keep their fields alive - an id in a key cannot be
+    reused by another object while the entry exists. Old schema versions are
+    released by eviction or clear() (called when the registry swaps versions).
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (fields, value)
+        self._lock = threading.Lock()
+    
+    def get_or_build(self, fields: List[Field], content_types: Optional[List[str]], build: Callable[[], Any]) -> Any:
+        key = (tuple(map(id, fields)), tuple(content_types or ()))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = build()
+        with self._lock:
+            self._entries[key] = (tuple(fields), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseSchemaCache(FieldListCache):
+    """Compiled response schemas per (schema file, phase, schema version)."""
+    
+    def get(self, fields: List[Field], name: Optional[str] = None,
+            content_types: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self.get_or_build(fields, content_types,
+                                 lambda: build_response_schema(fields, name or "metadata_extraction", content_types))
+
+
+def strip_nulls(value: Any) -> Any:
+    """Drop null members of nested objects (strict schemas force every key to be present)."""
+    if isinstance(value, dict):
+        return {k: strip_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [strip_nulls(v) for v in value if v is not None]
+    return value
@@ -0,0 +1,164 @@
+"""Test script for the batch runner against the local fake batch endpoint (no API calls)."""
+import json
+import tempfile
+from agent import MetadataAgent
+from batch_runner import BatchRunner, LocalBatchClient
+
+ANSWERS = {
+    "cclom:title": "Tagung Zukunft der Hochschullehre",
+    "cclom:general_description": "Tagung zu innovativen Lehrformaten und digitalen Prüfungen.",
+    "cclom:general_keyword": ["Hochschullehre", "Digitale Prüfungen"],
+    "schema:startDate": "2026-09-15",
+}
+
+
+def fake_responder(url, body):
+    """Rule-based model: content type -> 'Veranstaltung', extraction -> known values for the requested fields."""
+    prompt = body["input"]
+    if "Verfügbare Inhaltsarten" in prompt:
+        text = "Veranstaltung"
+    else:
+        properties = body["text"]["format"]["schema"]["properties"]
+        text = json.dumps({field_id: ANSWERS.get(field_id) for field_id in properties}, ensure_ascii=False)
+    return {
+        "id": "resp_fake",
+        "output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}],
+        "usage": {"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+    }
+
+
+def test_batch_runner_local():
+    """Two records run through both batch stages and end up in per-record states."""
+    print("=" * 60)
+    print("🧪 Test: Batch-Runner (lokaler Fake-Endpunkt)")
+    print("=" * 60)
+    
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini")
+    client = LocalBatchClient(fake_responder)
+    records = [
+        {"id": "a", "text": "Die Tagung findet am 15. September 2026 statt."},
+        {"id": "b", "text": "Tagung zur Hochschullehre.", "content_type": "Veranstaltung"},
+    ]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        runner = BatchRunner(agent, client=client, work_dir=work_dir, poll_interval=0)
+        states = runner.run(records)
+    
+    assert set(states) == {"a", "b"}
+    for record_id, state in states.items():
+        print(f"\n📄 {record_id}: {state.selected_content_types} {state.special_schemas}")
+        assert state.metadata["cclom:title"] == ANSWERS["cclom:title"]
+        assert state.metadata["cclom:general_keyword"] == ANSWERS["cclom:general_keyword"]
+        assert state.selected_content_types == ["Veranstaltung"]
+        assert state.metadata.get("schema:startDate") == "2026-09-15"
+    
+    print("\n✅ Batch-Runner liefert vollständige States")
+
+
+def test_batch_runner_split():
+    """Stages above the request and size limits are split into several batches with the same results."""
+    print("\n" + "=" * 60)
+    print("🧪 Test: Batch-Runner (Aufteilung nach Batch-Limits)")
+    print("=" * 60)
+    
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini")
+    records = [{"id": str(i), "text": "Die Tagung findet am 15. September 2026 statt."} for i in range(5)]
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        client = LocalBatchClient(fake_responder)
+        states = BatchRunner(agent, client=client, work_dir=work_dir, poll_interval=0).run(records)
+        single = len(client._batches)
+        client = LocalBatchClient(fake_responder)
+        runner = BatchRunner(agent, client=client, work_dir=work_dir, poll_interval=0, max_requests=4)
+        split_states = runner.run(records)
+        by_count = len(client._batches)
+        # Requests of one batch, concatenated
+        request_sizes = [len(line.encode("utf-8")) + 1 for line in
+                         open(f"{work_dir}/core_requests_1.jsonl", encoding="utf-8").read().splitlines()]
+        client = LocalBatchClient(fake_responder)
+        runner = BatchRunner(agent, client=client, work_dir=work_dir, poll_interval=0, max_bytes=max(request_sizes) + 1)
+        size_states = runner.run(records)
+        by_size = len(client._batches)
+    
+    print(f"\n📦 Batches: {single} ohne Limit, {by_count} mit max. 4 Requests, {by_size} mit Größenlimit")
+    assert single == 2  # One per stage
+    assert by_count > single and by_size > by_count
+    for record_id, state in states.items():
+        assert split_states[record_id].metadata == state.metadata
+        assert size_states[record_id].metadata == state.metadata
+    print("\n✅ Aufgeteilte Batches liefern dieselben States")
+
+
+
+def test_batch_runner_long_document():
+    """Long documents are sent per chunk and field shard and reduced like in a headless run."""
+    print("\n" + "=" * 60)
+    print("🧪 Test: Batch-Runner (lange Dokumente)")
+    print("=" * 60)
+    
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini")
+    agent.long_document_tokens, agent.long_document_chunk_tokens = 50, 30
+    paragraphs = [f"Absatz {i}: Die Tagung zur Hochschullehre findet am 15. September 2026 statt." for i in range(6)]
+    text = "\n\n".join(paragraphs)
+    prompts = []
+    
+    def responder(url, body):
+        prompts.append(body["input"])
+        return fake_responder(url, body)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        runner = BatchRunner(agent, client=LocalBatchClient(responder), work_dir=work_dir, poll_interval=0)
+        state = runner.run([{"id": "a", "text": text}])["a"]
+    
+    chunks = len(agent._document_chunks(text))
+    per_prompt = [sum(paragraph in prompt for paragraph in paragraphs) for prompt in prompts]
+    print(f"\n📄 {chunks} Chunks, {len(prompts)} Requests, Absätze pro Request: {max(per_prompt)}")
+    assert chunks > 1 and max(per_prompt) == 1  # No request carries the whole document
+    assert state.metadata["cclom:title"] == ANSWERS["cclom:title"]
+    assert "_provenance" not in state.metadata
+    assert len(state.field_status["cclom:title"].provenance[0]["chunks"]) == chunks
+    print("\n✅ Lange Dokumente werden pro Chunk angefragt und zusammengeführt")
+
+
+
+class FailingBatchClient(LocalBatchClient):
+    """Local batch endpoint whose second batch fails as a whole (no output and no error file)."""
+    
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch = super()._create_batch(input_file_id, endpoint, completion_window)
+        if len(self._batches) == 2:
+            batch.status, batch.output_file_id, batch.error_file_id = "failed", None, None
+        return batch
+
+
+def test_batch_runner_failures():
+    """Failed requests and failed batches only cost their own records - the others keep their results."""
+    print("\n" + "=" * 60)
+    print("🧪 Test: Batch-Runner (fehlgeschlagene Requests und Batches)")
+    print("=" * 60)
+    
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini")
+    records = [{"id": str(i), "text": f"Tagung {i} am 15. September 2026."} for i in range(4)]
+    
+    def responder(url, body):
+        if "Tagung 3" in body["input"]:
+            raise RuntimeError("Server error")
+        return fake_responder(url, body)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        client = FailingBatchClient(responder)
+        states = BatchRunner(agent, client=client, work_dir=work_dir, poll_interval=0, max_requests=3).run(records)
+    
+    titles = {record_id: state.metadata.get("cclom:title") for record_id, state in states.items()}
+    print(f"\n📄 Titel: {titles}")
+    assert titles["0"] == ANSWERS["cclom:title"]  # First batch: complete
+    assert not titles["3"]  # Its requests went to the error file
+    assert sum(1 for title in titles.values() if title) == 2  # The failed batch held the requests of one record
+    print("\n✅ Fehler betreffen nur die eigenen Requests")
+
+
+if __name__ == "__main__":
+    test_batch_runner_local()
+    test_batch_runner_split()
+    test_batch_runner_long_document()
+    test_batch_runner_failures()
@@ -0,0 +1,114 @@
+"""Test script for sharding large field lists over concurrent extraction calls (no API calls)."""
+import os
+from collections import Counter
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from schema_loader import SchemaManager
+
+SCHEMA_MANAGER = SchemaManager()
+SCHEMAS = sorted(name for name in os.listdir("schemata") if name.endswith(".json"))
+TEXT = "Workshop Python für Einsteiger am 15. September 2026 in Berlin. Dauer: 3 Stunden. https://example.org/python"
+
+
+class RecordingTransport(FakeModelTransport):
+    """Fake model that keeps the response schemas it is asked to fill."""
+    
+    def __init__(self):
+        super().__init__()
+        self.schemas = []
+    
+    def create(self, request, timeout=None):
+        self.schemas.append(self._response_schema(request))
+        return super().create(request, timeout)
+
+
+def fake_agent(shard_size, transport=None):
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=transport or FakeModelTransport())
+    agent.cache = None
+    agent.field_shard_size = shard_size
+    return agent
+
+
+def test_every_field_once():
+    print("=" * 60)
+    print("🧪 Test: Jedes Feld in genau einem Shard")
+    print("=" * 60)
+    agent = fake_agent(0)
+    for name in SCHEMAS:
+        fields = SCHEMA_MANAGER.get_fields(name)
+        for size in (0, 1, 2, 3, 5, 12, len(fields), len(fields) + 1):
+            agent.field_shard_size = size
+            shards = agent._shard_fields(fields)
+            # Every field exactly once (grouped by schema group, so not necessarily in schema order)
+            flat = Counter(field.id for shard in shards for field in shard)
+            assert flat == Counter(field.id for field in fields) and all(n == 1 for n in flat.values()), f"{name}, {size}"
+            if size <= 0 or len(fields) <= size:
+                assert shards == [fields]
+                continue
+            assert all(shard for shard in shards)
+            assert all(len(shard) <= size for shard in shards), f"{name}, {size}"
+            # Groups are only split if they do not fit into one shard
+            for group, count in Counter(field.group for field in fields).items():
+                if count <= size:
+                    assert sum(any(f.group == group for f in shard) for shard in shards) == 1, f"{name}, {size}, {group}"
+        agent.field_shard_size = 5
+        print(f"   {name}: {len(fields)} Felder, {len(agent._shard_fields(fields))} Shards bei 5")
+    print("\n✅ Shards decken alle Felder genau einmal ab")
+
+
+def test_merge_shards():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Zusammenführen der Shard-Antworten")
+    print("=" * 60)
+    fields = SCHEMA_MANAGER.get_fields("core.json")
+    agent = fake_agent(3)
+    shards = agent._shard_fields(fields)
+    owner_of_keywords = next(i for i, shard in enumerate(shards) if any(f.id == "cclom:general_keyword" for f in shard))
+    
+    # Each shard answers its own fields: every field ends up in the result exactly once
+    results = [{field.id: f"{field.id}@{i}" for field in shard} for i, shard in enumerate(shards)]
+    merged = agent._merge_shards(results, shards)
+    assert merged == {field.id: f"{field.id}@{i}" for i, shard in enumerate(shards) for field in shard}
+    assert len(merged) == len(fields)
+    
+    # A shard answering a field of another shard does not override the owner
+    results = [{} for _ in shards]
+    other = (owner_of_keywords + 1) % len(shards)
+    results[other]["cclom:general_keyword"] = ["Fremd"]
+    results[owner_of_keywords]["cclom:general_keyword"] = ["Python"]
+    assert agent._merge_shards(results, shards)["cclom:general_keyword"] == ["Python"]
+    assert agent._merge_shards(results[::-1], shards[::-1])["cclom:general_keyword"] == ["Python"]
+    
+    # With "union", list values of all shards are combined without duplicates
+    agent.field_shard_merge = "union"
+    results[other]["cclom:general_keyword"] = ["Python", "Fremd"]
+    merged = agent._merge_shards(results, shards)["cclom:general_keyword"]
+    print(f"   union: {merged}")
+    assert sorted(merged) == ["Fremd", "Python"]
+    print("\n✅ Der eigene Shard gewinnt, union vereinigt Listen")
+
+
+def test_sharded_extraction():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Sharded Extraktion")
+    print("=" * 60)
+    fields = [f for f in SCHEMA_MANAGER.get_fields("event.json") if f.ai_fillable]
+    expected = fake_agent(0)._extract_fields(TEXT, fields, {})
+    
+    transport = RecordingTransport()
+    agent = fake_agent(3, transport)
+    extracted = agent._extract_fields(TEXT, fields, {})
+    asked = Counter(field_id for schema in transport.schemas for field_id in schema["properties"])
+    print(f"   {len(transport.schemas)} Calls, {len(asked)} Felder angefragt")
+    assert len(transport.schemas) > 1 and all(len(schema["properties"]) <= 3 for schema in transport.schemas)
+    assert set(asked.values()) == {1}  # No field is asked twice ...
+    rule_values = agent.rule_extractor.extract(TEXT, fields)
+    assert set(asked) | set(rule_values) == {f.id for f in fields}  # ... and none is left out
+    assert extracted == expected
+    print("\n✅ Sharding ändert das Ergebnis nicht")
+
+
+if __name__ == "__main__":
+    test_every_field_once()
+    test_merge_shards()
+    test_sharded_extraction()
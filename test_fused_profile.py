@@ -0,0 +1,93 @@
+"""Test script for the fused extraction profile: one LLM call per stage (no API calls)."""
+import json
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from schema_loader import SchemaManager
+from structured_output import CONTENT_TYPE_KEY
+
+SCHEMA_MANAGER = SchemaManager()
+TEXT = "Workshop Python für Einsteiger am 15. September 2026 in Berlin. Dauer: 3 Stunden. https://example.org/python"
+REQUIRED = SCHEMA_MANAGER.get_required_fields("core.json")
+OPTIONAL = [f for f in SCHEMA_MANAGER.get_optional_fields("core.json") if f.ai_fillable]
+TYPES = list(SCHEMA_MANAGER.get_available_special_schemas("core.json"))
+PARTS = {
+    "core_required": ("fields", TEXT, REQUIRED),
+    "core_optional": ("fields", TEXT, OPTIONAL),
+    "content_type": ("content_type", TEXT, TYPES),
+}
+
+
+def fake_agent():
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=FakeModelTransport())
+    agent.cache = None
+    return agent
+
+
+def test_missing_section():
+    print("=" * 60)
+    print("🧪 Test: Fehlender Abschnitt in der Antwort")
+    print("=" * 60)
+    agent = fake_agent()
+    # Only the required core fields were answered: no optional fields, no content type
+    answer = {"cclom:title": "Workshop Python", "cclom:general_keyword": ["Python"]}
+    results = agent._parse_fused_output(json.dumps(answer), PARTS)
+    print(f"   {results}")
+    assert set(results) == set(PARTS)  # Every job gets a result ...
+    assert results["core_required"] == answer
+    assert results["core_optional"] == {}  # ... empty if its section is missing
+    assert results["content_type"] == []
+    
+    # Null answers count as missing, too
+    answer = {field.id: None for field in REQUIRED + OPTIONAL}
+    answer[CONTENT_TYPE_KEY] = None
+    results = agent._parse_fused_output(json.dumps(answer), PARTS)
+    assert results == {"core_required": {}, "core_optional": {}, "content_type": []}
+    print("\n✅ Fehlende Abschnitte ergeben leere Ergebnisse")
+
+
+def test_extra_section():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Zusätzlicher Abschnitt in der Antwort")
+    print("=" * 60)
+    agent = fake_agent()
+    answer = {
+        "cclom:title": "Workshop Python",
+        "schema:startDate": "2026-09-15",  # Field of the special schema - not asked in this stage
+        "schema:location": {"name": "Berlin"},
+        "unbekannt": "x",
+        CONTENT_TYPE_KEY: "Raumschiff",  # Not one of the offered content types
+    }
+    results = agent._parse_fused_output(json.dumps(answer), PARTS)
+    print(f"   {results}")
+    assert results["core_required"] == {"cclom:title": "Workshop Python"}
+    assert results["core_optional"] == {}
+    assert results["content_type"] == []
+    assert not any(k in result for result in results.values() if isinstance(result, dict)
+                   for k in ("schema:startDate", "schema:location", "unbekannt", CONTENT_TYPE_KEY))
+    
+    # A field asked by one job is not leaked into another
+    optional_id = OPTIONAL[0].id
+    results = agent._parse_fused_output(json.dumps({optional_id: "de", CONTENT_TYPE_KEY: TYPES[0]}), PARTS)
+    assert optional_id not in results["core_required"]
+    assert results["content_type"] == [TYPES[0]]
+    print("\n✅ Nicht angefragte Felder und Inhaltsarten werden verworfen")
+
+
+def test_fused_matches_phased():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Fused vs. Phased")
+    print("=" * 60)
+    states = {profile: fake_agent().run_headless(TEXT, profile=profile) for profile in ("phased", "fused")}
+    calls = {profile: state.performance.llm_totals()["calls"] for profile, state in states.items()}
+    print(f"   LLM-Calls: {calls}")
+    assert calls["fused"] == 2  # One call per stage
+    assert calls["phased"] > calls["fused"]
+    assert states["fused"].special_schemas == states["phased"].special_schemas == ["event.json"]
+    assert states["fused"].metadata == states["phased"].metadata
+    print("\n✅ Gleiche Metadaten mit einem Call pro Stufe")
+
+
+if __name__ == "__main__":
+    test_missing_section()
+    test_extra_section()
+    test_fused_matches_phased()
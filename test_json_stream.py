@@ -0,0 +1,115 @@
+"""Test script for the incremental JSON parser of streamed extraction answers (no API calls)."""
+import json
+from json_stream import IncrementalJSONObjectParser, parse_json_object
+
+ANSWER = json.dumps({
+    "cclom:title": "Workshop \"Python\" {für} Einsteiger\\",
+    "cclom:general_keyword": ["Python", "a]b", {"x": "}"}],
+    "schema:location": {"name": "Berlin", "address": {"street": "Unter den Linden 6", "geo": [52.5, 13.4]}},
+    "schema:maximumAttendeeCapacity": 25,
+    "schema:isAccessibleForFree": False,
+    "schema:duration": None,
+    "cclom:general_description": "Zeile 1\nZeile 2 ä \\\" ,}",
+}, ensure_ascii=False, indent=1)
+
+
+def feed_all(chunks):
+    """Members in the order the parser emitted them, with the number of the chunk that completed them."""
+    parser = IncrementalJSONObjectParser()
+    emitted = []
+    for number, chunk in enumerate(chunks):
+        emitted.extend((key, value, number) for key, value in parser.feed(chunk))
+    return parser, emitted
+
+
+def completed_at(key, value):
+    """Position of the first character after which the prefix of ANSWER holds the full member."""
+    for position in range(len(ANSWER)):
+        try:
+            parsed = json.loads(ANSWER[:position + 1].rstrip(",") + "}")
+        except ValueError:
+            continue
+        if key in parsed and parsed[key] == value:
+            return position
+    raise AssertionError(f"{key} nicht in ANSWER")
+
+
+def test_every_split():
+    print("=" * 60)
+    print("🧪 Test: Jede Trennstelle")
+    print("=" * 60)
+    expected = list(json.loads(ANSWER).items())
+    # Two chunks split at every position: inside strings, escapes, nested objects/arrays and scalars
+    for position in range(len(ANSWER) + 1):
+        parser, emitted = feed_all([ANSWER[:position], ANSWER[position:]])
+        assert [(key, value) for key, value, _ in emitted] == expected, f"Trennstelle {position}"
+        assert parser.done
+    # One character per chunk: strings, objects and arrays are emitted with their closing character,
+    # scalars with the comma or brace after them
+    parser, emitted = feed_all(list(ANSWER))
+    assert [(key, value) for key, value, _ in emitted] == expected
+    for key, value, number in emitted:
+        complete = completed_at(key, value)
+        delay = 0 if isinstance(value, (str, list, dict)) else 1
+        assert number == complete + delay, f"{key}: {number} statt {complete + delay}"
+    print(f"   {len(ANSWER) + 1} Trennstellen, {len(expected)} Felder")
+    print("\n✅ Werte sind unabhängig von der Aufteilung")
+
+
+def test_scalar_boundaries():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Zahlen und Literale")
+    print("=" * 60)
+    parser = IncrementalJSONObjectParser()
+    assert parser.feed('{"a": 12') == []  # "12" may still continue
+    assert parser.feed('3') == []
+    assert parser.feed('4, "b": tr') == [("a", 1234)]
+    assert parser.feed('ue') == []
+    assert parser.feed(' }') == [("b", True)]
+    assert parser.done and parser.feed(', "c": 1}') == []  # Nothing after the closing brace
+    
+    parser = IncrementalJSONObjectParser()
+    assert parser.feed('{"a": "x"') == [("a", "x")]  # Strings are complete at their closing quote
+    assert parser.feed('}') == [] and parser.done
+    assert IncrementalJSONObjectParser().feed('{}') == []
+    print("\n✅ Skalare enden erst am Komma oder an der schließenden Klammer")
+
+
+def test_leading_text():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Code-Fence und Prosa vor dem Objekt")
+    print("=" * 60)
+    expected = list(json.loads(ANSWER).items())
+    for prefix in ("```json\n", "Hier ist das Ergebnis:\n\n```\n", "Antwort: "):
+        text = prefix + ANSWER + "\n```\nFertig."
+        for size in (1, 3, 7, 64):
+            _, emitted = feed_all([text[i:i + size] for i in range(0, len(text), size)])
+            assert [(key, value) for key, value, _ in emitted] == expected, f"{prefix!r}, {size}"
+        assert parse_json_object(text) == json.loads(ANSWER)
+    print("\n✅ Text vor und nach dem Objekt wird übersprungen")
+
+
+def test_invalid():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Ungültige Werte")
+    print("=" * 60)
+    parser = IncrementalJSONObjectParser()
+    try:
+        parser.feed('{"a": tru, "b": 1}')
+        raise AssertionError("ValueError erwartet")
+    except ValueError:
+        pass
+    for text in ("keine Antwort", "[1, 2]"):
+        try:
+            parse_json_object(text)
+            raise AssertionError("ValueError erwartet")
+        except ValueError:
+            pass
+    print("\n✅ Ungültiges JSON wirft ValueError")
+
+
+if __name__ == "__main__":
+    test_every_split()
+    test_scalar_boundaries()
+    test_leading_text()
+    test_invalid()
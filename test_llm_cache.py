@@ -0,0 +1,114 @@
+"""Test script for the LLM response cache (no API calls)."""
+import os
+import tempfile
+import time
+from agent import MetadataAgent
+from llm_cache import LLMResponseCache
+from llm_transport import FakeModelTransport
+
+
+class CountingTransport(FakeModelTransport):
+    """Fake model that counts the requests reaching it."""
+    
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+    
+    def create(self, request, timeout=None):
+        self.requests += 1
+        return super().create(request, timeout)
+
+
+def response(text):
+    return {"output_text": text, "response_id": None, "tokens": 10, "input_tokens": 8, "output_tokens": 2, "cached_tokens": 0}
+
+
+def test_memory_lru():
+    print("=" * 60)
+    print("🧪 Test: In-Memory-LRU")
+    print("=" * 60)
+    cache = LLMResponseCache(path="", ttl=0, memory_entries=2)
+    cache.set("a", response("A"))
+    cache.set("b", response("B"))
+    assert cache.get("a")["output_text"] == "A"  # "a" is now the most recently used entry
+    cache.set("c", response("C"))
+    print(f"   {cache.stats}")
+    assert cache.get("b") is None  # Least recently used: evicted
+    assert cache.get("a")["output_text"] == "A"
+    assert cache.get("c")["output_text"] == "C"
+    assert cache.stats["evictions"] == 1
+    
+    # Entries are copies - changing a result does not change the cache
+    cache.get("a")["output_text"] = "geändert"
+    assert cache.get("a")["output_text"] == "A"
+    print("\n✅ LRU verdrängt den am längsten nicht genutzten Eintrag")
+
+
+def test_ttl():
+    print("\n" + "=" * 60)
+    print("🧪 Test: TTL")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = LLMResponseCache(path=os.path.join(directory, "cache.sqlite"), ttl=0.2)
+        cache.set("a", response("A"))
+        assert cache.get("a") is not None
+        time.sleep(0.3)
+        assert cache.get("a") is None  # Expired in memory and on disk
+        assert LLMResponseCache(path=os.path.join(directory, "cache.sqlite"), ttl=0.2).get("a") is None
+        print(f"   {cache.stats}")
+    print("\n✅ Abgelaufene Einträge zählen als Miss")
+
+
+def test_sqlite_hits():
+    print("\n" + "=" * 60)
+    print("🧪 Test: SQLite-Backend")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite")
+        LLMResponseCache(path=path, ttl=0).set("a", response("A"))
+        
+        # A new process (new cache object) finds the answer on disk, then in memory
+        cache = LLMResponseCache(path=path, ttl=0)
+        assert cache.get("a")["output_text"] == "A"
+        assert cache.get("a")["output_text"] == "A"
+        print(f"   {cache.stats}")
+        assert cache.stats["disk_hits"] == 1 and cache.stats["memory_hits"] == 1
+        assert cache.hit_rate() == 1.0
+        
+        # The disk evicts the least recently used entries above max_entries
+        cache = LLMResponseCache(path=path, ttl=0, max_entries=2, memory_entries=1)
+        cache.set("b", response("B"))
+        cache.get("a")
+        cache.set("c", response("C"))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        
+        cache.clear()
+        assert cache.get("a") is None
+        assert LLMResponseCache(path=path, ttl=0).get("c") is None
+    print("\n✅ Antworten überleben den Prozess, Platte bleibt begrenzt")
+
+
+def test_agent_cache():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Agent-Calls aus dem Cache")
+    print("=" * 60)
+    transport = CountingTransport()
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=transport,
+                          cache=LLMResponseCache(path="", ttl=0))
+    prompt = "Verfügbare Inhaltsarten:\nVeranstaltung\nPerson\n\nText: Tagung zur Hochschullehre"
+    first = agent._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low")
+    second = agent._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low")
+    other = agent._call_gpt5(prompt, reasoning_effort="low", verbosity="low")  # Other options: other key
+    print(f"   {transport.requests} Requests, {agent.cache.stats}")
+    assert second["output_text"] == first["output_text"] and second["cache_hit"]
+    assert transport.requests == 2
+    assert other["output_text"] == first["output_text"]
+    print("\n✅ Gleiche Anfrage: ein Call")
+
+
+if __name__ == "__main__":
+    test_memory_lru()
+    test_ttl()
+    test_sqlite_hits()
+    test_agent_cache()
@@ -0,0 +1,254 @@
+"""Test script for retries and the circuit breaker of LLM calls (no API calls)."""
+import asyncio
+import time
+import httpx
+import openai
+from agent import MetadataAgent
+from instrumentation import recording
+from llm_resilience import (CircuitBreaker, LLMCircuitOpenError, LLMClientError, LLMConnectionError, LLMRateLimitError,
+                            LLMServerError, LLMTimeoutError, RetryPolicy, classify_error)
+from llm_transport import FakeModelTransport
+from models import PerformanceReport
+
+FAST = dict(backoff_base=0.001, backoff_max=0.01)
+
+
+class APIError(Exception):
+    """Stand-in for an HTTP error of the OpenAI client."""
+    
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = httpx.Response(status_code, headers=headers or {})
+
+
+class FlakyTransport(FakeModelTransport):
+    """Fake model whose first `failures` requests fail with the given error."""
+    
+    def __init__(self, failures, error=LLMServerError("503", 503)):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+        self.requests = 0
+    
+    def create(self, request, timeout=None):
+        self.requests += 1
+        if self.requests <= self.failures:
+            raise self.error
+        return super().create(request, timeout)
+    
+    async def create_async(self, request, timeout=None):
+        self.requests += 1
+        if self.requests <= self.failures:
+            raise self.error
+        return await super().create_async(request, timeout)
+
+
+def failing(errors):
+    """Function that raises the given errors one after the other, then returns "ok"."""
+    errors = list(errors)
+    calls = []
+    
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return func, calls
+
+
+def test_error_classification():
+    print("=" * 60)
+    print("🧪 Test: Fehlerklassen")
+    print("=" * 60)
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    cases = [
+        (APIError(429, {"retry-after": "3"}), LLMRateLimitError, True),
+        (APIError(503), LLMServerError, True),
+        (APIError(408), LLMTimeoutError, True),
+        (APIError(401), LLMClientError, False),
+        (openai.APITimeoutError(request=request), LLMTimeoutError, True),
+        (openai.APIConnectionError(request=request), LLMConnectionError, True),
+    ]
+    for error, expected, retryable in cases:
+        classified = classify_error(error)
+        print(f"   {type(error).__name__:20s} -> {type(classified).__name__}")
+        assert type(classified) is expected and classified.retryable == retryable
+    assert classify_error(APIError(429, {"retry-after": "3"})).retry_after == 3.0
+    assert classify_error(APIError(429, {"retry-after-ms": "250"})).retry_after == 0.25
+    assert classify_error(KeyError("output_text")) is None  # Local bug, not an API error
+    print("\n✅ Fehler werden typisiert, Retry-After wird gelesen")
+
+
+def test_retry_policy():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Retries mit Backoff")
+    print("=" * 60)
+    policy = RetryPolicy(max_retries=3, **FAST)
+    
+    # Transient errors are retried until the call succeeds
+    func, calls = failing([APIError(503), APIError(429)])
+    retries = []
+    assert policy.call(func, on_retry=lambda attempt, error: retries.append(type(error).__name__)) == "ok"
+    print(f"   {len(calls)} Versuche, Retries: {retries}")
+    assert len(calls) == 3 and retries == ["LLMServerError", "LLMRateLimitError"]
+    
+    # Client errors are not retried
+    func, calls = failing([APIError(400)])
+    try:
+        policy.call(func)
+        raise AssertionError("LLMClientError erwartet")
+    except LLMClientError:
+        pass
+    assert len(calls) == 1
+    
+    # After max_retries the last error is raised
+    func, calls = failing([APIError(503)] * 10)
+    try:
+        policy.call(func)
+        raise AssertionError("LLMServerError erwartet")
+    except LLMServerError:
+        pass
+    assert len(calls) == 4
+    
+    # Backoff grows exponentially up to backoff_max and respects Retry-After
+    policy = RetryPolicy(max_retries=3, backoff_base=1.0, backoff_max=4.0)
+    assert all(policy.compute_delay(5, LLMServerError("503")) <= 4.0 for _ in range(50))
+    assert policy.compute_delay(0, LLMRateLimitError("429", 429, retry_after=2.5)) >= 2.5
+    assert policy.compute_delay(0, LLMRateLimitError("429", 429, retry_after=60)) <= 4.0
+    
+    # Async variant
+    func, calls = failing([APIError(502)])
+    
+    async def call():
+        return func()
+    assert asyncio.run(RetryPolicy(max_retries=1, **FAST).call_async(call)) == "ok"
+    assert len(calls) == 2
+    print("\n✅ Transiente Fehler werden wiederholt, Client-Fehler nicht")
+
+
+def test_circuit_breaker():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Circuit Breaker")
+    print("=" * 60)
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=0.2)
+    assert breaker.state == "closed"
+    
+    # Rate limits and client errors do not open the circuit
+    for _ in range(3):
+        breaker.record_failure(LLMRateLimitError("429", 429))
+    breaker.record_failure(LLMServerError("503", 503))
+    breaker.record_failure(LLMClientError("400", 400))  # The endpoint answered: counter reset
+    breaker.record_failure(LLMServerError("503", 503))
+    assert breaker.state == "closed"
+    
+    # Consecutive failures open it - calls fail fast
+    breaker.record_failure(LLMServerError("503", 503))
+    print(f"   nach 2 Fehlern: {breaker.state}")
+    assert breaker.state == "open"
+    try:
+        breaker.before_call()
+        raise AssertionError("LLMCircuitOpenError erwartet")
+    except LLMCircuitOpenError as e:
+        assert e.retry_after is not None and e.retry_after <= 0.2
+    
+    # After recovery_time one trial call is let through (half-open); a failed trial opens it again
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    try:
+        breaker.before_call()
+        raise AssertionError("Nur ein Probe-Call erwartet")
+    except LLMCircuitOpenError:
+        pass
+    breaker.record_failure(LLMTimeoutError("timeout"))
+    print(f"   Probe-Call fehlgeschlagen: {breaker.state}")
+    assert breaker.state == "open"
+    
+    # A successful trial closes it
+    time.sleep(0.25)
+    breaker.before_call()
+    breaker.record_success()
+    print(f"   Probe-Call erfolgreich: {breaker.state}")
+    assert breaker.state == "closed" and breaker.failures == 0
+    
+    # The retry loop stops as soon as the circuit opens
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=60)
+    func, calls = failing([APIError(503)] * 10)
+    try:
+        RetryPolicy(max_retries=5, **FAST).call(func, breaker)
+        raise AssertionError("LLMCircuitOpenError erwartet")
+    except LLMCircuitOpenError:
+        pass
+    assert len(calls) == 2
+    
+    # Local bugs are raised unchanged, without retries, and never open the circuit
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=60)
+    func, calls = failing([KeyError("output_text")] * 3)
+    for _ in range(3):
+        try:
+            RetryPolicy(max_retries=5, **FAST).call(func, breaker)
+            raise AssertionError("KeyError erwartet")
+        except KeyError:
+            pass
+    print(f"   {len(calls)} Aufrufe mit KeyError: {breaker.state}")
+    assert len(calls) == 3 and breaker.state == "closed" and breaker.failures == 0
+    
+    # ... and do not block the half-open trial
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=0.05)
+    breaker.record_failure(LLMServerError("503", 503))
+    time.sleep(0.1)
+    func, calls = failing([KeyError("output_text")])
+    try:
+        RetryPolicy(max_retries=5, **FAST).call(func, breaker)
+    except KeyError:
+        pass
+    assert RetryPolicy(max_retries=0, **FAST).call(func, breaker) == "ok" and breaker.state == "closed"
+    print("\n✅ closed → open → half_open → open/closed")
+
+
+def test_agent_retries():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Agent-Calls mit Retries")
+    print("=" * 60)
+    prompt = "Verfügbare Inhaltsarten:\nVeranstaltung\nPerson\n\nText: Tagung zur Hochschullehre"
+    
+    transport = FlakyTransport(failures=2)
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=transport,
+                          retry_policy=RetryPolicy(max_retries=3, **FAST),
+                          circuit_breaker=CircuitBreaker(failure_threshold=5, recovery_time=60))
+    agent.cache = None  # Every call reaches the transport
+    report = PerformanceReport()
+    with recording(report):
+        result = agent._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low")
+    print(f"   {transport.requests} Requests, {report.llm_totals()}")
+    assert result["output_text"] and transport.requests == 3
+    assert report.llm_totals()["retries"] == 2
+    assert agent.circuit_breaker.state == "closed"
+    
+    # Async: the same policy and breaker
+    transport = FlakyTransport(failures=1)
+    agent.transport = transport
+    assert asyncio.run(agent._call_gpt5_async(prompt, reasoning_effort="minimal", verbosity="low"))["output_text"]
+    assert transport.requests == 2
+    
+    # Permanent server errors open the shared breaker: later calls fail without a request
+    transport = FlakyTransport(failures=100)
+    agent.transport = transport
+    agent.circuit_breaker = CircuitBreaker(failure_threshold=3, recovery_time=60)
+    for _ in range(2):
+        try:
+            agent._call_gpt5(prompt, reasoning_effort="minimal", verbosity="low")
+            raise AssertionError("LLMError erwartet")
+        except (LLMServerError, LLMCircuitOpenError):
+            pass
+    print(f"   {transport.requests} Requests bei dauerhaftem Fehler")
+    assert transport.requests == 3
+    print("\n✅ Retries und Circuit Breaker greifen auch im Agenten")
+
+
+if __name__ == "__main__":
+    test_error_classification()
+    test_retry_policy()
+    test_circuit_breaker()
+    test_agent_retries()
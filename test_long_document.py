@@ -0,0 +1,159 @@
+"""Test script for the long-document mode: chunking, reduction and provenance (no API calls)."""
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from long_document import CHARS_PER_TOKEN, PROVENANCE_KEY, chunk_text, reduce_chunk_results
+from models import WorkflowState
+from schema_loader import SchemaManager
+
+CORE_FIELDS = {f.id: f for f in SchemaManager().get_fields("core.json")}
+PARAGRAPHS = [
+    "Workshop Python für Einsteiger. Der Workshop vermittelt Grundlagen der Programmierung.",
+    "Im zweiten Teil geht es um Datenanalyse mit Pandas und Visualisierung.",
+    "Der Workshop findet am 15. September 2026 in Berlin statt. Anmeldung unter https://example.org/python.",
+]
+TEXT = "\n\n".join(PARAGRAPHS)
+
+
+class RecordingTransport(FakeModelTransport):
+    """Fake model that keeps the prompts it receives."""
+    
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+    
+    def create(self, request, timeout=None):
+        self.prompts.append(request["input"])
+        return super().create(request, timeout)
+
+
+def long_document_agent(transport=None):
+    """Agent that treats TEXT as a long document of one chunk per paragraph."""
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=transport or FakeModelTransport())
+    agent.cache = None
+    agent.long_document_tokens, agent.long_document_chunk_tokens = 50, 30
+    return agent
+
+
+def test_chunk_boundaries():
+    print("=" * 60)
+    print("🧪 Test: Chunk-Grenzen")
+    print("=" * 60)
+    max_tokens = 30
+    chunks = chunk_text(TEXT, max_tokens)
+    print(f"   {[(c.start, c.end) for c in chunks]}")
+    assert [c.text for c in chunks] == PARAGRAPHS  # Cut at paragraph boundaries
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    for chunk, following in zip(chunks, chunks[1:]):
+        assert chunk.end <= following.start  # No overlap ...
+        assert not TEXT[chunk.end:following.start].strip()  # ... and no text lost in between
+    assert all(TEXT[c.start:c.end].strip() == c.text for c in chunks)
+    assert all(len(c.text) <= max_tokens * CHARS_PER_TOKEN for c in chunks)
+    
+    # Paragraphs fitting together share a chunk
+    assert len(chunk_text(TEXT, 1000)) == 1
+    assert [c.text for c in chunk_text(TEXT, 45)] == ["\n\n".join(PARAGRAPHS[:2]), PARAGRAPHS[2]]
+    
+    # A paragraph above the budget is split on sentences, a word above it hard
+    sentences = chunk_text(PARAGRAPHS[0], 14)
+    print(f"   Sätze: {[c.text for c in sentences]}")
+    assert [c.text for c in sentences] == ["Workshop Python für Einsteiger.",
+                                           "Der Workshop vermittelt Grundlagen der Programmierung."]
+    word = "x" * 50
+    assert [len(c.text) for c in chunk_text(word, 5)] == [20, 20, 10]
+    assert chunk_text("", 10) == [] and chunk_text("  \n\n ", 10) == []
+    print("\n✅ Chunks überlappen nicht und verlieren keinen Text")
+
+
+def test_conflicting_values():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Widersprüchliche Werte über Chunks")
+    print("=" * 60)
+    chunks = chunk_text(TEXT, 30)
+    fields = [CORE_FIELDS["cclom:title"], CORE_FIELDS["cclom:general_keyword"]]
+    
+    # Scalars: majority wins
+    merged = reduce_chunk_results([
+        {"cclom:title": "Python-Kurs", "cclom:general_keyword": ["Python", "Einsteiger"]},
+        {"cclom:title": "Datenanalyse", "cclom:general_keyword": ["python", "Pandas"]},
+        {"cclom:title": "Datenanalyse", "cclom:general_keyword": []},
+    ], chunks, fields)
+    print(f"   {merged['cclom:title']!r}, {merged['cclom:general_keyword']}")
+    assert merged["cclom:title"] == "Datenanalyse"
+    assert merged[PROVENANCE_KEY]["cclom:title"] == [
+        {"value": "Datenanalyse", "chunks": [chunks[1].ref(), chunks[2].ref()]}]
+    
+    # Lists: union in order of appearance, case-insensitive duplicates merged with both chunks as source
+    assert merged["cclom:general_keyword"] == ["Python", "Einsteiger", "Pandas"]
+    assert merged[PROVENANCE_KEY]["cclom:general_keyword"][0] == {
+        "value": "Python", "chunks": [chunks[0].ref(), chunks[1].ref()]}
+    
+    # Ties: the earliest chunk wins; empty answers do not count
+    merged = reduce_chunk_results([{"cclom:title": ""}, {"cclom:title": "B"}, {"cclom:title": "C"}], chunks, fields)
+    assert merged["cclom:title"] == "B"
+    
+    # Objects: the most complete one
+    merged = reduce_chunk_results([
+        {"schema:location": {"name": "Berlin", "address": None}},
+        {"schema:location": {"name": "Berlin", "address": "Unter den Linden 6"}},
+    ], chunks[:2], [])
+    assert merged["schema:location"]["address"] == "Unter den Linden 6"
+    
+    # Fields no chunk answered are left out
+    assert "cclom:title" not in reduce_chunk_results([{}, {}], chunks[:2], fields)
+    print("\n✅ Mehrheit, Vereinigung und Vollständigkeit")
+
+
+def test_provenance_in_state():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Herkunft im State, nicht in den Metadaten")
+    print("=" * 60)
+    for profile in ("phased", "fused"):
+        transport = RecordingTransport()
+        agent = long_document_agent(transport)
+        state = agent.run_headless(TEXT, include_optional=True, profile=profile)
+        
+        # No prompt carries more than one paragraph
+        per_prompt = max(sum(paragraph in prompt for paragraph in PARAGRAPHS) for prompt in transport.prompts)
+        print(f"   {profile}: {len(transport.prompts)} Calls, höchstens {per_prompt} Absatz pro Prompt")
+        assert per_prompt == 1
+        assert PROVENANCE_KEY not in state.metadata
+        keywords = state.field_status["cclom:general_keyword"]
+        assert keywords.value == state.metadata["cclom:general_keyword"]
+        assert [entry["value"] for entry in keywords.provenance] == keywords.value
+        assert {"Pandas", "Berlin"} <= set(keywords.value)  # From the second and third chunk
+    print("\n✅ Provenienz steht in FieldStatus.provenance")
+
+
+def test_correction_wins():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Korrektur schlägt Chunk-Werte")
+    print("=" * 60)
+    agent = long_document_agent()
+    state = agent._init_node(WorkflowState())
+    state.add_message("user", TEXT)
+    state = agent._extract_core_required_node(state)
+    title = state.field_status["cclom:title"]
+    assert title.provenance and not title.is_confirmed
+    
+    state = agent.process_user_input(state, "Titel: Python-Workshop für Schulen")
+    title = state.field_status["cclom:title"]
+    print(f"   {title.value!r}, bestätigt: {title.is_confirmed}, Provenienz: {title.provenance}")
+    assert title.is_confirmed and "Python-Workshop für Schulen" in title.value
+    assert state.metadata["cclom:title"] == title.value
+    assert title.provenance is None  # The corrected value did not come from a chunk
+    assert PROVENANCE_KEY not in state.metadata
+    
+    # A later extraction of the long document keeps the correction and its (empty) provenance
+    corrected = title.value
+    fields = SchemaManager().get_required_fields("core.json")
+    agent._apply_extracted(state, agent._extract_fields(TEXT, fields, {}))
+    title = state.field_status["cclom:title"]
+    assert title.value == corrected and title.provenance is None
+    print("\n✅ Bestätigte Werte werden nicht überschrieben")
+
+
+if __name__ == "__main__":
+    test_chunk_boundaries()
+    test_conflicting_values()
+    test_provenance_in_state()
+    test_correction_wins()
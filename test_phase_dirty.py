@@ -0,0 +1,93 @@
+"""Test script for dirty tracking of extraction phases: one LLM call per correction turn (no API calls)."""
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from models import WorkflowPhase, WorkflowState
+
+TEXT = "Workshop Python für Einsteiger am 15. September 2026 in Berlin."
+
+
+class CountingTransport(FakeModelTransport):
+    """Fake model that counts the requests it receives."""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+    
+    def create(self, request, timeout=None):
+        self.calls += 1
+        return super().create(request, timeout)
+
+
+def test_phase_keys():
+    print("=" * 60)
+    print("🧪 Test: is_phase_dirty / mark_phase_extracted")
+    print("=" * 60)
+    state = WorkflowState(phase=WorkflowPhase.EXTRACT_CORE_REQUIRED)
+    assert state.is_phase_dirty()  # Never extracted
+    state.add_message("user", TEXT)
+    state.mark_phase_extracted()
+    assert not state.is_phase_dirty()
+    
+    # Assistant messages and navigation input carry no new text
+    state.add_message("assistant", "Hier die Felder:")
+    state.add_message("user", "weiter")
+    state.messages[-1].source = False
+    assert not state.is_phase_dirty()
+    
+    # New source text makes every phase dirty until it is extracted there
+    state.add_message("user", "Titel: Python-Workshop")
+    assert state.is_phase_dirty()
+    state.mark_phase_extracted()
+    state.phase = WorkflowPhase.EXTRACT_CORE_OPTIONAL
+    assert state.is_phase_dirty()
+    
+    # Special phases are tracked per schema file
+    state.phase = WorkflowPhase.EXTRACT_SPECIAL_REQUIRED
+    state.special_schemas = ["event.json", "person.json"]
+    state.mark_phase_extracted()
+    print(f"   {state.extracted_at}")
+    assert state.phase_key() == "extract_special_required:event.json"
+    state.current_special_schema_index = 1
+    assert state.is_phase_dirty()
+    state.current_special_schema_index = 0
+    assert not state.is_phase_dirty()
+    print("\n✅ Jede Phase merkt sich ihren Stand")
+
+
+def test_one_call_per_correction():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Ein LLM-Call pro Korrektur")
+    print("=" * 60)
+    transport = CountingTransport()
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=transport)
+    agent.cache = None
+    state = agent._init_node(WorkflowState())
+    state.add_message("user", TEXT)
+    state = agent._extract_core_required_node(state)
+    assert transport.calls == 1
+    
+    # Each correction is extracted once - re-rendering the phase afterwards makes no call
+    for turn, correction in enumerate(["Titel: Python-Workshop für Schulen", "Beschreibung: Grundlagen für Lehrkräfte"], 2):
+        state = agent.process_user_input(state, correction)
+        print(f"   {correction!r}: {transport.calls} Calls")
+        assert transport.calls == turn
+        assert state.field_status["cclom:title"].is_filled
+        assert not state.is_phase_dirty()
+    
+    # Navigation commands carry no text: no call, also not when the phase is shown again
+    state = agent.process_user_input(state, "weiter")
+    state = agent._extract_core_required_node(state, skip_history=True, skip_completion=True)
+    assert transport.calls == 3
+    
+    # The next phase extracts once; going back re-renders the previous phase without a call
+    state = agent._extract_core_optional_node(state)
+    assert transport.calls == 4
+    state = agent.process_user_input(state, "zurück")
+    assert state.phase == WorkflowPhase.EXTRACT_CORE_REQUIRED
+    assert transport.calls == 4
+    print("\n✅ Genau ein LLM-Call pro Korrektur-Runde")
+
+
+if __name__ == "__main__":
+    test_phase_keys()
+    test_one_call_per_correction()
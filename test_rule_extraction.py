@@ -0,0 +1,162 @@
+"""Test script for the deterministic pre-extraction rules (no API calls)."""
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from rule_extraction import DEFAULT_RULES, RuleExtractor
+from schema_loader import SchemaManager
+
+SCHEMA_MANAGER = SchemaManager()
+
+
+def field(field_id, schema_file):
+    return next(f for f in SCHEMA_MANAGER.get_fields(schema_file) if f.id == field_id)
+
+
+def check(field_id, schema_file, cases):
+    """Every (text, expected) case gives the expected rule value (None = left to the LLM)."""
+    rule, target = DEFAULT_RULES[field_id], field(field_id, schema_file)
+    for text, expected in cases:
+        value = rule(text, target)
+        print(f"   {field_id:30s} {text[:50]!r:54s} -> {value!r}")
+        assert value == expected, f"{field_id}: {text!r} -> {value!r}, erwartet {expected!r}"
+
+
+def test_url_rules():
+    print("=" * 60)
+    print("🧪 Test: URL-Regeln")
+    print("=" * 60)
+    check("ccm:wwwurl", "core.json", [
+        ("Mehr unter https://example.org/kurs.", "https://example.org/kurs"),
+        ("Siehe https://a.example.org und https://b.example.org", None),  # Two URLs: ambiguous
+        ("Lizenz: https://creativecommons.org/licenses/by/4.0/", None),  # License URL is no resource URL
+        ("Kein Link im Text", None),
+    ])
+    check("preview:url", "core.json", [
+        ("Vorschau: https://example.org/bild.png", "https://example.org/bild.png"),
+        ("Mehr unter https://example.org/kurs", None),
+    ])
+
+
+def test_date_rules():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Datums- und Dauer-Regeln")
+    print("=" * 60)
+    check("schema:startDate", "event.json", [
+        ("Die Tagung findet am 15. März 2025 statt.", "2025-03-15"),
+        ("Workshop am 15.03.2025 von 9-17 Uhr", "2025-03-15T09:00"),
+        ("Vom 15.-16. März 2025 in Berlin", "2025-03-15"),
+        ("Termine: 15.03.2025 und 20.04.2025", None),  # Several dates
+        ("Demnächst in Berlin", None),
+    ])
+    check("schema:endDate", "event.json", [
+        ("Vom 15.-16. März 2025 in Berlin", "2025-03-16"),
+        ("Workshop am 15.03.2025 von 9-17 Uhr", "2025-03-15T17:00"),
+        ("Die Tagung findet am 15. März 2025 statt.", None),  # Single day: no end
+    ])
+    check("schema:duration", "event.json", [
+        ("Dauer: 3 Stunden", "PT3H"),
+        ("Der Kurs dauert 2 Tage.", "P2D"),
+        ("Kursdauer ca. 6 Wochen", "P6W"),
+        ("Laufzeit: 12 Monate", "P12M"),
+        ("Anmeldung ist 14 Tage vorher nötig", None),  # No duration context
+        ("Dauer folgt. Anmeldung 14 Tage vorher", None),  # Context in another sentence
+        ("Dauer: 3 Stunden, Laufzeit 2 Tage", None),  # Two durations
+    ])
+
+
+def test_license_rules():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Lizenz-Regeln")
+    print("=" * 60)
+    check("ccm:commonlicense_key", "core.json", [
+        ("Veröffentlicht unter CC BY-SA 4.0", "CC BY-SA"),
+        ("Lizenz: https://creativecommons.org/licenses/by-nc/4.0/", "CC BY-NC"),
+        ("Frei nutzbar (CC0)", "CC0"),
+        ("Teils CC BY, teils CC BY-SA", None),  # Two licenses
+        ("Alle Rechte vorbehalten", None),
+    ])
+    check("ccm:commonlicense_cc_version", "core.json", [
+        ("Veröffentlicht unter CC BY-SA 4.0", "4.0"),
+        ("CC BY 3.0 oder CC BY 4.0", None),  # Two versions
+        ("Veröffentlicht unter CC BY-SA", None),
+    ])
+
+
+def test_language_rule():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Sprach-Regel")
+    print("=" * 60)
+    check("cclom:general_language", "core.json", [
+        ("Der Kurs findet auf Englisch statt.", "en"),
+        ("Sprache: Deutsch", "de"),
+        ("Die Teilnehmer lernen, wie sich die Daten mit dem Werkzeug für den Unterricht aufbereiten lassen "
+         "und wie das Material in der Schule eingesetzt wird, die Kosten sind gering.", "de"),
+        ("Auf Deutsch oder auf Englisch", None),  # Two languages
+        ("Kurs 2025", None),  # Too little text
+    ])
+
+
+def test_price_rules():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Preis-Regeln")
+    print("=" * 60)
+    check("schema:offers", "event.json", [
+        ("Teilnahmegebühr: 25 €", [{"@type": "Offer", "price": 25.0, "priceCurrency": "EUR"}]),
+        ("Preis: 12,50 Euro", [{"@type": "Offer", "price": 12.5, "priceCurrency": "EUR"}]),
+        ("Preis: 1.200 Euro", [{"@type": "Offer", "price": 1200.0, "priceCurrency": "EUR"}]),  # Thousands separator
+        ("Preis: EUR 1.200,50", [{"@type": "Offer", "price": 1200.5, "priceCurrency": "EUR"}]),
+        ("Preis: 1,200 €", None),  # Thousands or decimals? Ambiguous
+        ("Die Teilnahme ist kostenlos.", None),
+    ])
+    check("schema:isAccessibleForFree", "event.json", [
+        ("Die Teilnahme ist kostenlos.", True),
+        ("Preis: 1.200 Euro", False),
+        ("Kostenlos für Mitglieder, sonst 20 €", None),  # Both
+        ("Preis: 1,200 €", None),  # Ambiguous amount
+        ("Workshop in Berlin", None),
+    ])
+
+
+def test_rule_extractor():
+    print("\n" + "=" * 60)
+    print("🧪 Test: RuleExtractor")
+    print("=" * 60)
+    fields = SCHEMA_MANAGER.get_fields("event.json")
+    extractor = RuleExtractor()
+    values = extractor.extract("Dauer: 3 Stunden. Preis: 1.200 Euro.", fields)
+    print(f"   {values}")
+    assert values["schema:duration"] == "PT3H"
+    assert values["schema:isAccessibleForFree"] is False
+    assert "schema:startDate" not in values  # No result: left to the LLM
+    
+    extractor.register("schema:duration", lambda text, field: "P1D")
+    assert extractor.extract("Dauer: 3 Stunden", fields)["schema:duration"] == "P1D"
+    print("\n✅ Regeln liefern nur eindeutige Werte")
+
+
+
+def test_rules_once_per_phase():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Regeln einmal pro Phase")
+    print("=" * 60)
+    text = "Workshop am 15. September 2026 in Berlin, Dauer: 3 Stunden. Preis: 25 €. https://example.org/workshop"
+    for profile in ("phased", "fused"):
+        agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=FakeModelTransport())
+        agent.cache = None
+        runs = []
+        extract = agent.rule_extractor.extract
+        agent.rule_extractor.extract = lambda text, fields: runs.append(len(fields)) or extract(text, fields)
+        state = agent.run_headless(text, content_type="Veranstaltung", profile=profile)
+        print(f"   {profile}: {len(runs)} Regel-Läufe")
+        assert len(runs) == 4  # Core required/optional, special required/optional
+        assert state.metadata.get("schema:duration") == "PT3H"
+    print("\n✅ Jede Phase wertet die Regeln genau einmal aus")
+
+
+if __name__ == "__main__":
+    test_url_rules()
+    test_date_rules()
+    test_license_rules()
+    test_language_rule()
+    test_price_rules()
+    test_rule_extractor()
+    test_rules_once_per_phase()
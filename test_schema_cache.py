@@ -0,0 +1,112 @@
+"""Test script for the compiled schema artifacts on disk (no API calls)."""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from schema_loader import SchemaManager
+
+
+class CountingSchemaManager(SchemaManager):
+    """SchemaManager that counts how often it parses and compiles a schema file."""
+    compiled = 0
+    
+    @staticmethod
+    def _compile(schema):
+        CountingSchemaManager.compiled += 1
+        return SchemaManager._compile(schema)
+
+
+def schema_copy(parent):
+    """A copy of schemata/ in the given directory."""
+    directory = os.path.join(parent, "schemata")
+    shutil.copytree("schemata", directory)
+    return directory
+
+
+def load(schema_dir, cache_dir=None):
+    """Compile count and title label after loading core.json in a fresh manager."""
+    before = CountingSchemaManager.compiled
+    manager = CountingSchemaManager(schema_dir, cache_dir=cache_dir)
+    label = manager.get_fields("core.json")[0].prompt["label"]
+    return CountingSchemaManager.compiled - before, label
+
+
+def test_default_location():
+    print("=" * 60)
+    print("🧪 Test: Cache-Verzeichnis neben den Schemata")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as parent:
+        schema_dir = schema_copy(parent)
+        previous = os.environ.pop("SCHEMA_CACHE_DIR", None)
+        try:
+            manager = SchemaManager(schema_dir)
+        finally:
+            if previous is not None:
+                os.environ["SCHEMA_CACHE_DIR"] = previous
+        print(f"   {manager.cache_dir}")
+        assert manager.cache_dir == Path(parent).resolve() / ".schema_cache"
+        assert load(schema_dir)[0] == 1  # Built once ...
+        assert load(schema_dir)[0] == 0  # ... then loaded from the artifact
+        assert os.listdir(manager.cache_dir)
+    print("\n✅ Artefakte liegen beim Schema-Verzeichnis, nicht im Arbeitsverzeichnis")
+
+
+def test_invalidation():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Nur berührt vs. inhaltlich geändert")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as parent:
+        schema_dir = schema_copy(parent)
+        cache_dir = os.path.join(parent, "cache")
+        path = os.path.join(schema_dir, "core.json")
+        compiled, label = load(schema_dir, cache_dir)
+        assert compiled == 1
+        
+        # Touched (new mtime, same content): the content hash matches, the artifact is reused
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert load(schema_dir, cache_dir) == (0, label)
+        assert load(schema_dir, cache_dir)[0] == 0  # Header updated: the fast path matches again
+        
+        # Changed content: compiled again
+        with open(path, encoding="utf-8") as f:
+            schema = json.load(f)
+        schema["fields"][0]["prompt"]["label"] = "Titel geändert"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(schema, f, ensure_ascii=False)
+        print(f"   {label!r} -> 'Titel geändert'")
+        assert load(schema_dir, cache_dir) == (1, "Titel geändert")
+        assert load(schema_dir, cache_dir) == (0, "Titel geändert")
+    print("\n✅ Nur geänderte Inhalte werden neu kompiliert")
+
+
+def test_shared_cache_dir():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Zwei Schema-Verzeichnisse, ein Cache")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as parent:
+        cache_dir = os.path.join(parent, "cache")
+        first = schema_copy(os.path.join(parent, "a"))
+        second = schema_copy(os.path.join(parent, "b"))
+        path = os.path.join(second, "core.json")
+        with open(path, encoding="utf-8") as f:
+            schema = json.load(f)
+        schema["fields"][0]["prompt"]["label"] = "Titel B"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(schema, f, ensure_ascii=False)
+        
+        assert load(first, cache_dir)[0] == 1 and load(second, cache_dir) == (1, "Titel B")
+        # Alternating loads do not invalidate each other's artifacts
+        for _ in range(2):
+            assert load(first, cache_dir)[0] == 0
+            assert load(second, cache_dir) == (0, "Titel B")
+        print(f"   {sorted(os.listdir(cache_dir))[:2]}")
+        assert len([name for name in os.listdir(cache_dir) if name.startswith("core.json.")]) == 2
+    print("\n✅ Jedes Schema-Verzeichnis hat eigene Artefakte")
+
+
+if __name__ == "__main__":
+    test_default_location()
+    test_invalidation()
+    test_shared_cache_dir()
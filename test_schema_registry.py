@@ -0,0 +1,145 @@
+"""Test script for hot-reloading schemas through the versioned registry (no API calls)."""
+import json
+import os
+import shutil
+import tempfile
+import time
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from models import WorkflowState
+from schema_registry import SchemaRegistry
+
+
+def schema_copy():
+    """A writable copy of schemata/ in a temporary directory."""
+    directory = os.path.join(tempfile.mkdtemp(), "schemata")
+    shutil.copytree("schemata", directory)
+    return directory
+
+
+def rename_title(schema_dir, label):
+    """Change the label of the first core field (cclom:title) on disk."""
+    path = os.path.join(schema_dir, "core.json")
+    with open(path, encoding="utf-8") as f:
+        schema = json.load(f)
+    schema["fields"][0]["prompt"]["label"] = label
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False)
+
+
+def title_label(schema_manager):
+    return schema_manager.get_fields("core.json")[0].prompt["label"]
+
+
+class Listener:
+    def __init__(self):
+        self.versions = []
+    
+    def on_reload(self, schema_manager):
+        self.versions.append(schema_manager.version)
+
+
+def test_versions():
+    print("=" * 60)
+    print("🧪 Test: Versionen und Reload")
+    print("=" * 60)
+    schema_dir = schema_copy()
+    registry = SchemaRegistry(schema_dir, cache_dir="", keep_versions=2)
+    first = registry.current
+    assert registry.version == 1 and not registry.reload_if_changed()
+    
+    listener = Listener()
+    registry.subscribe(listener.on_reload)
+    rename_title(schema_dir, "Titel v2")
+    assert registry.reload_if_changed()
+    print(f"   Version {registry.version}: {title_label(registry.current)!r}, Version 1: {title_label(registry.get(1))!r}")
+    assert registry.version == 2 and title_label(registry.current) == "Titel v2"
+    assert registry.get(1) is first and title_label(first) != "Titel v2"  # Old versions stay unchanged
+    assert registry.get() is registry.current
+    assert listener.versions == [2]
+    
+    # A file saved halfway does not compile: the current version stays active until it is complete
+    path = os.path.join(schema_dir, "core.json")
+    with open(path, encoding="utf-8") as f:
+        complete = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(complete[:len(complete) // 2])
+    assert not registry.reload_if_changed() and registry.version == 2
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(complete)
+    
+    # Only keep_versions versions are kept; unknown versions raise
+    assert registry.reload_if_changed() and registry.version == 3
+    try:
+        registry.get(1)
+        raise AssertionError("KeyError erwartet")
+    except KeyError:
+        pass
+    assert title_label(registry.get(2)) == "Titel v2"
+    
+    # Listeners are held weakly
+    del listener
+    rename_title(schema_dir, "Titel v4")
+    assert registry.reload_if_changed() and not registry._listeners
+    print("\n✅ Jede Änderung ergibt eine neue, unveränderliche Version")
+
+
+def test_watcher():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Überwachung des Schema-Verzeichnisses")
+    print("=" * 60)
+    schema_dir = schema_copy()
+    registry = SchemaRegistry(schema_dir, cache_dir="")
+    registry.start(poll_interval=0.05)
+    try:
+        rename_title(schema_dir, "Titel neu")
+        deadline = time.time() + 5
+        while registry.version == 1 and time.time() < deadline:
+            time.sleep(0.05)
+        print(f"   Version {registry.version} nach Änderung")
+        assert registry.version == 2 and title_label(registry.current) == "Titel neu"
+    finally:
+        registry.stop()
+    print("\n✅ Geänderte Dateien werden ohne Neustart übernommen")
+
+
+def test_session_pinning():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Sitzungen behalten ihre Version")
+    print("=" * 60)
+    schema_dir = schema_copy()
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=FakeModelTransport())
+    agent.cache = None
+    agent.schema_registry = SchemaRegistry(schema_dir, cache_dir="", keep_versions=2)
+    agent.schema_registry.subscribe(agent._on_schemas_reloaded)
+    
+    running = WorkflowState()
+    old_fields = agent._schemas(running).get_required_fields("core.json")
+    rename_title(schema_dir, "Titel v2")
+    assert agent.schema_registry.reload_if_changed()
+    
+    new = WorkflowState()
+    new_fields = agent._schemas(new).get_required_fields("core.json")
+    print(f"   laufende Sitzung: Version {running.schema_version}, neue Sitzung: Version {new.schema_version}")
+    assert (running.schema_version, new.schema_version) == (1, 2)
+    assert agent._schemas(running).get_required_fields("core.json") == old_fields
+    assert "Titel v2" in agent._build_extraction_prefix(new_fields)
+    assert "Titel v2" not in agent._build_extraction_prefix(old_fields)
+    assert agent.content_type_scorer.schema_manager is agent.schema_registry.current
+    
+    # Headless runs pin the version current at their start
+    state = agent.run_headless("Tagung zur Hochschullehre am 15. September 2026 in Berlin", include_optional=False)
+    assert state.schema_version == 2 and state.metadata.get("cclom:title")
+    
+    # A session older than the kept versions continues on the current one
+    for label in ("Titel v3", "Titel v4"):
+        rename_title(schema_dir, label)
+        assert agent.schema_registry.reload_if_changed()
+    assert title_label(agent._schemas(running)) == "Titel v4" and running.schema_version == 4
+    print("\n✅ Reloads ändern keine laufenden Sitzungen")
+
+
+if __name__ == "__main__":
+    test_versions()
+    test_watcher()
+    test_session_pinning()
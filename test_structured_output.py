@@ -0,0 +1,113 @@
+"""Test script for the response schemas of Structured Outputs (no API calls)."""
+import json
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from models import WorkflowState
+from schema_loader import SchemaManager
+from structured_output import CONTENT_TYPE_KEY, build_response_schema
+
+CORE_FIELDS = {f.id: f for f in SchemaManager().get_fields("core.json")}
+
+
+class RecordingTransport(FakeModelTransport):
+    """Fake model that keeps the requests it receives."""
+    
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+    
+    def create(self, request, timeout=None):
+        self.requests.append(request)
+        return super().create(request, timeout)
+
+
+def test_required_fields():
+    print("=" * 60)
+    print("🧪 Test: Pflichtfelder im Antwort-Schema")
+    print("=" * 60)
+    fields = [CORE_FIELDS["cclom:title"], CORE_FIELDS["cclom:general_keyword"], CORE_FIELDS["ccm:commonlicense_key"]]
+    response = build_response_schema(fields, "core.json:required")
+    schema = response["schema"]
+    print(f"   {response['name']}: {json.dumps(schema['properties'], ensure_ascii=False)[:100]}...")
+    assert response["name"] == "core_json_required" and response["strict"]
+    
+    # Strict mode: every field is a required key (required or not in the schema file), nothing else is allowed
+    assert schema["required"] == [f.id for f in fields]
+    assert schema["additionalProperties"] is False
+    
+    # A required field may still be null (= not found in the text) - the agent asks for it afterwards
+    assert CORE_FIELDS["cclom:title"].required
+    assert schema["properties"]["cclom:title"] == {"type": ["string", "null"]}
+    assert schema["properties"]["cclom:general_keyword"] == {"type": ["array", "null"], "items": {"type": "string"}}
+    print("\n✅ Alle Felder sind Pflicht-Keys, Werte dürfen null sein")
+
+
+def test_vocabulary_fields():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Vokabular-Felder")
+    print("=" * 60)
+    license_field = CORE_FIELDS["ccm:commonlicense_key"]
+    labels = [c["label"] for c in license_field.get_vocabulary_concepts()]
+    properties = build_response_schema([license_field, CORE_FIELDS["ccm:oeh_flex_lrt"],
+                                        CORE_FIELDS["ccm:educationalcontext"]], "vocabulary")["schema"]["properties"]
+    
+    # Closed vocabulary: the labels as enum, plus null
+    license_schema = properties["ccm:commonlicense_key"]
+    print(f"   Lizenz: {license_schema['enum']}")
+    assert license_schema["type"] == ["string", "null"]
+    assert license_schema["enum"] == labels + [None]
+    
+    # Closed vocabulary of a list field: the enum applies to each item
+    types = [c["label"] for c in CORE_FIELDS["ccm:oeh_flex_lrt"].get_vocabulary_concepts()]
+    assert properties["ccm:oeh_flex_lrt"] == {"type": ["array", "null"], "items": {"type": "string", "enum": types}}
+    
+    # SKOS vocabularies are not closed lists in the prompt - free strings, matched by the validator
+    assert properties["ccm:educationalcontext"]["items"] == {"type": "string"}
+    print("\n✅ Geschlossene Vokabulare werden zu enum")
+
+
+def test_not_representable():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Freies JSON und Inhaltsarten")
+    print("=" * 60)
+    offers = next(f for f in SchemaManager().get_fields("tool_service.json") if f.id == "sdo:offers")
+    response = build_response_schema([CORE_FIELDS["cclom:title"], offers], "tools", content_types=["Person", "Quelle"])
+    properties = response["schema"]["properties"]
+    
+    # Free-form JSON accepts any value - the schema is then sent non-strict
+    assert properties["sdo:offers"] == {} and not response["strict"]
+    assert properties[CONTENT_TYPE_KEY] == {"type": ["string", "null"], "enum": ["Person", "Quelle", None]}
+    assert response["schema"]["required"] == ["cclom:title", "sdo:offers", CONTENT_TYPE_KEY]
+    print("\n✅ Nicht darstellbare Felder machen das Schema non-strict")
+
+
+def test_extraction_request():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Schema im Extraktions-Request")
+    print("=" * 60)
+    transport = RecordingTransport()
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=transport)
+    agent.cache = None
+    state = agent._init_node(WorkflowState())
+    state.add_message("user", "Workshop Python für Einsteiger am 15. September 2026 in Berlin, Lizenz CC BY.")
+    state = agent._extract_core_required_node(state)
+    
+    formats = [request.get("text", {}).get("format") or request["response_format"]["json_schema"]
+               for request in transport.requests]
+    print(f"   {len(formats)} Calls: {[f['name'] for f in formats]}")
+    required = {f.id for f in SchemaManager().get_ai_fillable_fields("core.json") if f.required}
+    sent = set().union(*(f["schema"]["required"] for f in formats))
+    assert required <= sent
+    assert state.field_status["cclom:title"].is_filled
+    
+    # The schema of a field list is compiled once and reused
+    fields = SchemaManager().get_required_fields("core.json")
+    assert agent._response_schema(fields) is agent._response_schema(fields)
+    print("\n✅ Die Extraktion sendet das kompilierte Schema")
+
+
+if __name__ == "__main__":
+    test_required_fields()
+    test_vocabulary_fields()
+    test_not_representable()
+    test_extraction_request()
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from agent import MetadataAgent
 from schema_loader import SchemaManager, Field
 from models import WorkflowState
+from validator import MetadataValidator
+from llm_transport import FakeModelTransport
 
 load_dotenv()
 
@@ -13,7 +15,8 @@ def test_validator_normalization():
     print("🧪 Test 1: Validierung & Normalisierung")
     print("=" * 60)
     
-    agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini")
+    # Validation needs no LLM - the fake model keeps the test offline
+    agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini", transport=FakeModelTransport())
     schema_manager = SchemaManager()
     
     # Get a field with normalization rules
@@ -69,7 +72,7 @@ def test_vocabulary_validation():
     print("🧪 Test 2: Vocabulary-Validierung")
     print("=" * 60)
     
-    agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini")
+    agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini", transport=FakeModelTransport())
     schema_manager = SchemaManager()
     
     # Get fields with vocabularies
@@ -110,10 +113,29 @@ def test_vocabulary_validation():
             for w in warnings:
                 print(f"   {w}")
             print("\n✅ Validierung erkennt ungültige Werte")
-            return True
         else:
             print("\n⚠️  Keine Warnung bei ungültigem Wert")
             return False
+        
+        # Case variants are mapped to the concept label (precompiled vocabulary index)
+        variant = allowed[0].lower()
+        normalized, warnings = agent._validate_and_normalize_fields({vocab_field.id: variant}, [vocab_field])
+        if normalized.get(vocab_field.id) == allowed[0] and not warnings:
+            print(f"✅ '{variant}' → '{allowed[0]}'")
+        else:
+            print(f"❌ '{variant}' nicht auf '{allowed[0]}' abgebildet: {normalized} {warnings}")
+            return False
+        
+        # Near-misses are snapped to the closest label (fuzzy vocabulary matching)
+        label = max(allowed, key=len)
+        near_miss = label[:-1]
+        normalized, warnings = agent._validate_and_normalize_fields({vocab_field.id: near_miss}, [vocab_field])
+        if normalized.get(vocab_field.id) == label and not warnings:
+            print(f"✅ '{near_miss}' → '{label}'")
+            return True
+        else:
+            print(f"❌ '{near_miss}' nicht auf '{label}' korrigiert: {normalized} {warnings}")
+            return False
     else:
         print("\n⏭️  Übersprungen: Keine Konzepte gefunden")
         return True
@@ -125,9 +147,20 @@ def test_datatype_validation():
     print("🧪 Test 3: Datentyp-Validierung")
     print("=" * 60)
     
-    agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini")
+    agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini", transport=FakeModelTransport())
     schema_manager = SchemaManager()
     
+    all_passed = True
+    
+    # Number rules of the schema (integer, min)
+    capacity = next((f for f in schema_manager.get_fields("event.json") if f.id == "schema:maximumAttendeeCapacity"), None)
+    if capacity:
+        for value, should_pass in [(30, True), (2.5, False), (-1, False)]:
+            is_valid, error = agent.validator.validate_value(value, capacity)
+            passed = is_valid == should_pass
+            print(f"{'✅' if passed else '❌'} Teilnehmerzahl {value}: {error or 'gültig'}")
+            all_passed = all_passed and passed
+    
     fields = schema_manager.get_fields("core.json")
     
     # Find a date field
@@ -139,7 +172,7 @@ def test_datatype_validation():
     
     if not date_field:
         print("\n⏭️  Übersprungen: Kein Datumsfeld gefunden")
-        return True
+        return all_passed
     
     print(f"\n📋 Teste Feld: {date_field.prompt.get('label', date_field.id)}")
     print(f"   Erwarteter Typ: date (YYYY-MM-DD)")
@@ -151,7 +184,6 @@ def test_datatype_validation():
         ("2025/10/07", False, "Ungültiges Format (YYYY/MM/DD)")
     ]
     
-    all_passed = True
     for value, should_pass, description in test_cases:
         test_data = {date_field.id: value}
         normalized, warnings = agent._validate_and_normalize_fields(test_data, [date_field])
@@ -176,7 +208,9 @@ def test_end_to_end_extraction():
     print("=" * 60)
     
     try:
-        agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini")
+        # Without API key the rule-based fake model answers (offline, deterministic)
+        transport = None if os.getenv("OPENAI_API_KEY") else FakeModelTransport()
+        agent = MetadataAgent(api_key=os.getenv("OPENAI_API_KEY"), model="gpt-5-mini", transport=transport)
         state = WorkflowState()
         
         # Initialize
@@ -213,6 +247,36 @@ def test_end_to_end_extraction():
         return False
 
 
+def test_batch_validation():
+    """Test column-wise batch validation against per-record validation."""
+    print("\n" + "=" * 60)
+    print("🧪 Test 5: Batch-Validierung")
+    print("=" * 60)
+    
+    validator = MetadataValidator()
+    fields = SchemaManager().get_fields("event.json")
+    records = [
+        {"schema:maximumAttendeeCapacity": 30, "schema:startDate": "2025-05-15"},
+        {"schema:maximumAttendeeCapacity": 2.5, "schema:startDate": "15.05.2025"},
+        {"schema:maximumAttendeeCapacity": -1},
+        {},
+    ] * 3
+    
+    # Small chunks: the records are validated in four chunks of three
+    chunks = list(validator.validate_batch(iter(records), fields, chunk_size=3))
+    batch_errors = {(position, field_id) for chunk in chunks for position, field_id, _ in chunk.errors()}
+    expected = {(position, field_id) for position, record in enumerate(records)
+                for field_id in validator.validate_metadata(record, fields)}
+    
+    print(f"\n📤 {len(chunks)} Chunks, {len(batch_errors)} Fehler")
+    if batch_errors == expected and len(chunks) == 4:
+        print("✅ validate_batch liefert dieselben Fehler wie validate_metadata")
+        return True
+    else:
+        print(f"❌ Abweichung: {sorted(batch_errors ^ expected)}")
+        return False
+
+
 def main():
     """Run all validator tests."""
     print("\n" + "=" * 60)
@@ -225,6 +289,7 @@ def main():
     results.append(("Vocabulary-Validierung", test_vocabulary_validation()))
     results.append(("Datentyp-Validierung", test_datatype_validation()))
     results.append(("End-to-End Extraktion", test_end_to_end_extraction()))
+    results.append(("Batch-Validierung", test_batch_validation()))
     
     # Summary
     print("\n" + "=" * 60)
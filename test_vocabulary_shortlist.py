@@ -0,0 +1,103 @@
+"""Test script for the relevance shortlist of large vocabularies (no API calls)."""
+from agent import MetadataAgent
+from llm_transport import FakeModelTransport
+from schema_loader import SchemaManager
+from vocabulary_shortlist import LARGE_VOCABULARY, VocabularyShortlist
+
+SCHEMA_MANAGER = SchemaManager()
+
+
+def large_vocabulary_fields():
+    """Every field with a large vocabulary in any schema file, by field id."""
+    schema_files = ["core.json", *sorted(set(SCHEMA_MANAGER.get_available_special_schemas().values()))]
+    fields = {}
+    for schema_file in schema_files:
+        for field in SCHEMA_MANAGER.get_fields(schema_file):
+            if len(field.get_vocabulary_concepts()) >= LARGE_VOCABULARY:
+                fields[field.id] = field
+    return fields
+
+
+def field(field_id, schema_file):
+    return next(f for f in SCHEMA_MANAGER.get_fields(schema_file) if f.id == field_id)
+
+
+def test_label_recall():
+    print("=" * 60)
+    print("🧪 Test: Recall von Labels und altLabels")
+    print("=" * 60)
+    shortlist = VocabularyShortlist(15)
+    fields = large_vocabulary_fields()
+    assert {"ccm:taxonid", "oeh:eventType"} <= set(fields)
+    for field_id, large in fields.items():
+        hits = total = 0
+        for concept in large.get_vocabulary_concepts():
+            # A text naming the concept by its label or an altLabel must bring the concept into the prompt
+            for name in [concept["label"], *concept.get("altLabels", [])]:
+                text = f"Ein Angebot zum Thema {name} für die Schule."
+                hits += concept["label"] in shortlist.shortlist(text, [large])[field_id]
+                total += 1
+        print(f"   {field_id:30s} Recall {hits}/{total}")
+        assert hits / total >= 0.95, f"{field_id}: Recall {hits}/{total}"
+    print("\n✅ Genannte Konzepte landen in der Auswahl")
+
+
+def test_related_terms():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Flexionen und Komposita")
+    print("=" * 60)
+    shortlist = VocabularyShortlist(15)
+    cases = [
+        ("oeh:eventType", "event.json", "Hackathon für Schüler zur Informatik", "Hackathon (Wettbewerb)"),
+        ("ccm:taxonid", "core.json", "Arbeitsblatt zu mathematischen Funktionen", "Mathematik"),
+        ("ccm:taxonid", "core.json", "Ein Kurs über Chemie und Biologie", "Chemie"),
+    ]
+    for field_id, schema_file, text, expected in cases:
+        labels = shortlist.shortlist(text, [field(field_id, schema_file)])[field_id]
+        print(f"   {text[:45]!r:48s} -> {labels[:3]}")
+        assert expected in labels[:5], f"{text!r}: {expected!r} nicht unter den ersten 5 ({labels})"
+    print("\n✅ Verwandte Wortformen werden gefunden")
+
+
+def test_scope():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Nur große Vokabulare, k Werte")
+    print("=" * 60)
+    small = field("ccm:educationalintendedenduserrole", "core.json")
+    taxon = field("ccm:taxonid", "core.json")
+    assert not VocabularyShortlist.applies(small) and VocabularyShortlist.applies(taxon)
+    assert VocabularyShortlist(15).shortlist("Mathematik", [small]) == {}
+    assert VocabularyShortlist(0).shortlist("Mathematik", [taxon]) == {}
+    assert len(VocabularyShortlist(5).shortlist("Mathematik", [taxon])["ccm:taxonid"]) == 5
+    
+    # The concept matrix follows a reloaded vocabulary
+    shortlist = VocabularyShortlist(5)
+    shortlist.shortlist("Mathematik", [taxon])
+    reloaded = next(f for f in SchemaManager().get_fields("core.json") if f.id == "ccm:taxonid")
+    reloaded.get_vocabulary_concepts()[0]["label"] = "Quantenmechanik"
+    reloaded.vocabulary_index = type(reloaded.vocabulary_index).compile(reloaded.get_vocabulary_concepts())
+    assert shortlist.shortlist("Quantenmechanik", [reloaded])["ccm:taxonid"][0] == "Quantenmechanik"
+    print("\n✅ Kleine Vokabulare bleiben im Präfix")
+
+
+def test_prompt():
+    print("\n" + "=" * 60)
+    print("🧪 Test: Auswahl im Extraktions-Prompt")
+    print("=" * 60)
+    agent = MetadataAgent(api_key="sk-test", model="gpt-5-mini", transport=FakeModelTransport())
+    fields = SCHEMA_MANAGER.get_fields("event.json")
+    first = agent._build_extraction_prompt("Hackathon für Schüler zur Informatik", fields)
+    second = agent._build_extraction_prompt("Online-Workshop zur Chemie", fields)
+    prefix = agent._build_extraction_prefix(fields)
+    print(f"   {[line[:80] for line in first.splitlines() if line.startswith('- oeh:eventType')]}")
+    assert first.startswith(prefix) and second.startswith(prefix)  # Static prefix stays byte-identical
+    assert "Hackathon (Wettbewerb)" in first[len(prefix):]
+    assert "Online-Workshop" in second[len(prefix):]
+    print("\n✅ Auswahl steht zwischen Präfix und Text")
+
+
+if __name__ == "__main__":
+    test_label_recall()
+    test_related_terms()
+    test_scope()
+    test_prompt()
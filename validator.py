@@ -1,195 +1,587 @@
 """Validation and normalization for extracted metadata."""
+import itertools
+import operator
 import re
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
 from schema_loader import Field
 
+# A normalization step for string values / a check returning an error message (None = valid)
+Normalizer = Callable[[str], str]
+Check = Callable[[Any], Optional[str]]
+# The same check over a column of (non-empty) values: boolean array, True = invalid
+ColumnCheck = Callable[[Sequence[Any]], np.ndarray]
 
-class MetadataValidator:
-    """Validates and normalizes metadata according to schema rules."""
+# Error codes of the validate_batch error matrix (0 = valid)
+ERROR_REQUIRED, ERROR_PATTERN, ERROR_VOCABULARY, ERROR_MIN_LENGTH, ERROR_INTEGER, ERROR_RANGE = range(1, 7)
+ERROR_NAMES = ("ok", "required", "pattern", "vocabulary", "min_length", "integer", "range")
+
+_WHITESPACE = re.compile(r'\s+')
+_LANGUAGE_CODE = re.compile(r'^[A-Z]{2}(-[A-Z]{2})?$')
+
+
+def _collapse_whitespace(value: str) -> str:
+    return _WHITESPACE.sub(' ', value)
+
+
+def _lowercase_language(value: str) -> str:
+    """Normalize language codes like "DE" -> "de", "DE-AT" -> "de-AT"."""
+    if not _LANGUAGE_CODE.match(value):
+        return value
+    parts = value.split('-')
+    result = parts[0].lower()
+    if len(parts) > 1:
+        result += '-' + parts[1].upper()
+    return result
+
+
+_CASES: Dict[str, Normalizer] = {"upper": str.upper, "lower": str.lower, "title": str.title}
+# Field lists with a cached SchemaPlan (cleared when exceeded)
+_MAX_SCHEMA_PLANS = 256
+
+
+def deduplicate(items: List) -> List:
+    """Remove duplicates while preserving order."""
+    seen = set()
+    result = []
+    for item in items:
+        # Handle unhashable types
+        try:
+            if item not in seen:
+                seen.add(item)
+                result.append(item)
+        except TypeError:
+            # For unhashable types, use string representation
+            item_str = str(item)
+            if item_str not in seen:
+                seen.add(item_str)
+                result.append(item)
+    return result
+
+
+def _as_number(value: Any) -> Optional[float]:
+    """Numeric value of numbers and numeric strings ("12", "2,5"); None otherwise."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip().replace(',', '.'))
+        except ValueError:
+            return None
+    return None
+
+
+def _number_or_nan(value: Any) -> float:
+    number = _as_number(value)
+    return np.nan if number is None else number
+
+
+def _number_column(values: Sequence[Any]) -> np.ndarray:
+    return np.fromiter((_number_or_nan(v) for v in values), dtype=np.float64, count=len(values))
+
+
+def _memo_key(value: Any) -> Any:
+    """Hashable key of a value for memoizing checks (None if the value is unhashable)."""
+    try:
+        if isinstance(value, list):
+            key = (list, tuple((type(v), v) for v in value))
+        else:
+            key = (type(value), value)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+# Types whose values are equal across types (1 == 1.0 == True) - at most one of them may be keyed by value
+_NUMERIC_TYPES = frozenset({bool, int, float})
+_PLAIN_TYPES = frozenset({str, type(None)})
+_LIST_TYPES = frozenset({list, type(None)})
+
+
+def _column_keys(values: Sequence[Any]) -> Optional[Tuple[Sequence[Any], Dict[Any, Any]]]:
+    """Memo keys of a column (the values, lists as tuples) and key -> value of the distinct values.
     
-    def __init__(self):
-        pass
+    None if a key would be unhashable or could be equal to a key of another type (1 == True).
+    """
+    types = set(map(type, values))
+    keys = values
+    if list in types and types <= _LIST_TYPES:
+        types = set(map(type, itertools.chain.from_iterable(filter(None, values))))
+        keys = [value if value is None else tuple(value) for value in values]
+    other = types - _PLAIN_TYPES
+    if other and not (len(other) == 1 and other <= _NUMERIC_TYPES):
+        return None
+    try:
+        return keys, dict(zip(keys, values))
+    except TypeError:
+        return None
+
+
+def _distinct(check: Check) -> ColumnCheck:
+    """Column version of a check that evaluates every distinct value only once."""
+    def column(values: Sequence[Any]) -> np.ndarray:
+        column_keys = _column_keys(values)
+        if column_keys is not None:
+            keys, distinct = column_keys
+            results = {key: check(value) is not None for key, value in distinct.items()}
+            return np.fromiter(map(results.__getitem__, keys), dtype=bool, count=len(keys))
+        
+        # Mixed or unhashable values: memoize by type-tagged keys where possible
+        memo: Dict[Any, bool] = {}
+        fails = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            key = _memo_key(value)
+            if key is None:
+                fails[i] = check(value) is not None
+                continue
+            failed = memo.get(key)
+            if failed is None:
+                failed = memo[key] = check(value) is not None
+            fails[i] = failed
+        return fails
+    return column
+
+
+class Rule(NamedTuple):
+    """A compiled validation rule: error code, check of one value, check of a column."""
+    code: int
+    check: Check
+    column: ColumnCheck
+
+
+def _chain(normalizers: Tuple[Normalizer, ...], canonical: Optional[Callable[[Any], Any]]) -> Optional[Callable[[Any], Any]]:
+    """One function for the steps applied to each value: the string rules in order, then the vocabulary label."""
+    if not normalizers:
+        return canonical
     
-    def normalize_value(self, value: Any, field: Field) -> Any:
-        """Apply normalization rules to a field value."""
-        if value is None:
+    def item(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        for normalizer in normalizers:
+            value = normalizer(value)
+        return value if canonical is None else canonical(value)
+    return item
+
+
+def _per_item(multiple: bool, item_error: Check, value_error: Optional[Check] = None) -> Check:
+    """Check each item of list values of multiple fields, otherwise the value itself."""
+    value_error = value_error or item_error
+    
+    def check(value: Any) -> Optional[str]:
+        if multiple and isinstance(value, list):
+            for item in value:
+                error = item_error(item)
+                if error:
+                    return error
             return None
-        
+        return value_error(value)
+    return check
+
+
+def _pattern_rule(pattern: str, multiple: bool) -> Rule:
+    regex = re.compile(pattern)
+    check = _per_item(
+        multiple,
+        lambda item: None if regex.match(str(item)) else f"Wert '{item}' entspricht nicht dem erwarteten Format",
+        lambda value: None if regex.match(str(value)) else f"Wert entspricht nicht dem erwarteten Format: {pattern}",
+    )
+    return Rule(ERROR_PATTERN, check, _distinct(check))
+
+
+def _vocabulary_rule(allowed: frozenset, multiple: bool) -> Rule:
+    check = _per_item(
+        multiple,
+        lambda item: None if isinstance(item, str) and item in allowed else f"Wert '{item}' ist nicht in der zulässigen Liste",
+    )
+    return Rule(ERROR_VOCABULARY, check, _distinct(check))
+
+
+def _min_length_rule(min_length: int) -> Rule:
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, str) and len(value) < min_length:
+            return f"Wert muss mindestens {min_length} Zeichen lang sein"
+        return None
+    
+    def column(values: Sequence[Any]) -> np.ndarray:
+        lengths = np.fromiter((len(v) if isinstance(v, str) else min_length for v in values),
+                              dtype=np.int64, count=len(values))
+        return lengths < min_length
+    return Rule(ERROR_MIN_LENGTH, check, column)
+
+
+def _integer_rule(multiple: bool) -> Rule:
+    def item_error(item: Any) -> Optional[str]:
+        number = _as_number(item)
+        if number is None or not number.is_integer():
+            return f"Wert '{item}' muss eine ganze Zahl sein"
+        return None
+    check = _per_item(multiple, item_error)
+    
+    def column(values: Sequence[Any]) -> np.ndarray:
+        numbers = _number_column(values)
+        with np.errstate(invalid="ignore"):
+            return ~np.isfinite(numbers) | (numbers != np.floor(numbers))
+    return Rule(ERROR_INTEGER, check, _distinct(check) if multiple else column)
+
+
+def _range_rule(minimum: Optional[float], maximum: Optional[float], multiple: bool) -> Rule:
+    def item_error(item: Any) -> Optional[str]:
+        number = _as_number(item)
+        if number is None:
+            return None  # Not a number - left to the datatype/integer checks
+        if minimum is not None and number < minimum:
+            return f"Wert '{item}' muss mindestens {minimum:g} sein"
+        if maximum is not None and number > maximum:
+            return f"Wert '{item}' darf höchstens {maximum:g} sein"
+        return None
+    check = _per_item(multiple, item_error)
+    
+    def column(values: Sequence[Any]) -> np.ndarray:
+        numbers = _number_column(values)
+        fails = np.zeros(len(values), dtype=bool)
+        with np.errstate(invalid="ignore"):  # NaN (not a number) compares False
+            if minimum is not None:
+                fails |= numbers < minimum
+            if maximum is not None:
+                fails |= numbers > maximum
+        return fails
+    return Rule(ERROR_RANGE, check, _distinct(check) if multiple else column)
+
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """Normalization and validation of one field, compiled from its schema rules.
+
+    Supported normalization rules: trim, collapseWhitespace, case (upper/lower/title),
+    lowercase, lowercase_lang, deduplicate, map_labels_to_uris. Validation rules:
+    pattern/regex, integer, min/minimum, max/maximum, plus closed vocabularies
+    and prompt.minLength. Regexes are compiled once per plan.
+    """
+    multiple: bool
+    normalizers: Tuple[Normalizer, ...]
+    canonical_label: Optional[Callable[[Any], Any]]  # Vocabulary fields: variant/altLabel -> label
+    item: Optional[Callable[[Any], Any]]  # normalizers + canonical_label chained (None: values stay as they are)
+    deduplicate: bool
+    label_to_uri: Optional[Mapping[str, str]]  # Set if map_labels_to_uris applies
+    required_error: Optional[str]
+    rules: Tuple[Rule, ...]  # In the order they are checked, the first failing one counts
+    
+    @classmethod
+    def compile(cls, field: Field) -> "FieldPlan":
         normalization = field.system.get("normalization", {})
+        validation = field.system.get("validation", {})
+        multiple = field.multiple
+        index = field.vocabulary_index
+        
+        normalizers: List[Normalizer] = []
+        if normalization.get("trim", False):
+            normalizers.append(str.strip)
+        if normalization.get("collapseWhitespace", False):
+            normalizers.append(_collapse_whitespace)
+        if normalization.get("case") in _CASES:
+            normalizers.append(_CASES[normalization["case"]])
+        if normalization.get("lowercase", False):
+            normalizers.append(str.lower)
+        if normalization.get("lowercase_lang", False):
+            normalizers.append(_lowercase_language)
+        
+        rules: List[Rule] = []
+        for key in ("pattern", "regex"):
+            if validation.get(key):
+                rules.append(_pattern_rule(validation[key], multiple))
+        vocabulary = field.vocabulary
+        if vocabulary and vocabulary.get("type") == "closed":
+            rules.append(_vocabulary_rule(index.labels, multiple))
+        min_length = field.prompt.get("minLength")
+        if min_length:
+            rules.append(_min_length_rule(min_length))
+        if validation.get("integer", False):
+            rules.append(_integer_rule(multiple))
+        minimum = validation.get("minimum", validation.get("min"))
+        maximum = validation.get("maximum", validation.get("max"))
+        if minimum is not None or maximum is not None:
+            rules.append(_range_rule(minimum, maximum, multiple))
+        
+        map_uris = normalization.get("map_labels_to_uris", False) and field.vocabulary
+        canonical = index.canonical_label if index.labels else None
+        return cls(
+            multiple=multiple,
+            normalizers=tuple(normalizers),
+            canonical_label=canonical,
+            item=_chain(tuple(normalizers), canonical),
+            deduplicate=normalization.get("deduplicate", False),
+            label_to_uri=index.term_to_uri if map_uris else None,
+            required_error=f"Pflichtfeld '{field.prompt.get('label', field.id)}' ist leer" if field.required else None,
+            rules=tuple(rules),
+        )
+    
+    def normalize(self, value: Any) -> Any:
+        if value is None:
+            return None
+        item = self.item
         
         # Handle arrays
-        if field.multiple and isinstance(value, list):
-            normalized = [self._normalize_single(v, normalization) for v in value]
-            
-            # Deduplicate if specified
-            if normalization.get("deduplicate", False):
-                normalized = self._deduplicate_list(normalized)
-            
+        if isinstance(value, list):
+            if not self.multiple:
+                # Lists on single-value fields: only the vocabulary labels are resolved
+                canonical = self.canonical_label
+                return value if canonical is None else [canonical(v) for v in value]
+            normalized = value[:] if item is None else [item(v) for v in value]
+            if self.deduplicate:
+                normalized = deduplicate(normalized)
             return normalized
-        else:
-            return self._normalize_single(value, normalization)
+        
+        return value if item is None else item(value)
     
-    def _normalize_single(self, value: Any, rules: Dict) -> Any:
-        """Apply normalization rules to a single value."""
-        if not isinstance(value, str):
+    def map_uris(self, value: Any) -> Any:
+        label_to_uri = self.label_to_uri
+        if label_to_uri is None:
             return value
+        if isinstance(value, list):
+            return [label_to_uri.get(v, v) if isinstance(v, str) else v for v in value]
+        return label_to_uri.get(value, value) if isinstance(value, str) else value
+    
+    def first_error(self, value: Any) -> Tuple[int, Optional[str]]:
+        """(error code, message) of the first failing rule, (0, None) if the value is valid."""
+        if value is None or value == "" or value == []:
+            return (ERROR_REQUIRED, self.required_error) if self.required_error else (0, None)
+        for rule in self.rules:
+            error = rule.check(value)
+            if error:
+                return rule.code, error
+        return 0, None
+    
+    def validate(self, value: Any) -> Optional[str]:
+        """Error message of the first failing rule, None if the value is valid."""
+        return self.first_error(value)[1]
+    
+    def validate_column(self, values: Sequence[Any]) -> np.ndarray:
+        """Error codes (uint8, 0 = valid) of many values at once - same result as first_error per value.
         
-        result = value
+        Columns with few distinct values run the plan once per distinct value. Otherwise
+        every rule runs once over the whole column: numeric and length rules as array
+        operations, pattern and vocabulary rules once per distinct value.
+        """
+        n = len(values)
+        column_keys = _column_keys(values)
+        if column_keys is not None:
+            keys, distinct = column_keys
+            if len(distinct) * 2 <= n:
+                # Few distinct values (vocabularies, flags, missing fields): the whole plan once per value
+                distinct_codes = {key: self.first_error(value)[0] for key, value in distinct.items()}
+                return np.fromiter(map(distinct_codes.__getitem__, keys), dtype=np.uint8, count=n)
         
-        # Trim whitespace
-        if rules.get("trim", False):
-            result = result.strip()
+        codes = np.zeros(n, dtype=np.uint8)
+        # Empty = None, "" or []: of the falsy values only those other than None need a closer look
+        empty = np.fromiter(map(operator.is_, values, itertools.repeat(None)), dtype=bool, count=n)
+        falsy = np.fromiter(map(operator.not_, values), dtype=bool, count=n)
+        for i in np.flatnonzero(falsy & ~empty):
+            empty[i] = values[i] == "" or values[i] == []
+        if self.required_error:
+            codes[empty] = ERROR_REQUIRED
+        present = np.flatnonzero(~empty)
+        if not self.rules or not present.size:
+            return codes
         
-        # Collapse whitespace
-        if rules.get("collapseWhitespace", False):
-            result = re.sub(r'\s+', ' ', result)
+        present_values = values if present.size == n else [values[i] for i in present]
+        first = np.zeros(present.size, dtype=np.uint8)
+        for rule in reversed(self.rules):  # Earlier rules overwrite later ones: the first failing rule wins
+            first[rule.column(present_values)] = rule.code
+        codes[present] = first
+        return codes
+    
+    @property
+    def transforms(self) -> bool:
+        """False if normalize + map_uris return every value unchanged."""
+        return bool(self.item or self.deduplicate or self.label_to_uri is not None)
+    
+    @property
+    def validates(self) -> bool:
+        """False if validate accepts every value."""
+        return bool(self.required_error or self.rules)
+    
+    def normalize_and_map(self, value: Any) -> Any:
+        return self.map_uris(self.normalize(value))
+
+
+@dataclass(frozen=True)
+class SchemaPlan:
+    """Plans of a field list for whole records; fields without rules are not visited."""
+    known: FrozenSet[str]
+    transforms: Mapping[str, Callable[[Any], Any]]  # Field id -> normalize + map_uris
+    validators: Tuple[Tuple[str, Callable[[Any], Optional[str]]], ...]
+    
+    @classmethod
+    def compile(cls, plans: List[Tuple[str, FieldPlan]]) -> "SchemaPlan":
+        transforms = {}
+        for field_id, plan in plans:  # A later field with the same id wins, as in a field map
+            if plan.transforms:
+                transforms[field_id] = plan.normalize_and_map
+            else:
+                transforms.pop(field_id, None)
+        return cls(
+            known=frozenset(field_id for field_id, _ in plans),
+            transforms=transforms,
+            validators=tuple((field_id, plan.validate) for field_id, plan in plans if plan.validates),
+        )
+    
+    def normalize(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        transforms = self.transforms
+        return {
+            field_id: transforms[field_id](value) if field_id in transforms else value
+            for field_id, value in metadata.items()
+        }
+    
+    def validate(self, metadata: Dict[str, Any]) -> Dict[str, str]:
+        errors = {}
+        get = metadata.get
+        for field_id, validate in self.validators:
+            error = validate(get(field_id))
+            if error:
+                errors[field_id] = error
+        return errors
+
+
+@dataclass(frozen=True)
+class BatchErrors:
+    """Error matrix of one chunk of validate_batch.
+    
+    codes[i, j] is the error code (ERROR_NAMES) of record offset + i in field field_ids[j];
+    only fields that have validation rules get a column.
+    """
+    offset: int  # Position of the chunk's first record in the input
+    field_ids: Tuple[str, ...]
+    codes: np.ndarray  # (records, fields), uint8, 0 = valid
+    
+    @property
+    def invalid_records(self) -> np.ndarray:
+        """Input positions of the records with at least one error."""
+        return self.offset + np.flatnonzero(self.codes.any(axis=1))
+    
+    def error_counts(self) -> Dict[str, int]:
+        """Field id -> number of invalid values (fields without errors are left out)."""
+        counts = np.count_nonzero(self.codes, axis=0)
+        return {field_id: int(count) for field_id, count in zip(self.field_ids, counts) if count}
+    
+    def errors(self) -> Iterator[Tuple[int, str, str]]:
+        """(record position, field id, error name) of every invalid value."""
+        for row, column in zip(*np.nonzero(self.codes)):
+            yield self.offset + int(row), self.field_ids[column], ERROR_NAMES[self.codes[row, column]]
+
+
+class MetadataValidator:
+    """Validates and normalizes metadata according to schema rules."""
+    
+    def __init__(self):
+        # Plans of the field lists passed to normalize_metadata/validate_metadata, keyed by the
+        # identities of the fields (the entry keeps the fields alive, so ids are not reused)
+        self._schema_plans: Dict[Tuple[int, ...], Tuple[Tuple[Field, ...], SchemaPlan]] = {}
+    
+    def plan(self, field: Field) -> FieldPlan:
+        """Compiled plan of the field - built once per Field, i.e. per loaded schema version."""
+        plan = field.validation_plan
+        if plan is None:
+            plan = FieldPlan.compile(field)
+            field.validation_plan = plan
+        return plan
+    
+    def schema_plan(self, fields: List[Field]) -> SchemaPlan:
+        """Compiled plan of a field list (e.g. the fields of one schema)."""
+        key = tuple(map(id, fields))
+        entry = self._schema_plans.get(key)
+        if entry is None:
+            if len(self._schema_plans) >= _MAX_SCHEMA_PLANS:
+                self._schema_plans.clear()
+            entry = (tuple(fields), SchemaPlan.compile([(f.id, self.plan(f)) for f in fields]))
+            self._schema_plans[key] = entry
+        return entry[1]
+    
+    def normalize_value(self, value: Any, field: Field) -> Any:
+        """Apply normalization rules to a field value."""
+        return self.plan(field).normalize(value)
+    
+    def snap_to_vocabulary(self, value: Any, field: Field, threshold: float) -> tuple[Any, List[tuple]]:
+        """Replace near-misses of vocabulary labels/altLabels by the concept label.
+
+        Only closed and SKOS vocabularies; a value is snapped if its similarity to
+        the nearest term is at least threshold.
+
+        Returns:
+            Tuple of (value, [(original, label, similarity), ...])
+        """
+        vocabulary = field.vocabulary
+        index = field.vocabulary_index
+        if not vocabulary or vocabulary.get("type") not in ("closed", "skos") or not index.labels or threshold > 1:
+            return value, []
         
-        # Case transformations
-        if rules.get("case") == "upper":
-            result = result.upper()
-        elif rules.get("case") == "lower":
-            result = result.lower()
-        elif rules.get("case") == "title":
-            result = result.title()
+        changes = []
         
-        # Language code normalization
-        if rules.get("lowercase_lang", False):
-            # Normalize language codes like "DE" -> "de"
-            if re.match(r'^[A-Z]{2}(-[A-Z]{2})?$', result):
-                parts = result.split('-')
-                result = parts[0].lower()
-                if len(parts) > 1:
-                    result += '-' + parts[1].upper()
+        def snap(item: Any) -> Any:
+            if not isinstance(item, str) or item in index.labels:
+                return item
+            nearest = index.nearest_label(item)
+            if nearest is None or nearest[1] < threshold:
+                return item
+            changes.append((item, nearest[0], nearest[1]))
+            return nearest[0]
         
-        return result
-    
-    def _deduplicate_list(self, items: List) -> List:
-        """Remove duplicates while preserving order."""
-        seen = set()
-        result = []
-        for item in items:
-            # Handle unhashable types
-            try:
-                if item not in seen:
-                    seen.add(item)
-                    result.append(item)
-            except TypeError:
-                # For unhashable types, use string representation
-                item_str = str(item)
-                if item_str not in seen:
-                    seen.add(item_str)
-                    result.append(item)
-        return result
+        if isinstance(value, list):
+            snapped = deduplicate([snap(v) for v in value])
+        else:
+            snapped = snap(value)
+        return snapped, changes
     
     def validate_value(self, value: Any, field: Field) -> tuple[bool, Optional[str]]:
         """Validate a field value according to schema rules.
-        
+
         Returns:
             Tuple of (is_valid, error_message)
         """
-        if value is None or value == "" or value == []:
-            if field.required:
-                return False, f"Pflichtfeld '{field.prompt.get('label', field.id)}' ist leer"
-            return True, None
-        
-        # Check validation patterns
-        validation = field.system.get("validation", {})
-        
-        if "pattern" in validation:
-            pattern = validation["pattern"]
-            
-            if field.multiple and isinstance(value, list):
-                # Validate each item
-                for item in value:
-                    if not re.match(pattern, str(item)):
-                        return False, f"Wert '{item}' entspricht nicht dem erwarteten Format"
-            else:
-                if not re.match(pattern, str(value)):
-                    return False, f"Wert entspricht nicht dem erwarteten Format: {pattern}"
-        
-        # Check vocabulary constraints
-        vocabulary = field.vocabulary
-        if vocabulary and vocabulary.get("type") == "closed":
-            allowed_values = [c.get("label") for c in vocabulary.get("concepts", [])]
-            
-            if field.multiple and isinstance(value, list):
-                for item in value:
-                    if item not in allowed_values:
-                        return False, f"Wert '{item}' ist nicht in der zulässigen Liste"
-            else:
-                if value not in allowed_values:
-                    return False, f"Wert '{value}' ist nicht in der zulässigen Liste"
-        
-        # Check minimum length
-        min_length = field.prompt.get("minLength")
-        if min_length and isinstance(value, str):
-            if len(value) < min_length:
-                return False, f"Wert muss mindestens {min_length} Zeichen lang sein"
-        
-        return True, None
+        error = self.plan(field).validate(value)
+        return error is None, error
     
     def map_labels_to_uris(self, value: Any, field: Field) -> Any:
-        """Map vocabulary labels to URIs if configured."""
-        normalization = field.system.get("normalization", {})
-        
-        if not normalization.get("map_labels_to_uris", False):
-            return value
-        
-        vocabulary = field.vocabulary
-        if not vocabulary:
-            return value
-        
-        # Build mapping
-        label_to_uri = {}
-        for concept in vocabulary.get("concepts", []):
-            label = concept.get("label", "")
-            uri = concept.get("uri", "")
-            if label and uri:
-                label_to_uri[label] = uri
-                
-                # Also map alternative labels
-                alt_labels = concept.get("altLabels", [])
-                for alt in alt_labels:
-                    label_to_uri[alt] = uri
-        
-        # Apply mapping
-        if field.multiple and isinstance(value, list):
-            return [label_to_uri.get(v, v) for v in value]
-        else:
-            return label_to_uri.get(value, value)
+        """Map vocabulary labels (and altLabels) to URIs if configured."""
+        return self.plan(field).map_uris(value)
     
     def validate_metadata(self, metadata: Dict[str, Any], fields: List[Field]) -> Dict[str, str]:
         """Validate entire metadata object.
-        
+
         Returns:
             Dict of field_id -> error_message for invalid fields
         """
-        errors = {}
+        return self.schema_plan(fields).validate(metadata)
+    
+    def validate_batch(self, records: Iterable[Dict[str, Any]], fields: List[Field],
+                       chunk_size: int = 10000) -> Iterator[BatchErrors]:
+        """Validate many records column by column, in chunks of chunk_size records.
         
-        for field in fields:
-            value = metadata.get(field.id)
-            is_valid, error = self.validate_value(value, field)
-            
-            if not is_valid:
-                errors[field.id] = error
+        Records are read lazily from the iterable (e.g. a generator over a JSONL export),
+        so memory stays bounded by the chunk size. Yields one BatchErrors per chunk;
+        the error codes match validate_metadata for each record.
+        """
+        plans = [(f.id, self.plan(f)) for f in fields]
+        plans = [(field_id, plan) for field_id, plan in plans if plan.validates]
+        field_ids = tuple(field_id for field_id, _ in plans)
         
-        return errors
+        iterator = iter(records)
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            codes = np.zeros((len(chunk), len(plans)), dtype=np.uint8, order="F")
+            for j, (field_id, plan) in enumerate(plans):
+                codes[:, j] = plan.validate_column([record.get(field_id) for record in chunk])
+            yield BatchErrors(offset, field_ids, codes)
+            offset += len(chunk)
     
     def normalize_metadata(self, metadata: Dict[str, Any], fields: List[Field]) -> Dict[str, Any]:
-        """Normalize entire metadata object."""
-        normalized = {}
-        
-        field_map = {f.id: f for f in fields}
-        
-        for field_id, value in metadata.items():
-            field = field_map.get(field_id)
-            if field:
-                normalized_value = self.normalize_value(value, field)
-                # Map labels to URIs if configured
-                normalized_value = self.map_labels_to_uris(normalized_value, field)
-                normalized[field_id] = normalized_value
-            else:
-                # Keep unknown fields as-is
-                normalized[field_id] = value
-        
-        return normalized
+        """Normalize entire metadata object (unknown fields are kept as-is)."""
+        return self.schema_plan(fields).normalize(metadata)
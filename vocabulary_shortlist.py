@@ -0,0 +1,109 @@
+"""Relevance shortlist of vocabulary concepts for a text (hashed character n-grams, vectorized with NumPy)."""
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from schema_loader import Field, VocabularyIndex
+
+# Hashing trick: every character n-gram is mapped to one of 2^_BITS buckets
+_BITS = 12
+_DIMENSIONS = 1 << _BITS
+_NGRAMS = (3, 4)
+_PRIME = np.uint64(1000003)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing spreads the n-gram hashes over the buckets
+# Labels and altLabels count more than definitions
+_LABEL_WEIGHT = 2.0
+# Vocabularies with fewer concepts are listed completely in the prompt
+LARGE_VOCABULARY = 20
+
+
+def hashed_ngrams(text: str) -> np.ndarray:
+    """Bucket ids of the character 3- and 4-grams of the case-folded words (space separated and padded)."""
+    normalized = " " + " ".join(re.findall(r"\w+", text.casefold())) + " "
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    buckets = []
+    for n in _NGRAMS:
+        count = len(codes) - n + 1
+        if count <= 0:
+            continue
+        hashes = np.full(count, n, dtype=np.uint64)
+        for offset in range(n):
+            hashes = hashes * _PRIME + codes[offset:offset + count]
+        buckets.append((hashes * _GOLDEN) >> np.uint64(64 - _BITS))
+    if not buckets:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(buckets).astype(np.int64)
+
+
+def _counts(text: str) -> np.ndarray:
+    return np.bincount(hashed_ngrams(text), minlength=_DIMENSIONS).astype(np.float32)
+
+
+def concept_text_counts(concept: Dict[str, Any]) -> np.ndarray:
+    """Weighted n-gram counts of a concept: label, altLabels and English label, plus its definition."""
+    names = [concept.get("label", ""), concept.get("label_en", ""), *concept.get("altLabels", [])]
+    counts = _LABEL_WEIGHT * _counts(" ".join(str(name) for name in names if name))
+    definition = concept.get("definition")
+    if definition:
+        counts += _counts(str(definition))
+    return counts
+
+
+class ConceptIndex:
+    """TF-IDF matrix (concepts x hashed n-grams) of one vocabulary, rows L2-normalized."""
+    
+    def __init__(self, concepts: List[Dict[str, Any]]):
+        concepts = [c for c in concepts if c.get("label")]
+        self.labels = [c["label"] for c in concepts]
+        counts = np.vstack([concept_text_counts(c) for c in concepts]) if concepts else np.zeros((0, _DIMENSIONS), np.float32)
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(concepts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        matrix = np.log1p(counts) * self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms > 0, norms, 1)
+    
+    def scores(self, text_counts: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each concept to the text (n-gram counts as returned by _counts)."""
+        vector = np.log1p(text_counts) * self.idf
+        norm = np.linalg.norm(vector)
+        return self.matrix @ (vector / norm if norm > 0 else vector)
+    
+    def top(self, text_counts: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """The k most similar concept labels with their score, best first (ties in vocabulary order)."""
+        scores = self.scores(text_counts)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(self.labels[i], float(scores[i])) for i in order]
+
+
+class VocabularyShortlist:
+    """Selects the k concepts most relevant to a text for every field with a large vocabulary.
+
+    Fields with LARGE_VOCABULARY or more concepts cannot be listed in the prompt; the
+    shortlist puts the concepts whose labels, altLabels and definitions share the most
+    (idf-weighted) character n-grams with the text there instead. The concept matrix
+    of a field is built on first use and rebuilt if the field's vocabulary is reloaded.
+    """
+    
+    def __init__(self, k: int = 15):
+        self.k = k
+        self._indexes: Dict[str, Tuple[VocabularyIndex, ConceptIndex]] = {}  # field id -> (vocabulary, index)
+    
+    @staticmethod
+    def applies(field: Field) -> bool:
+        return len(field.get_vocabulary_concepts()) >= LARGE_VOCABULARY
+    
+    def _index(self, field: Field) -> ConceptIndex:
+        entry = self._indexes.get(field.id)
+        if entry is None or entry[0] is not field.vocabulary_index:
+            entry = (field.vocabulary_index, ConceptIndex(field.get_vocabulary_concepts()))
+            self._indexes[field.id] = entry
+        return entry[1]
+    
+    def shortlist(self, text: str, fields: List[Field]) -> Dict[str, List[str]]:
+        """Field id -> the k most relevant concept labels, for the fields with a large vocabulary."""
+        large = [field for field in fields if self.applies(field)]
+        if not large or self.k <= 0:
+            return {}
+        text_counts = _counts(text)
+        return {field.id: [label for label, _ in self._index(field).top(text_counts, self.k)] for field in large}